@@ -0,0 +1,97 @@
+"""
+Uyarlanabilir çekme: sabit 5x tampon yerine küçük bir ilk istek, ölçülen geçme
+oranına göre büyüyen ek istekler.
+
+İlk isteğin boyutu, aynı sorgu/kategori için daha önce ölçülen geçme oranından
+(filtrelerden geçen / taranan) hesaplanır. Hedefe ulaşılamazsa istek, eksik kalan
+sayıya ve güncel orana göre büyütülür; hedef dolunca, aktör daha fazla sonuç
+döndüremeyince veya maliyet tavanına gelinince durulur.
+
+Aktör offset desteklemediği için her tur baştan yeni bir çalıştırmadır ve önceki
+videoları yeniden tarar; maliyet tavanı bu yüzden tek turun limitine değil, tüm
+turlarda istenen limitlerin toplamına uygulanır.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from apify_cache import DEFAULT_CACHE_PATH
+from product_intent import normalize_turkish
+
+# Bir aramada tüm turlar boyunca taranabilecek toplam video tavanı (eski sabit tamponun üst sınırı)
+MAX_FETCH_ITEMS = int(os.environ.get("APIFY_MAX_FETCH_ITEMS", "300"))
+DEFAULT_PASS_RATE = 0.2  # Ölçüm yokken: 5 videodan 1'i geçer (eski 5x tampon)
+MIN_PASS_RATE = 0.02
+MIN_REQUEST = 10
+SAFETY = 1.3             # Oran tahminindeki sapmaya karşı pay
+MAX_ROUNDS = 3
+EMA_ALPHA = 0.5          # Yeni ölçümün ağırlığı
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pass_rates (
+    key TEXT PRIMARY KEY,
+    rate REAL NOT NULL,
+    samples INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+def rate_key(queries, *extra):
+    """Sorgu listesi (+ tarih aralığı gibi oranı etkileyen ayarlar) için kalıcı anahtar."""
+    norm = sorted({" ".join(normalize_turkish(q).split()) for q in queries})
+    return "|".join(norm + [str(e) for e in extra])
+
+class PassRateMemory:
+    """Sorgu/kategori başına geçme oranı (üstel hareketli ortalama), Apify önbelleğiyle aynı SQLite dosyasında."""
+    def __init__(self, path=DEFAULT_CACHE_PATH, default=DEFAULT_PASS_RATE):
+        self.path = path
+        self.default = default
+        self._lock = threading.Lock()
+        with self._db() as con: con.executescript(SCHEMA)
+
+    def _db(self):
+        return closing(sqlite3.connect(self.path, timeout=30, isolation_level=None))
+
+    def get(self, key):
+        with self._db() as con:
+            row = con.execute("SELECT rate FROM pass_rates WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else self.default
+
+    def observe(self, key, fetched, passed):
+        if fetched <= 0: return
+        rate = passed / fetched
+        with self._lock, self._db() as con:
+            row = con.execute("SELECT rate, samples FROM pass_rates WHERE key = ?", (key,)).fetchone()
+            if row: rate, samples = EMA_ALPHA * rate + (1 - EMA_ALPHA) * row[0], row[1] + 1
+            else: samples = 1
+            con.execute("INSERT OR REPLACE INTO pass_rates VALUES (?, ?, ?, ?)", (key, rate, samples, time.time()))
+
+def plan_request(needed, pass_rate, already=0, ceiling=MAX_FETCH_ITEMS, minimum=MIN_REQUEST):
+    """`needed` nitelikli sonuç için toplam kaç video istenmesi gerektiği (öncekilerin üzerine, tavanla sınırlı)."""
+    extra = math.ceil(needed / max(pass_rate, MIN_PASS_RATE) * SAFETY)
+    return min(ceiling, max(minimum, already + extra))
+
+def adaptive_fetch(fetch_round, target, memory, key, ceiling=MAX_FETCH_ITEMS, max_rounds=MAX_ROUNDS):
+    """
+    fetch_round(toplam_limit, eksik) -> (taranan, geçen, tükendi[, istenen]) çağrılarını hedefe kadar tekrarlar.
+    fetch_round her turda sadece yeni (önceki turlarda görülmemiş) videoları saymalıdır; aktörden
+    gerçekte istenen sayı limitten farklıysa (örn. sorgu başına alt sınır) dördüncü değer olarak döner.
+    İstenenlerin toplamı ceiling'i aşmaz: kalan bütçe önceki turdan büyük bir istek için
+    yetmiyorsa (yeni video getiremez) durulur.
+    Toplam (taranan, geçen, tur sayısı) döner ve ölçülen oranı hafızaya yazar.
+    """
+    rate = memory.get(key)
+    fetched = passed = rounds = limit = spent = 0
+    while passed < target and rounds < max_rounds:
+        planned = min(plan_request(target - passed, rate, limit, ceiling), ceiling - spent)
+        if planned <= limit: break
+        n_fetched, n_passed, exhausted, *requested = fetch_round(planned, target - passed)
+        limit = requested[0] if requested else planned
+        fetched, passed, rounds, spent = fetched + n_fetched, passed + n_passed, rounds + 1, spent + limit
+        if fetched: rate = max(passed / fetched, MIN_PASS_RATE)
+        if exhausted: break
+    memory.observe(key, fetched, passed)
+    return fetched, passed, rounds
@@ -0,0 +1,261 @@
+"""
+Apify aktör sonuçları için kalıcı disk önbelleği (SQLite).
+
+Anahtar: aktör id + kanonik hale getirilmiş run_input (anahtarlar sıralı, arama
+sorguları boşluk/büyük-küçük harf normalize). Değer: zlib ile sıkıştırılmış JSON.
+Aktör başına TTL, boyut sınırını aşınca en eski erişilenden başlayarak (LRU) silme
+ve "yeniden çek" ile önbelleği atlama desteklenir. Hit/miss sayaçları da
+veritabanında tutulur, böylece Streamlit yeniden çalıştırmalarında kaybolmaz.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import closing
+
+from ingest import DEFAULT_PAGE_SIZE, iter_dataset_pages
+from instrumentation import span
+from product_intent import normalize_turkish
+
+DEFAULT_CACHE_PATH = os.environ.get("APIFY_CACHE_PATH", "apify_cache.sqlite")
+
+# Aktör başına geçerlilik süresi (saniye)
+DEFAULT_TTLS = {
+    "clockworks/free-tiktok-scraper": 6 * 3600,
+    "clockworks/tiktok-scraper": 6 * 3600,
+    "apify/google-search-scraper": 24 * 3600,
+}
+DEFAULT_TTL = 3600
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+# Değeri arama metni olan alanlar: normalize edilir ki "Bileklik " ile "bileklik" aynı anahtara düşsün
+QUERY_FIELDS = ("searchQueries", "queries")
+# Sorgu başına sonuç sayısı alanı: aynı girdinin daha büyük limitli kaydı küçük isteği de karşılar
+LIMIT_FIELD = "resultsPerPage"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    actor_id TEXT NOT NULL,
+    run_input TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    partial INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access);
+CREATE TABLE IF NOT EXISTS stats (
+    actor_id TEXT PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+def _normalize_query(value):
+    if isinstance(value, str): return " ".join(normalize_turkish(value).split())
+    if isinstance(value, list): return [_normalize_query(v) for v in value]
+    return value
+
+def canonical_run_input(run_input):
+    """run_input'un anahtar olarak kullanılacak kanonik JSON hali."""
+    canon = {k: (_normalize_query(v) if k in QUERY_FIELDS else v) for k, v in run_input.items()}
+    return json.dumps(canon, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+def cache_key(actor_id, run_input):
+    return hashlib.sha256(f"{actor_id}\n{canonical_run_input(run_input)}".encode()).hexdigest()
+
+def _without_limit(canon):
+    rest = json.loads(canon)
+    return rest.pop(LIMIT_FIELD, None), rest
+
+def trim_items(items, run_input):
+    """Daha büyük limitli kayıttan istenen limit kadarını alır (searchQuery varsa sorgu başına)."""
+    limit = run_input.get(LIMIT_FIELD)
+    if not isinstance(limit, int): return items
+    if not all(isinstance(it, dict) and it.get("searchQuery") for it in items):
+        return items[:limit * max(1, len(run_input.get("searchQueries") or [None]))]
+    taken, out = {}, []
+    for it in items:
+        q = _normalize_query(it["searchQuery"])
+        if taken.get(q, 0) < limit:
+            taken[q] = taken.get(q, 0) + 1
+            out.append(it)
+    return out
+
+class ApifyResultCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttls=None, default_ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        with self._db() as con:
+            con.executescript(SCHEMA)
+            # Eski önbellek dosyaları: yarım kayıt işareti sonradan eklendi
+            if "partial" not in {r[1] for r in con.execute("PRAGMA table_info(results)")}:
+                con.execute("ALTER TABLE results ADD COLUMN partial INTEGER NOT NULL DEFAULT 0")
+
+    def _db(self):
+        # Streamlit oturumları farklı thread'lerde çalışır; her işlem kendi bağlantısını açar
+        return closing(sqlite3.connect(self.path, timeout=30, isolation_level=None))
+
+    def ttl(self, actor_id):
+        return self.ttls.get(actor_id, self.default_ttl)
+
+    def _count(self, con, actor_id, field):
+        con.execute(f"INSERT INTO stats (actor_id, {field}) VALUES (?, 1) "
+                    f"ON CONFLICT(actor_id) DO UPDATE SET {field} = {field} + 1", (actor_id,))
+
+    def get(self, actor_id, run_input):
+        """
+        Geçerli kayıt varsa öğe listesini, yoksa None döndürür. Birebir kayıt yoksa aynı girdinin
+        daha büyük resultsPerPage ile alınmış kaydı kırpılarak kullanılır (adaptif istek boyutu
+        değişse de tekrar eden arama önbellekten gelir). Yarım kayıtlar (bkz. iter_pages) sadece
+        istenen sayıyı tam karşılıyorsa kullanılır.
+        """
+        return self._get(actor_id, run_input)[0]
+
+    def _get(self, actor_id, run_input, allow_partial=False):
+        # (öğeler, yarım mı); allow_partial ise birebir anahtardaki yarım kayıt da döner
+        key, now = cache_key(actor_id, run_input), time.time()
+        with self._lock, self._db() as con:
+            row = con.execute("SELECT payload, created_at, partial FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] <= self.ttl(actor_id) and (allow_partial or not row[2]):
+                items, partial = json.loads(zlib.decompress(row[0])), bool(row[2])
+            else:
+                key, items = self._covering(con, actor_id, run_input, now)
+                partial = False
+            if items is None:
+                self._count(con, actor_id, "misses")
+                return None, False
+            con.execute("UPDATE results SET last_access = ? WHERE key = ?", (now, key))
+            self._count(con, actor_id, "hits")
+        return items, partial
+
+    def _covering(self, con, actor_id, run_input, now):
+        """Aynı girdinin daha büyük limitli kaydından kırpılmış öğeler: (anahtar, öğeler) ya da (None, None)."""
+        limit, rest = _without_limit(canonical_run_input(run_input))
+        if not isinstance(limit, int): return None, None
+        candidates = []
+        for key, canon, partial in con.execute("SELECT key, run_input, partial FROM results WHERE actor_id = ? AND created_at >= ?",
+                                               (actor_id, now - self.ttl(actor_id))):
+            other_limit, other_rest = _without_limit(canon)
+            if other_rest == rest and isinstance(other_limit, int) and other_limit >= limit:
+                candidates.append((other_limit, partial, key))
+        wanted = limit * max(1, len(run_input.get("searchQueries") or [None]))
+        for _, partial, key in sorted(candidates):
+            row = con.execute("SELECT payload FROM results WHERE key = ?", (key,)).fetchone()
+            items = trim_items(json.loads(zlib.decompress(row[0])), run_input)
+            # Yarım kayıt sadece her sorgu için istenen sayıyı tam içeriyorsa küçük isteği karşılar
+            if not partial or len(items) >= wanted: return key, items
+        return None, None
+
+    def put(self, actor_id, run_input, items, partial=False):
+        payload = zlib.compress(json.dumps(items, ensure_ascii=False, default=str).encode(), 6)
+        now = time.time()
+        with self._lock, self._db() as con:
+            con.execute("INSERT OR REPLACE INTO results (key, actor_id, run_input, payload, size, created_at, last_access, partial) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (cache_key(actor_id, run_input), actor_id, canonical_run_input(run_input),
+                         payload, len(payload), now, now, int(partial)))
+            self._evict(con)
+
+    def _evict(self, con):
+        # Önce süresi dolanlar, sonra boyut sınırına inene kadar en eski erişilenler silinir
+        now = time.time()
+        for actor_id, ttl in self.ttls.items():
+            con.execute("DELETE FROM results WHERE actor_id = ? AND created_at < ?", (actor_id, now - ttl))
+        con.execute(f"DELETE FROM results WHERE actor_id NOT IN ({','.join('?' * len(self.ttls))}) AND created_at < ?",
+                    (*self.ttls, now - self.default_ttl))
+        total = con.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes: return
+        for key, size in con.execute("SELECT key, size FROM results ORDER BY last_access").fetchall():
+            con.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes: break
+
+    def call(self, client, actor_id, run_input, force_refresh=False, on_run=None, **call_kwargs):
+        """
+        client.actor(actor_id).call(...) + dataset okuma, önbellek üzerinden.
+        force_refresh=True önbelleği atlar ve sonucu tazeler. Çalışma veri seti üretmezse None döner.
+        on_run(run) gerçekten aktör çalıştırıldığında çalışma kaydıyla çağrılır (maliyet takibi için).
+        """
+        if not force_refresh:
+            items = self._cached(actor_id, run_input)
+            if items is not None: return items
+        else:
+            with self._lock, self._db() as con: self._count(con, actor_id, "misses")
+        run = self._run(client, actor_id, run_input, on_run, call_kwargs)
+        if not run or not run.get("defaultDatasetId"): return None
+        with span("dataset_download") as s:
+            items = client.dataset(run["defaultDatasetId"]).list_items().items
+            s.set(rows_out=len(items or []))
+        if items: self.put(actor_id, run_input, items)
+        return items
+
+    def _cached(self, actor_id, run_input, allow_partial=False):
+        with span("apify_cache_read", actor=actor_id) as s:
+            items, partial = self._get(actor_id, run_input, allow_partial)
+            s.set(rows_out=None if items is None else len(items), hit=items is not None)
+        return (items, partial) if allow_partial else items
+
+    def _run(self, client, actor_id, run_input, on_run, call_kwargs):
+        with span("apify_run", actor=actor_id) as s:
+            run = client.actor(actor_id).call(run_input=run_input, **call_kwargs)
+            s.add_run(run)
+        if on_run and run: on_run(run)
+        return run
+
+    def iter_pages(self, client, actor_id, run_input, page_size=DEFAULT_PAGE_SIZE, force_refresh=False, on_run=None, **call_kwargs):
+        """
+        call() ile aynı, ama öğeleri sayfa sayfa üretir. Önbellekteyse kayıt sayfalara bölünür;
+        değilse veri seti offset/limit ile okunur. Tüketici erken durursa (üreteç kapatılırsa) kalan
+        sayfalar indirilmez; sadece okunan sayfalar "yarım" olarak önbelleğe yazılır. Yarım kayıt
+        aynı girdiyle tekrar okunurken tükenirse aktör yeniden çalıştırılır ve okumaya kaydın
+        bittiği yerden devam edilir (tekrar eden videoları tüketici ayıklar).
+        """
+        collected = []
+        if not force_refresh:
+            items, partial = self._cached(actor_id, run_input, allow_partial=True)
+            if items is not None:
+                for i in range(0, len(items), page_size): yield items[i:i + page_size]
+                if not partial: return
+                collected = items
+        else:
+            with self._lock, self._db() as con: self._count(con, actor_id, "misses")
+        run = self._run(client, actor_id, run_input, on_run, call_kwargs)
+        if not run or not run.get("defaultDatasetId"): return
+        cached, complete = len(collected), False
+        try:
+            for page in iter_dataset_pages(client, run["defaultDatasetId"], page_size, offset=cached):
+                collected.extend(page)
+                yield page
+            complete = True
+        finally:
+            # Erken durma veya indirme hatası: sadece okunanlar yarım işaretiyle saklanır
+            if len(collected) > cached or (complete and collected): self.put(actor_id, run_input, collected, partial=not complete)
+
+    def entries(self, actor_ids):
+        """Verilen aktörlerin önbellekteki tüm kayıtları: (öğe listesi, oluşturulma zamanı) üreteci."""
+        with self._db() as con:
+            keys = con.execute(f"SELECT key, created_at FROM results WHERE actor_id IN ({', '.join('?' * len(actor_ids))})",
+                               tuple(actor_ids)).fetchall()
+        for key, created_at in keys:
+            with self._db() as con: row = con.execute("SELECT payload FROM results WHERE key = ?", (key,)).fetchone()
+            if row: yield json.loads(zlib.decompress(row[0])), created_at
+
+    def stats(self):
+        """Aktör başına hit/miss sayaçları ve önbellekteki kayıt/boyut bilgisi."""
+        with self._db() as con:
+            rows = con.execute("""
+                SELECT s.actor_id, s.hits, s.misses, COUNT(r.key), COALESCE(SUM(r.size), 0)
+                FROM stats s LEFT JOIN results r ON r.actor_id = s.actor_id
+                GROUP BY s.actor_id ORDER BY s.actor_id""").fetchall()
+        return [{"Aktör": a, "Hit": h, "Miss": m, "Kayıt": n, "Boyut (KB)": round(size / 1024, 1)} for a, h, m, n, size in rows]
+
+    def clear(self):
+        with self._lock, self._db() as con: con.execute("DELETE FROM results")
@@ -0,0 +1,40 @@
+"""
+Birden çok Apify aktör çalıştırmasını aynı anda başlatıp birlikte bekleyen katman.
+
+Her sorgu bir thread'de çalışır (aktör çağrısı bloklayan bir HTTP beklemesidir),
+sonuçlar geldikçe birleştirilir ve URL'ye göre tekilleştirilir. Toplam süre
+çalışmaların toplamı değil, en yavaş tek çalışmaya yakındır.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+# Aynı anda en fazla kaç aktör çalıştırması açılacağı (Apify hesabının eşzamanlılık sınırı)
+MAX_CONCURRENT_RUNS = int(os.environ.get("APIFY_MAX_CONCURRENT_RUNS", "4"))
+
+def run_concurrently(fn, queries, max_workers=MAX_CONCURRENT_RUNS, **kwargs):
+    """fn(sorgu, **kwargs) çağrılarını paralel çalıştırır; (sorgu, sonuç) çiftlerini bitiş sırasıyla üretir."""
+    if not queries: return
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queries)))) as pool:
+        futures = {pool.submit(fn, q, **kwargs): q for q in queries}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def fan_out_frames(fn, queries, dedupe_on="url", tag_column=None, on_result=None, max_workers=MAX_CONCURRENT_RUNS, **kwargs):
+    """
+    DataFrame döndüren bir scraper'ı tüm sorgular için aynı anda çalıştırır.
+    Gelen her sonuç, daha önce görülmemiş `dedupe_on` değerleriyle birleştirilir (ilk gelen kazanır).
+    tag_column verilirse her satıra onu getiren sorgu yazılır; on_result(sorgu, df) ilerleme bildirimi içindir
+    ve ana thread'de çağrılır (Streamlit çağrıları güvenlidir).
+    """
+    seen, parts = set(), []
+    for query, df in run_concurrently(fn, queries, max_workers, **kwargs):
+        if on_result: on_result(query, df)
+        if df is None or df.empty: continue
+        if tag_column: df = df.assign(**{tag_column: query})
+        if dedupe_on in df.columns:
+            df = df[~df[dedupe_on].isin(seen)].drop_duplicates(subset=[dedupe_on])
+            seen.update(df[dedupe_on].tolist())
+        parts.append(df)
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
@@ -4,14 +4,39 @@ from apify_client import ApifyClient
 from datetime import datetime, timedelta
 import re
 import os
-import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 import uuid
 import time
 import numpy as np
-import random 
 import ast
 
+# Katı içerik alaka filtresi (sütun bazlı maskeler)
+from relevance import filter_content_relevance_by_query
+# Tedarikçi sınıflandırıcı (alan adı indeksi + neden sütunu)
+from suppliers import filter_suppliers_strict
+# Metrikler ve vektörel karar puanı
+from metrics import calculate_metrics, load_decision_config
+# Apify sonuçları için kalıcı disk önbelleği
+from apify_cache import ApifyResultCache
+# Çoklu sorguyu aynı anda çalıştırma (thread havuzu)
+from apify_fanout import fan_out_frames
+# Çok terimli TikTok aramasını tek aktör çalıştırmasında toplama
+from tiktok_search import per_query_limit, tag_search_frame, tag_search_results
+# Süreç boyunca açık kalan Google Sheets oturumu
+from sheets import SheetExporter, SheetSession
+# Yerel kayıt deposu (SQLite); Sheets sadece isteğe bağlı dışa aktarım
+from store import SHEET_TABS, LocalStore, import_from_sheets
+# Anlık görüntü geçmişinden yaşa göre normalize yükseliş sıralaması
+from velocity import rising_ranking
+# Takip edilen ürünlerin yeniden analizi (zamanlayıcıyla ortak)
+import tracking
+# Küresel video indeksi (Bloom filtresi + özet dizisi, yerel depo destekli)
+from video_index import VideoIndex
+# Yerel başlık dizini (Türkçe ek budamalı ters indeks)
+from text_index import TextIndex
+# Yeniden yüklenen ürün videolarını tek satıra indiren MinHash/LSH kümeleme
+from near_duplicates import collapse_near_duplicates
+
 # --- SAYFA YAPILANDIRMASI (EN BAŞTA) ---
 st.set_page_config(page_title="Tiktok Viral Takip", layout="wide")
 st.markdown("""
@@ -53,6 +78,16 @@ else:
 
 client = ApifyClient(APIFY_TOKEN)
 
+# Apify önbelleği süreç boyunca tek örnek (tüm oturumlar paylaşır)
+@st.cache_resource
+def get_apify_cache():
+    return ApifyResultCache()
+
+APIFY_CACHE = get_apify_cache()
+
+# Karar eşikleri: secrets.toml içinde [decision_config] varsa varsayılanların üzerine yazılır
+DECISION_CONFIG = load_decision_config(st.secrets["decision_config"] if "decision_config" in st.secrets else None)
+
 # --- ARAMA STRATEJİLERİ ---
 SEARCH_STRATEGIES_TR = {
     "🔥 Türkiye Geneli (Viral)": ["#tiktokzamanı", "kargo bedava", "kapıda ödeme", "#aldım", "#öneri", "#trendyol", "link profilde", "bunu almalısın"],
@@ -63,44 +98,87 @@ SEARCH_STRATEGIES_TR = {
 }
 
 # --- GOOGLE SHEETS BAĞLANTISI ---
-def get_gspread_client():
+def get_gspread_credentials():
     scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
     if "gcp_service_account" in st.secrets:
         creds_dict = st.secrets["gcp_service_account"]
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-    elif os.path.exists(CREDENTIALS_FILE):
-        creds = ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_FILE, scope)
-    else:
-        st.error("🚨 Kimlik doğrulama başarısız! Secrets eksik.")
-        st.stop()
-    return gspread.authorize(creds)
+        return ServiceAccountCredentials.from_json_keyfile_dict(dict(creds_dict), scope)
+    if os.path.exists(CREDENTIALS_FILE):
+        return ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_FILE, scope)
+    return None
+
+# Yetkilendirme, tablo açma ve şema kontrolü süreç başına bir kez yapılır
+@st.cache_resource
+def get_sheet_session():
+    session = SheetSession(get_gspread_credentials, MASTER_SHEET_NAME)
+    return session, session.ensure_schema()
 
 def init_master_sheet():
-    gc = get_gspread_client()
+    if get_gspread_credentials() is None:
+        st.error("🚨 Kimlik doğrulama başarısız! Secrets eksik.")
+        st.stop()
     try:
-        sh = gc.open(MASTER_SHEET_NAME)
-        try: sh.worksheet("List")
-        except: 
-            ws = sh.add_worksheet(title="List", rows="100", cols="10")
-            ws.append_row(["ID", "Urun_Adi", "Rakipler_Sekme_Adi", "Performans_Sekme_Adi", "Son_Analiz_Tarihi", "Sonraki_Analiz_Tarihi", "Son_Viral_Skor", "Durum", "URL", "Arama_Sorgusu"])
-        try: sh.worksheet("Bookmarks")
-        except:
-            ws = sh.add_worksheet(title="Bookmarks", rows="100", cols="10")
-            ws.append_row(["Tarih", "Aciklama", "Izlenme", "Viral_Skor", "Etkilesim", "Video_URL", "Resim_URL"])
-        try: sh.worksheet("Suppliers")
-        except:
-            ws = sh.add_worksheet(title="Suppliers", rows="100", cols="10")
-            ws.append_row(["ID", "Tarih", "Urun_Adi", "Tedarikci_Baslik", "Web_Sitesi", "Aciklama", "Arama_Terimi"])
-        try: sh.worksheet("Meta_Results")
-        except:
-            ws = sh.add_worksheet(title="Meta_Results", rows="100", cols="10")
-            ws.append_row(["ID", "Tarih", "Urun_Adi", "Baslik", "Link", "Aciklama", "Kaynak"])
-        return sh
+        session, problems = get_sheet_session()
     except Exception as e:
         st.error(f"Google Sheet Hatası: '{MASTER_SHEET_NAME}' dosyası bulunamadı!")
         st.stop()
+    for problem in problems: st.warning(f"Sheet şeması uyumsuz: {problem}")
+    return session
+
+# --- YEREL DEPO ---
+@st.cache_resource
+def get_local_store():
+    return LocalStore()
+
+STORE = get_local_store()
+
+# Süreç boyunca tek indeks: tüm oturumlar aynı "daha önce görüldü" bilgisini paylaşır
+@st.cache_resource
+def get_video_index():
+    return VideoIndex(STORE)
+
+VIDEO_INDEX = get_video_index()
+
+# Daha önce çekilmiş başlıklar üzerinde yerel arama dizini (Gözcü önce buraya bakar)
+@st.cache_resource
+def get_corpus():
+    corpus = TextIndex(STORE.path)
+    corpus.backfill(APIFY_CACHE, STORE)
+    return corpus
+
+CORPUS = get_corpus()
+LOCAL_MIN_RESULTS = 10  # Yerel dizin filtrelerden sonra bundan az video verirse canlı aranır
+
+# Sheets dışa aktarımı: kimlik bilgisi varsa ve secrets'ta sheets_export = false değilse açık
+@st.cache_resource
+def get_sheet_exporter():
+    if get_gspread_credentials() is None or not st.secrets.get("sheets_export", True): return None
+    def open_session():
+        # Yazılamayan satırlar yerel depoda bekler; önceki çalışmadan kalanlar açılışta gönderilir
+        session = SheetSession(get_gspread_credentials, MASTER_SHEET_NAME, pending=STORE)
+        session.ensure_schema()
+        session.flush()
+        return session
+    exporter = SheetExporter(open_session)
+    # Zamanlayıcının (scheduler.py) yaptığı ürün güncellemeleri açılışta List sekmesine işlenir
+    exporter.sync(SHEET_TABS["products"], STORE.products().to_dict("records"))
+    return exporter
+
+SHEET_EXPORTER = get_sheet_exporter()
+
+def export_rows(table, rows):
+    if SHEET_EXPORTER is not None: SHEET_EXPORTER.export_rows(SHEET_TABS[table], rows)
+
+def export_product(product_id):
+    """Ürünün güncel satırını (tarihler, skor, durum) List sekmesinde yerinde günceller."""
+    if SHEET_EXPORTER is None: return
+    products = STORE.products()
+    SHEET_EXPORTER.sync(SHEET_TABS["products"], products[products['ID'] == product_id].to_dict("records"))
+
+def clear_table(table):
+    STORE.clear(table)
+    if SHEET_EXPORTER is not None: SHEET_EXPORTER.reset(SHEET_TABS[table])
 
-# --- MALİYET HESAPLAMA ---
 def get_apify_usage_stats():
     try:
         user_info = client.user().get()
@@ -155,88 +233,63 @@ def clean_hashtags_display(hashtag_str):
         return ""
     except: return ""
 
-def fetch_video_info(video_url):
+def fetch_video_info(video_url, force_refresh=False):
     run_input = {"postURLs": [video_url], "resultsPerPage": 1}
-    run = client.actor("clockworks/tiktok-scraper").call(run_input=run_input)
-    if not run.get("defaultDatasetId"): return None, None
-    items = client.dataset(run["defaultDatasetId"]).list_items().items
+    items = APIFY_CACHE.call(client, "clockworks/tiktok-scraper", run_input, force_refresh)
+    if items is None: return None, None
     return (items[0].get('text', ''), items[0]) if items else (None, None)
 
-def search_competitors(query, limit=15):
-    run_input = {
-        "searchQueries": [query],
-        "resultsPerPage": limit,
-        "searchSection": "/video", 
-        "shouldDownloadCovers": True,  
-        "proxyConfiguration": { "useApifyProxy": True } 
-    }
+def search_competitors(query, limit=15, force_refresh=False):
     try:
-        run = client.actor("clockworks/tiktok-scraper").call(run_input=run_input, memory_mbytes=1024, timeout_secs=120)
-        if run.get("defaultDatasetId"):
-            items = client.dataset(run["defaultDatasetId"]).list_items().items
-            return pd.DataFrame(items)
+        return tracking.search_competitors(client, APIFY_CACHE, query, limit, force_refresh, corpus=CORPUS)
+    except Exception as e:
+        st.warning(f"Apify Arama Hatası: {e}")
         return pd.DataFrame()
+
+def search_competitors_batch(queries, limit_per_query=15, force_refresh=False):
+    """Tüm terimleri tek aktör çalıştırmasında arar; her video onu getiren sorguyla etiketlenir ve tekilleştirilir."""
+    run_input = tracking.tiktok_search_input(queries, limit_per_query)
+    try:
+        items = APIFY_CACHE.call(client, "clockworks/tiktok-scraper", run_input, force_refresh, memory_mbytes=1024, timeout_secs=180)
+        df = tag_search_results(items, queries)
+        CORPUS.add(df)
+        return df
     except Exception as e:
         st.warning(f"Apify Arama Hatası: {e}")
         return pd.DataFrame()
 
-# --- YENİ: KATI İÇERİK RELEVANSI FİLTRESİ ---
-def filter_content_relevance(df, query):
+def discovery_filter(df, day_filter):
+    """Gözcü filtreleri: metrikler, sorgu bazlı alaka, zaman/izlenme. (kalan df, alakalı video sayısı) döner."""
+    if df.empty: return df, 0
+    df = calculate_metrics(df, DECISION_CONFIG)
+    # YENİ EKLENEN AKILLI FİLTRE BURADA ÇAĞRILIYOR (her video kendi sorgusuna göre)
+    df = filter_content_relevance_by_query(df, 'Arama_Sorgusu')
+    relevant = len(df)
+    if df.empty: return df, 0
+    today = datetime.now()
+    if day_filter == "Son 7 Gün":
+        if 'createTimeISO' in df.columns: df = df[df['createTimeISO'] >= (today - timedelta(days=7))]
+        df = df[df['playCount'] > 1000]
+    elif day_filter == "Son 30 Gün":
+        if 'createTimeISO' in df.columns: df = df[df['createTimeISO'] >= (today - timedelta(days=30))]
+        df = df[df['playCount'] > 1000]
+    return df, relevant
+
+def discover(queries, day_filter, force_refresh=False):
     """
-    Sadece Türkçe olmak yetmez, aranan ürünle alakalı mı diye bakar.
-    Örn: 'Bileklik' aranıyorsa, içinde bileklik geçmeyen dua videosunu eler.
+    Önce yerel dizin: son 24 saatte görülmüş ve filtreden LOCAL_MIN_RESULTS kadar video geçerse
+    Apify'a gidilmez. Yoksa (veya önbellek atlanıyorsa) canlı arama yapılır.
+    (filtrelenmiş df, ham video sayısı, alakalı video sayısı, kaynak) döner.
     """
-    if df.empty or not query: return df
-    
-    # 1. Türkçe Filtresi
-    tr_chars = ['ı', 'ğ', 'ş', 'ö', 'ç', 'ü', 'İ', 'Ğ', 'Ş', 'Ö', 'Ç', 'Ü']
-    # Ticari kelimeler (Bu kelimeler varsa ürün olma ihtimali yüksek)
-    commerce_keywords = ["fiyat", "kargo", "sipariş", "ne kadar", "link", "profil", "bilgi", "dm", "satış", "bedava", "indirim", "tl", "kapıda", "ödeme", "model", "tasarım", "ürün", "adet", "stok", "kampanya"]
-    
-    # Sorgu kelimelerini parçala (Örn: ['ayetel', 'kürsi', 'bilekliği'])
-    query_words = set(query.lower().split())
-    # Çok kısa kelimeleri çıkar (ve, ile, bir vs.)
-    query_words = {w for w in query_words if len(w) > 2}
-    
-    filtered_rows = []
-    
-    for _, row in df.iterrows():
-        text = str(row.get('text', '')).lower()
-        
-        # A. Dil Kontrolü
-        lang = str(row.get('textLanguage', '')).lower()
-        is_turkish = (lang == 'tr') or any(char in text for char in tr_chars) or any(kw in text for kw in commerce_keywords)
-        
-        if not is_turkish:
-            continue
-
-        # B. Alaka Düzeyi (Relevance) Kontrolü
-        # Aranan kelimelerin metinde geçme oranı
-        match_count = sum(1 for w in query_words if w in text)
-        
-        # Eğer sorgu tek kelimeyse (örn: "bileklik") o kelime mutlaka geçmeli
-        if len(query_words) == 1:
-            if match_count == 1:
-                filtered_rows.append(row)
-        else:
-            # Çok kelimeli sorguda (örn: "ayetel kürsi bilekliği")
-            # En azından yarısı geçmeli VEYA ticari bir kelimeyle desteklenmeli
-            is_relevant = False
-            
-            # Kelimelerin %50'sinden fazlası geçiyor mu?
-            if len(query_words) > 0 and (match_count / len(query_words) >= 0.5):
-                is_relevant = True
-            
-            # VEYA: Aranan kelimelerden BİRİ geçiyor VE Ticari kelime geçiyor (Örn: "Bileklik modelleri fiyat")
-            if match_count > 0 and any(ck in text for ck in commerce_keywords):
-                is_relevant = True
-                
-            if is_relevant:
-                filtered_rows.append(row)
-            
-    return pd.DataFrame(filtered_rows)
-
-def run_google_scraper(query, limit=20):
+    if not force_refresh:
+        raw = tag_search_frame(CORPUS.search_many(queries), queries)
+        df, relevant = discovery_filter(raw, day_filter)
+        if len(df) >= LOCAL_MIN_RESULTS: return df, len(raw), relevant, "yerel"
+    raw = search_competitors_batch(queries, limit_per_query=per_query_limit(50, len(queries)), force_refresh=force_refresh)
+    df, relevant = discovery_filter(raw, day_filter)
+    return df, len(raw), relevant, "canli"
+
+def run_google_scraper(query, limit=20, force_refresh=False):
     run_input = {
         "queries": query, 
         "resultsPerPage": limit,
@@ -246,9 +299,8 @@ def run_google_scraper(query, limit=20):
         "csvFriendlyOutput": False
     }
     try:
-        run = client.actor("apify/google-search-scraper").call(run_input=run_input)
-        if run.get("defaultDatasetId"):
-            items = client.dataset(run["defaultDatasetId"]).list_items().items
+        items = APIFY_CACHE.call(client, "apify/google-search-scraper", run_input, force_refresh)
+        if items is not None:
             all_results = []
             for item in items:
                 if 'organicResults' in item and isinstance(item['organicResults'], list):
@@ -262,68 +314,8 @@ def run_google_scraper(query, limit=20):
     except:
         return pd.DataFrame()
 
-def filter_suppliers_strict(df, search_term):
-    if df.empty: return df
-    mandatory_keywords = ["toptan", "wholesale", "imalat", "üretici", "ithalat", "toptancı", "supplier", "manufacturer", "distribütör", "istoç", "tahtakale", "merter", "bayi", "koli", "adetli", "toplu satış", "fabrikadan", "b2b"]
-    banned_domains = ["trendyol.com", "hepsiburada.com", "amazon.com", "ciceksepeti.com", "sikayetvar.com", "youtube.com", "tiktok.com", "instagram.com", "facebook.com", "pinterest.com", "twitter.com", "n11.com", "pttavm.com"]
-    filtered_rows = []
-    for _, row in df.iterrows():
-        title = str(row.get('title', '')).lower()
-        desc = str(row.get('description', '')).lower()
-        url = str(row.get('url', '')).lower()
-        full_text = f"{title} {desc}"
-        if any(ban in url for ban in banned_domains): continue
-        if search_term.lower() in full_text: 
-            if any(keyword in full_text for keyword in mandatory_keywords):
-                filtered_rows.append(row)
-    return pd.DataFrame(filtered_rows)
-
-def calculate_metrics(df):
-    cols = ['playCount', 'diggCount', 'shareCount', 'collectCount', 'commentCount']
-    for col in cols:
-        if col not in df.columns: df[col] = 0
-        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-    if 'createTimeISO' not in df.columns: df['createTimeISO'] = pd.NaT
-    else: df['createTimeISO'] = pd.to_datetime(df['createTimeISO'], errors='coerce', utc=True).dt.tz_localize(None)
-    df['Viral_Skor'] = ((df['shareCount'] + df['collectCount']) / df['diggCount'].replace(0, 1)) * 100
-    total_interaction = df['diggCount'] + df['shareCount'] + df['collectCount'] + df['commentCount']
-    df['Etkilesim_Orani'] = (total_interaction / df['playCount'].replace(0, 1)) * 100
-    df['Viral_Skor'] = df['Viral_Skor'].round(2)
-    df['Etkilesim_Orani'] = df['Etkilesim_Orani'].round(2)
-    def score_row(row):
-        score = 0
-        if row['Viral_Skor'] > 10: score += 40
-        if row['playCount'] > 100000: score += 20
-        if row['Etkilesim_Orani'] > 3: score += 20
-        if row['shareCount'] > 200: score += 20
-        return score
-    df['Karar_Puani'] = df.apply(score_row, axis=1)
-    df['Durum'] = df['Karar_Puani'].apply(lambda x: "WINNER 🏆" if x >= 60 else ("TAKİPTE 🟡" if x >= 40 else "ÇÖP 🔴"))
-    return df
-
 def generate_smart_analysis(df):
-    avg_score = df['Karar_Puani'].mean()
-    winner_count = df[df['Karar_Puani'] >= 60].shape[0]
-    total_views = df['playCount'].sum()
-    today = datetime.now()
-    valid_dates = df['createTimeISO'].dropna()
-    if not valid_dates.empty: avg_age_days = (today - valid_dates).dt.days.mean()
-    else: avg_age_days = 30 
-    if avg_age_days < 7 and avg_score > 50:
-        next_check_days = 1
-        date_comment = "🔥 **ÇOK TAZE TREND:** Videolar ortalama 1 haftadan yeni."
-    elif avg_age_days < 30:
-        next_check_days = 3
-        date_comment = "✅ **AKTİF TREND:** Videolar son 1 ay içinde."
-    else:
-        next_check_days = 7
-        date_comment = "❄️ **ESKİ TREND:** Videolar biraz eski."
-    next_check_date = today.date() + timedelta(days=next_check_days)
-    analysis = f"📊 **Pazar Özeti ({today.date()}):**\n\n"
-    analysis += f"- Toplam {len(df)} video. Kümülatif İzlenme: **{total_views:,.0f}**\n"
-    analysis += f"- Winner Sayısı: **{winner_count}**\n"
-    analysis += f"- {date_comment}\n"
-    return analysis, str(next_check_date)
+    return tracking.generate_smart_analysis(df, DECISION_CONFIG)
 
 def calculate_commercial_score(viral_score, supplier_count, meta_count, engagement_rate):
     score = 0
@@ -340,50 +332,128 @@ def calculate_commercial_score(viral_score, supplier_count, meta_count, engageme
 # --- KAYDETME FONKSİYONLARI ---
 def quick_save_bookmark(desc, views, viral_score, engagement, url, image_url):
     try:
-        sh = init_master_sheet()
-        ws = sh.worksheet("Bookmarks")
-        ws.append_row([str(datetime.now().date()), desc, views, float(viral_score), float(engagement), url, image_url])
+        row = [str(datetime.now().date()), desc, views, float(viral_score), float(engagement), url, image_url]
+        STORE.append_rows("bookmarks", [row])
+        export_rows("bookmarks", [row])
         return True
     except: return False
 
 def save_to_tracking_sheet(urun_adi, url, query, df, analysis_text, avg_viral_score, status, next_check_date):
     try:
-        sh = init_master_sheet()
         uid = uuid.uuid4().hex[:6]
-        ws_r = sh.add_worksheet(title=f"R_{uid}", rows="100", cols="20")
-        clean = df.fillna("").astype(str)
-        ws_r.update([clean.columns.values.tolist()] + clean.values.tolist())
-        ws_p = sh.add_worksheet(title=f"P_{uid}", rows="100", cols="10")
-        ws_p.append_row(["Tarih", "Ort_Viral_Skor", "Toplam_Izlenme", "Winner_Sayisi", "Analiz_Notu"])
-        ws_p.append_row([str(datetime.now().date()), float(avg_viral_score), int(df['playCount'].sum()), int(df[df['Karar_Puani'] >= 60].shape[0]), analysis_text])
-        master_ws = sh.worksheet("List")
-        master_ws.append_row([uid, urun_adi, f"R_{uid}", f"P_{uid}", str(datetime.now().date()), next_check_date, avg_viral_score, status, url, query])
+        today = str(datetime.now().date())
+        STORE.save_product(uid, urun_adi, url, query, today, next_check_date, avg_viral_score, status)
+        observed_at = datetime.now().isoformat(timespec="seconds")
+        STORE.upsert_competitors(uid, df, observed_at)
+        VIDEO_INDEX.merge(df, observed_at, uid)
+        STORE.append_performance(uid, *tracking.performance_row(df, analysis_text, avg_viral_score, DECISION_CONFIG))
+        # Sheets'e sadece ana liste satırı gider (rakip/performans sekmeleri artık açılmaz)
+        export_rows("products", [[uid, urun_adi, "", "", today, next_check_date, float(avg_viral_score), status, url, query]])
         return True
     except Exception as e:
         st.error(f"Hata: {e}")
         return False
 
-def update_product_data(rakipler_tab, performans_tab, df, analysis_text, avg_viral_score, next_check_date):
+def update_product_data(product_id, df, analysis_text, next_check_date):
+    """Artımlı güncelleme: sadece yeni/değişen rakip satırları yazılır. Değişiklik sayılarını (veya None) döndürür."""
     try:
-        sh = init_master_sheet()
-        ws_rakipler = sh.worksheet(rakipler_tab)
-        ws_rakipler.clear()
-        clean = df.fillna("").astype(str)
-        ws_rakipler.update([clean.columns.values.tolist()] + clean.values.tolist())
-        sh.worksheet(performans_tab).append_row([str(datetime.now().date()), float(avg_viral_score), int(df['playCount'].sum()), int(df[df['Karar_Puani'] >= 60].shape[0]), analysis_text])
-        return True
-    except: return False
+        diff = tracking.save_refresh(STORE, product_id, df, analysis_text, next_check_date, DECISION_CONFIG, VIDEO_INDEX)
+        export_product(product_id)
+        return diff
+    except: return None
 
-def save_extra_results(sheet_name, data_list):
+def save_extra_results(table, data_list):
     try:
-        sh = init_master_sheet()
-        ws = sh.worksheet(sheet_name)
-        for row in data_list: ws.append_row(row)
+        STORE.append_rows(table, data_list)
+        export_rows(table, data_list)
         return True
     except Exception as e:
         st.error(f"Kayıt Hatası: {e}")
         return False
 
+# --- SONUÇ LİSTELERİ (sayfalı) ---
+# Kartlar fragment içinde çizilir: sayfa değiştirme, Kaydet ve Sil sadece listeyi yeniden çalıştırır,
+# sayfanın geri kalanı (arama formu, Apify çağrıları) tekrar çalışmaz. Her seferde tek sayfa çizilir.
+RESULTS_PAGE_SIZE = 10
+DISCOVERY_MAX_RESULTS = 500
+
+def paginate(df, key, version, page_size=RESULTS_PAGE_SIZE):
+    """
+    Görünen sayfanın satırlarını döndürür; sayfa numarası st.session_state[key]'de tutulur.
+    version: sonuç kümesinin kimliği; değişince (yeni arama/analiz) ilk sayfaya dönülür.
+    """
+    pages = max(1, -(-len(df) // page_size))
+    if st.session_state.get(f"{key}_version") != version:
+        st.session_state[f"{key}_version"] = version
+        st.session_state[key] = 1
+    if st.session_state.get(key, 1) > pages: st.session_state[key] = pages
+    if pages > 1:
+        page = st.number_input(f"Sayfa (toplam {pages})", min_value=1, max_value=pages, step=1, key=key)
+    else: page = 1
+    return df.iloc[(page - 1) * page_size:page * page_size]
+
+@st.fragment
+def discovery_cards():
+    results = st.session_state.discovery_results
+    st.success(f"✅ {len(results)} ürün.")
+    for i, r in paginate(results, "discovery_page", st.session_state.get("discovery_version")).iterrows():
+        with st.container():
+            c1, c2, c3, c4 = st.columns([1,3,2,2])
+            with c1: 
+                if r.get('Resim'): st.image(r['Resim'], use_column_width=True)
+            with c2: 
+                st.write(f"**{r['text'][:90]}...**")
+                st.caption(f"Tarih: {r['createTimeISO'].date()}" + ("" if r.get('Yeni_Video', True) else " | 🔁 Daha önce görüldü"))
+                if r.get('Diger_Urunler'): st.caption(f"📌 Takipte: {r['Diger_Urunler']}")
+                if r.get('Kume_Video', 1) > 1: st.caption(f"🧬 {r['Kume_Video']} video, {r['Satici_Sayisi']} satıcı | Toplam 👁️ {r['Kume_Izlenme']:,} | 🔗 {r['Kume_Paylasim']:,}")
+                st.markdown(f"[🎥 Git]({r['webVideoUrl']})")
+            with c3: 
+                st.metric("İzlenme", f"{int(r['playCount']):,}")
+                st.metric("Viral", f"{r['Viral_Skor']:.1f}")
+                st.metric("Etkileşim", f"%{r['Etkilesim_Orani']:.2f}")
+            with c4:
+                if st.button("🚀 Analiz", key=f"a{i}"):
+                    st.session_state.transfer_url = r['webVideoUrl']; st.session_state.auto_start = True; 
+                    st.session_state.page = "Analiz" 
+                    st.rerun()  # Sayfa değiştiği için tam yeniden çalıştırma
+                if st.button("📌 Kaydet", key=f"s{i}"):
+                    if quick_save_bookmark(r['text'][:100], int(r['playCount']), r['Viral_Skor'], r['Etkilesim_Orani'], r['webVideoUrl'], r.get('Resim', '')): st.toast("Kaydedildi")
+        st.markdown("---")
+
+@st.fragment
+def analysis_results():
+    df = st.session_state.analyzed_data
+    if df is None: return
+    curr_s = df['Karar_Puani'].mean()
+    curr_v = df['Viral_Skor'].mean()
+    st.session_state.analysis_meta.update({"score": curr_s, "viral": curr_v})
+    m = st.session_state.analysis_meta
+    
+    c1, c2 = st.columns([1,2])
+    with c1:
+        st.metric("Puan", f"{curr_s:.1f}"); st.metric("Viral", f"%{curr_v:.1f}")
+        st.info(f"Kontrol: {m['date']}") 
+        st.markdown(m['ai'])
+        if st.button("💾 TEMİZLENMİŞ KAYDET"):
+            if save_to_tracking_sheet(m['q'], m['u'], m['q'], df, m['ai'], curr_v, m['status'], m['date']):
+                st.success("Kaydedildi!"); time.sleep(1); st.session_state.analyzed_data = None; st.rerun()
+    with c2:
+        st.subheader(f"📋 Analiz ({len(df)})")
+        for i, r in paginate(df, "analysis_page", st.session_state.get("analysis_version")).iterrows():
+            with st.container():
+                i1, i2, i3 = st.columns([3,1,1])
+                with i1:
+                    st.write(f"**{r['text'][:60]}...**"); st.markdown(f"[🎥 Git]({r['webVideoUrl']})")
+                    if r.get('Diger_Urunler'): st.caption(f"📌 Başka üründe takipte: {r['Diger_Urunler']}")
+                    if r.get('Kume_Video', 1) > 1: st.caption(f"🧬 {r['Kume_Video']} video, {r['Satici_Sayisi']} satıcı | Toplam 👁️ {r['Kume_Izlenme']:,}")
+                with i2: st.caption(f"👁️ {int(r['playCount']):,}"); st.markdown(f"Viral: %{r['Viral_Skor']:.1f}")
+                with i3:
+                    if st.button("🗑️ Sil", key=f"del_{i}"):
+                        # Son satır silinirse boş liste uyarısı için tüm sayfa yeniden çalışır
+                        st.session_state.analyzed_data = df.drop(i)
+                        st.rerun(scope="fragment" if len(df) > 1 else "app")
+            st.markdown("---")
+
 # --- MENÜ VE NAVİGASYON ---
 st.sidebar.title("Tiktok Viral Takip 🤖")
 
@@ -409,6 +479,8 @@ except:
 
 # Radio Buton Menüsü
 selected_label = st.sidebar.radio("Modüller:", menu_keys, index=current_index)
+# İşaretliyse Apify önbelleği atlanır ve veri yeniden çekilir
+FORCE_REFRESH = st.sidebar.checkbox("🔄 Önbelleği atla (taze veri çek)", value=False)
 selection = MENU_MAP[selected_label]
 
 # Seçim değişirse sayfayı güncelle ve yeniden yükle
@@ -440,58 +512,30 @@ if st.session_state.page == "Viral":
     with c2: day_filter = st.selectbox("Zaman:", ["Son 7 Gün", "Son 30 Gün", "Tüm Zamanlar"], index=1)
     
     if st.button("🔍 Ürünleri Ara"):
-        q = random.choice(SEARCH_STRATEGIES_TR[cat]) if search_type == "Kategoriden Seç" else query_inp
-        if q:
-            with st.spinner(f"'{q}' taranıyor..."):
-                df = search_competitors(q, limit=50)
-                if not df.empty:
-                    df = calculate_metrics(df)
-                    
-                    # YENİ EKLENEN AKILLI FİLTRE BURADA ÇAĞRILIYOR
-                    df = filter_content_relevance(df, q) 
-                    
+        # Kategoride tüm strateji terimleri tek aktör çalıştırmasında taranır
+        queries = SEARCH_STRATEGIES_TR[cat] if search_type == "Kategoriden Seç" else [q for q in [query_inp] if q]
+        q = cat if search_type == "Kategoriden Seç" else query_inp
+        if queries:
+            with st.spinner(f"'{q}' taranıyor ({len(queries)} terim)..."):
+                t0 = time.perf_counter()
+                df, n_raw, n_relevant, source = discover(queries, day_filter, FORCE_REFRESH)
+                if n_raw:
                     if not df.empty:
-                        today = datetime.now()
-                        
-                        if day_filter == "Son 7 Gün":
-                            if 'createTimeISO' in df.columns: df = df[df['createTimeISO'] >= (today - timedelta(days=7))]
-                            df = df[df['playCount'] > 1000]
-                        elif day_filter == "Son 30 Gün":
-                            if 'createTimeISO' in df.columns: df = df[df['createTimeISO'] >= (today - timedelta(days=30))]
-                            df = df[df['playCount'] > 1000]
-                        else: # Tüm Zamanlar
-                            pass 
-
-                        if not df.empty:
-                            st.session_state.discovery_results = df.sort_values(by='Viral_Skor', ascending=False).head(20)
-                        else:
-                            st.warning("Bu kriterlere uygun içerik bulunamadı.")
+                        # Küresel kayda işlenir; daha önce görülen/takipte olan videolar işaretlenir
+                        df, seen = VIDEO_INDEX.merge(df, datetime.now().isoformat(timespec="seconds"))
+                        # Aynı videoyu yeniden yükleyen hesaplar tek kartta toplanır
+                        n_videos = len(df)
+                        df = collapse_near_duplicates(df)
+                        source = "⚡ yerel dizin" if source == "yerel" else "📡 Apify"
+                        st.caption(f"🆕 {seen['yeni']} yeni video | 🔁 {seen['degisen'] + seen['ayni']} daha önce görülmüş | 📌 {seen['baska_urunde']} takipte | 🧬 {n_videos} video -> {len(df)} ürün | {source} ({time.perf_counter() - t0:.2f} sn)")
+                        st.session_state.discovery_results = df.sort_values(by='Viral_Skor', ascending=False).head(DISCOVERY_MAX_RESULTS)
+                        st.session_state.discovery_version = uuid.uuid4().hex  # Sayfalama ilk sayfaya döner
+                    elif n_relevant:
+                        st.warning("Bu kriterlere uygun içerik bulunamadı.")
                     else: st.warning(f"'{q}' için içerik bulundu ama ürünle alakalı değil (Filtreye takıldı).")
                 else: st.warning("Bulunamadı.")
     
-    if st.session_state.discovery_results is not None:
-        st.success(f"✅ {len(st.session_state.discovery_results)} ürün.")
-        for i, r in st.session_state.discovery_results.iterrows():
-            with st.container():
-                c1, c2, c3, c4 = st.columns([1,3,2,2])
-                with c1: 
-                    if r.get('videoMeta'): st.image(r['videoMeta'].get('coverUrl',''), use_column_width=True)
-                with c2: 
-                    st.write(f"**{r['text'][:90]}...**")
-                    st.caption(f"Tarih: {r['createTimeISO'].date()}")
-                    st.markdown(f"[🎥 Git]({r['webVideoUrl']})")
-                with c3: 
-                    st.metric("İzlenme", f"{int(r['playCount']):,}")
-                    st.metric("Viral", f"{r['Viral_Skor']:.1f}")
-                    st.metric("Etkileşim", f"%{r['Etkilesim_Orani']:.2f}")
-                with c4:
-                    if st.button("🚀 Analiz", key=f"a{i}"):
-                        st.session_state.transfer_url = r['webVideoUrl']; st.session_state.auto_start = True; 
-                        st.session_state.page = "Analiz" 
-                        st.rerun()
-                    if st.button("📌 Kaydet", key=f"s{i}"):
-                        if quick_save_bookmark(r['text'][:100], int(r['playCount']), r['Viral_Skor'], r['Etkilesim_Orani'], r['webVideoUrl'], r['videoMeta'].get('coverUrl','')): st.toast("Kaydedildi")
-            st.markdown("---")
+    if st.session_state.discovery_results is not None: discovery_cards()
 
 # ----------------- 2. AVCI -----------------
 elif st.session_state.page == "Analiz":
@@ -512,21 +556,20 @@ elif st.session_state.page == "Analiz":
         q = n
         if not q:
             with st.spinner("İsim alınıyor..."):
-                txt, _ = fetch_video_info(u)
+                txt, _ = fetch_video_info(u, force_refresh=FORCE_REFRESH)
                 q = clean_text_for_query(txt) if txt else ""
         if q:
             with st.spinner(f"'{q}' analiz ediliyor..."):
-                df = search_competitors(q, limit=15)
+                df = search_competitors(q, limit=15, force_refresh=FORCE_REFRESH)
                 if not df.empty:
-                    df = calculate_metrics(df)
-                    
-                    # BURADA DA YENİ FİLTREYİ KULLANIYORUZ
-                    df = filter_content_relevance(df, q) 
+                    # Metrikler + alaka filtresi + yakın kopya kümeleme (zamanlayıcıyla aynı adımlar)
+                    df = tracking.score_competitors(df, q, DECISION_CONFIG)
                     
                     if not df.empty:
                         ai, nxt = generate_smart_analysis(df)
-                        st.session_state.analyzed_data = df
-                        st.session_state.analysis_meta = {"q": q, "u": u, "ai": ai, "date": nxt, "score": df['Karar_Puani'].mean(), "viral": df['Viral_Skor'].mean(), "status": "WINNER 🏆" if df['Karar_Puani'].mean()>=60 else "NORMAL"}
+                        st.session_state.analyzed_data = VIDEO_INDEX.annotate(df)
+                        st.session_state.analysis_version = uuid.uuid4().hex
+                        st.session_state.analysis_meta = {"q": q, "u": u, "ai": ai, "date": nxt, "score": df['Karar_Puani'].mean(), "viral": df['Viral_Skor'].mean(), "status": "WINNER 🏆" if df['Karar_Puani'].mean()>=DECISION_CONFIG['winner_min'] else "NORMAL"}
                         st.session_state.transfer_url = ""; st.session_state.auto_start = False
                     else: st.error("Rakip bulundu ama ürünle alakalı değil.")
                 else: st.error("Rakip bulunamadı.")
@@ -538,63 +581,39 @@ elif st.session_state.page == "Analiz":
         if st.session_state.analyzed_data.empty:
             st.warning("Veri yok."); st.session_state.analyzed_data = None; st.rerun()
 
-        df = st.session_state.analyzed_data
-        curr_s = df['Karar_Puani'].mean()
-        curr_v = df['Viral_Skor'].mean()
-        st.session_state.analysis_meta.update({"score": curr_s, "viral": curr_v})
-        m = st.session_state.analysis_meta
-        
-        c1, c2 = st.columns([1,2])
-        with c1:
-            st.metric("Puan", f"{curr_s:.1f}"); st.metric("Viral", f"%{curr_v:.1f}")
-            st.info(f"Kontrol: {m['date']}") 
-            st.markdown(m['ai'])
-            if st.button("💾 TEMİZLENMİŞ KAYDET"):
-                if save_to_tracking_sheet(m['q'], m['u'], m['q'], df, m['ai'], curr_v, m['status'], m['date']):
-                    st.success("Kaydedildi!"); time.sleep(1); st.session_state.analyzed_data = None; st.rerun()
-        with c2:
-            st.subheader(f"📋 Analiz ({len(df)})")
-            for i, r in df.iterrows():
-                with st.container():
-                    i1, i2, i3 = st.columns([3,1,1])
-                    with i1: st.write(f"**{r['text'][:60]}...**"); st.markdown(f"[🎥 Git]({r['webVideoUrl']})")
-                    with i2: st.caption(f"👁️ {int(r['playCount']):,}"); st.markdown(f"Viral: %{r['Viral_Skor']:.1f}")
-                    with i3:
-                        if st.button("🗑️ Sil", key=f"del_{i}"):
-                            st.session_state.analyzed_data = df.drop(i); st.rerun()
-                st.markdown("---")
+        analysis_results()
 
 # ----------------- 3. MERKEZ -----------------
 elif st.session_state.page == "Takip":
     st.title("📈 Takip Edilenler (Merkez)")
-    sh = init_master_sheet()
     try:
-        data = sh.worksheet("List").get_all_records()
-        if data:
-            master = pd.DataFrame(data)
+        master = STORE.products()
+        if master.empty and get_gspread_credentials() is not None:
+            st.info("Yerel depo boş. Eski Google Sheets kayıtları bir kez içe aktarılabilir.")
+            if st.button("📥 Sheets'ten İçe Aktar"):
+                with st.spinner("Aktarılıyor..."):
+                    n, skipped = import_from_sheets(STORE, init_master_sheet())
+                st.success(f"{n} ürün aktarıldı." + (f" {skipped} sekme/satır okunamadı (ayrıntılar logda)." if skipped else "")); st.rerun()
+        if not master.empty:
             prod = st.selectbox("Ürün:", master['Urun_Adi'].tolist())
             if prod:
                 p = master[master['Urun_Adi'] == prod].iloc[0]
                 try:
-                    perf = pd.DataFrame(sh.worksheet(p['Performans_Sekme_Adi']).get_all_records())
-                    rakipler = pd.DataFrame(sh.worksheet(p['Rakipler_Sekme_Adi']).get_all_records())
+                    perf = STORE.performance(p['ID'])
+                    rakipler = STORE.competitors(p['ID'])
                     
                     st.info(f"Durum: {p['Durum']} | Sonraki Kontrol: {p['Sonraki_Analiz_Tarihi']}")
                     
                     if not rakipler.empty:
-                        rakipler['Viral_Skor'] = pd.to_numeric(rakipler['Viral_Skor'], errors='coerce').fillna(0)
-                        rakipler['Etkilesim_Orani'] = pd.to_numeric(rakipler['Etkilesim_Orani'], errors='coerce').fillna(0)
-                        
                         live_viral = rakipler['Viral_Skor'].mean()
                         live_eng = rakipler['Etkilesim_Orani'].mean()
-                        total_views = rakipler['playCount'].sum()
-                        winner_count = len(rakipler[rakipler['Karar_Puani'] >= 60]) if 'Karar_Puani' in rakipler.columns else 0
-
-                        # Karar Matrisi
-                        try: supp_cnt = len(pd.DataFrame(sh.worksheet("Suppliers").get_all_records()).query(f'Urun_Adi == "{prod}"'))
-                        except: supp_cnt = 0
-                        try: meta_cnt = len(pd.DataFrame(sh.worksheet("Meta_Results").get_all_records()).query(f'Urun_Adi == "{prod}"'))
-                        except: meta_cnt = 0
+                        # Saklanan rakipler küme temsilcileri; kümülatif izlenme son performans kaydından
+                        total_views = perf['Toplam_Izlenme'].iloc[-1] if not perf.empty else tracking.total_views(rakipler)
+                        winner_count = len(rakipler[rakipler['Karar_Puani'] >= DECISION_CONFIG['winner_min']])
+
+                        # Karar Matrisi (Urun_Adi indeksli sayım)
+                        supp_cnt = STORE.count_rows("suppliers", prod)
+                        meta_cnt = STORE.count_rows("meta_results", prod)
                         
                         comm_score = calculate_commercial_score(live_viral, supp_cnt, meta_cnt, live_eng)
                         
@@ -623,31 +642,23 @@ elif st.session_state.page == "Takip":
                             # Genişletilmiş Meta Araması
                             q1 = f'{p["Arama_Sorgusu"]} site:facebook.com OR site:instagram.com "sponsorlu" OR "shop" OR "fiyat"'
                             q2 = f'{p["Arama_Sorgusu"]} "reklam kütüphanesi" OR "ad library" site:facebook.com'
-                            all_meta = pd.DataFrame()
                             with st.status("Meta taranıyor..."):
-                                df1 = run_google_scraper(q1, 20)
-                                df2 = run_google_scraper(q2, 20)
-                                all_meta = pd.concat([df1, df2], ignore_index=True)
+                                all_meta = fan_out_frames(run_google_scraper, [q1, q2], limit=20, force_refresh=FORCE_REFRESH)
                             
                             if not all_meta.empty:
-                                all_meta = all_meta.drop_duplicates(subset=['url'])
                                 rows = [[str(p['ID']), str(datetime.now().date()), prod, r.get('title',''), r.get('url',''), r.get('description',''), "Meta"] for _, r in all_meta.iterrows()]
-                                save_extra_results("Meta_Results", rows); st.success(f"{len(rows)} bulundu!"); time.sleep(1); st.rerun()
+                                save_extra_results("meta_results", rows); st.success(f"{len(rows)} bulundu!"); time.sleep(1); st.rerun()
                             else: st.warning("Yok.")
                     with cs:
                         if st.button("🏭 Tedarikçi Tara", use_container_width=True):
                             qs = [f'"{p["Arama_Sorgusu"]}" toptan satış', f'"{p["Arama_Sorgusu"]}" imalatçı firma']
-                            all_raw = pd.DataFrame()
-                            for q in qs:
-                                df_part = run_google_scraper(q, limit=20)
-                                if not df_part.empty: all_raw = pd.concat([all_raw, df_part], ignore_index=True)
+                            all_raw = fan_out_frames(run_google_scraper, qs, limit=20, force_refresh=FORCE_REFRESH)
                             
                             if not all_raw.empty:
-                                all_raw = all_raw.drop_duplicates(subset=['url'])
                                 final_df = filter_suppliers_strict(all_raw, p["Arama_Sorgusu"])
                                 if not final_df.empty:
                                     rows = [[str(p['ID']), str(datetime.now().date()), prod, r.get('title',''), r.get('url',''), r.get('description',''), "Google"] for _, r in final_df.iterrows()]
-                                    save_extra_results("Suppliers", rows); st.success(f"{len(final_df)} adet bulundu!"); time.sleep(1); st.rerun()
+                                    save_extra_results("suppliers", rows); st.success(f"{len(final_df)} adet bulundu!"); time.sleep(1); st.rerun()
                                 else: st.warning("Kriterlere uyan yok.")
                             else: st.warning("Sonuç yok.")
                     
@@ -655,15 +666,15 @@ elif st.session_state.page == "Takip":
                     limit = st.slider("Video Sayısı", 15, 50, 15)
                     if st.button("🔄 GÜNCELLE"):
                         with st.spinner("Güncelleniyor..."):
-                            ndf = search_competitors(p['Arama_Sorgusu'], limit=limit)
+                            ndf = search_competitors(p['Arama_Sorgusu'], limit=limit, force_refresh=FORCE_REFRESH)
                             if not ndf.empty:
-                                ndf = calculate_metrics(ndf)
-                                # Güncellemede de filtreyi uygula
-                                ndf = filter_content_relevance(ndf, p['Arama_Sorgusu'])
+                                # Güncellemede de aynı filtre ve kümeleme
+                                ndf = tracking.score_competitors(ndf, p['Arama_Sorgusu'], DECISION_CONFIG)
                                 
                                 if not ndf.empty:
                                     ai, nxt = generate_smart_analysis(ndf)
-                                    update_product_data(p['Rakipler_Sekme_Adi'], p['Performans_Sekme_Adi'], ndf, ai, ndf['Viral_Skor'].mean(), nxt)
+                                    diff = update_product_data(p['ID'], ndf, ai, nxt)
+                                    if diff: st.toast(f"Yeni: {diff['yeni']} | Değişen: {diff['degisen']} | Aynı: {diff['ayni']} | Başka üründe: {diff.get('baska_urunde', 0)}")
                                     st.success("Tamam"); st.rerun()
                                 else:
                                     st.warning("Veri Türkçe filtresine takıldı.")
@@ -672,17 +683,27 @@ elif st.session_state.page == "Takip":
                     wanted = ['text', 'playCount', 'Viral_Skor', 'Etkilesim_Orani', 'createTimeISO']
                     final = [c for c in wanted if c in rakipler.columns]
                     st.data_editor(rakipler[final], use_container_width=True, disabled=True)
+                    
+                    # Viral_Skor tek andaki oran; burada tekrarlı güncellemelerdeki artış hızı esas alınır
+                    st.subheader("🚀 Yükselenler")
+                    rising = rising_ranking(STORE.snapshots(p['ID']), STORE.competitors(p['ID'], current_only=False))
+                    if not rising.empty:
+                        st.dataframe(rising[['text', 'Yukselis_Skoru', 'Gunluk_Izlenme', 'Paylasim_Ivmesi', 'Yas_Gun', 'Viral_Skor', 'webVideoUrl']],
+                                     column_config={"Yukselis_Skoru": st.column_config.ProgressColumn("Yükseliş", format="%.1f", min_value=0, max_value=100),
+                                                    "webVideoUrl": st.column_config.LinkColumn("Link", display_text="🎥")},
+                                     use_container_width=True, hide_index=True)
+                        if rising['Goruntu_Sayisi'].max() < 2: st.caption("Tek görüntü var: hız, yayından bu yana ortalama. GÜNCELLE ile geçmiş biriktikçe gerçek ivme hesaplanır.")
+                    else: st.info("Henüz anlık görüntü yok.")
                 except: st.error("Veri okunamadı")
     except: st.error("Hata")
 
 # ----------------- 4. DEPO -----------------
 elif st.session_state.page == "Depo":
     st.title("📌 Kaydedilenler (Depo)")
-    sh = init_master_sheet()
     try:
-        data = sh.worksheet("Bookmarks").get_all_records()
-        if data:
-            st.data_editor(pd.DataFrame(data).iloc[::-1], column_config={"Resim_URL": st.column_config.ImageColumn("Resim"), "Video_URL": st.column_config.LinkColumn("Link", display_text="▶️")}, use_container_width=True, hide_index=True)
+        data = STORE.rows("bookmarks")
+        if not data.empty:
+            st.data_editor(data.iloc[::-1], column_config={"Resim_URL": st.column_config.ImageColumn("Resim"), "Video_URL": st.column_config.LinkColumn("Link", display_text="▶️")}, use_container_width=True, hide_index=True)
         else: st.info("Boş")
     except: st.error("Hata")
 
@@ -695,7 +716,7 @@ elif st.session_state.page == "Meta_Spy":
         st.session_state.meta_results = None
         q = f'"{search_term}" site:facebook.com OR site:instagram.com "sponsorlu" OR "fiyat" OR "sipariş"'
         with st.status("Taranıyor..."):
-            df = run_google_scraper(q, 20)
+            df = run_google_scraper(q, 20, force_refresh=FORCE_REFRESH)
             st.session_state.meta_results = df if not df.empty else None
     
     if st.session_state.meta_results is not None:
@@ -704,21 +725,19 @@ elif st.session_state.page == "Meta_Spy":
         st.data_editor(res[['title', 'description', 'url']], column_config={"url": st.column_config.LinkColumn("Link", display_text="🔗")}, use_container_width=True)
         if st.button("💾 Kaydet"):
             rows = [[str(uuid.uuid4().hex[:8]), str(datetime.now().date()), search_term, r.get('title',''), r.get('url',''), r.get('description',''), "Meta Spy"] for _, r in res.iterrows()]
-            if save_extra_results("Meta_Results", rows): st.success("Kaydedildi"); time.sleep(2)
+            if save_extra_results("meta_results", rows): st.success("Kaydedildi"); time.sleep(2)
 
 # ----------------- 6. META ARŞİV -----------------
 elif st.session_state.page == "Meta_DB":
     st.title("💾 Meta Kaydedilenler")
-    sh = init_master_sheet()
     try:
-        data = sh.worksheet("Meta_Results").get_all_records()
-        if data:
-            df = pd.DataFrame(data)
+        df = STORE.rows("meta_results")
+        if not df.empty:
             filt = st.selectbox("Filtre:", ["Tümü"] + list(df['Urun_Adi'].unique()))
             if filt != "Tümü": df = df[df['Urun_Adi'] == filt]
             st.data_editor(df[['Tarih', 'Urun_Adi', 'Baslik', 'Link', 'Aciklama']], column_config={"Link": st.column_config.LinkColumn("Link", display_text="🔗")}, use_container_width=True)
             if st.button("⚠️ Temizle"): 
-                ws = sh.worksheet("Meta_Results"); ws.clear(); ws.append_row(["ID", "Tarih", "Urun_Adi", "Baslik", "Link", "Aciklama", "Kaynak"]); st.rerun()
+                clear_table("meta_results"); st.rerun()
         else: st.info("Boş")
     except: st.error("Hata")
 
@@ -731,39 +750,33 @@ elif st.session_state.page == "Tedarik":
     if st.button("🚀 Ara") and search_term:
         st.session_state.supplier_results = None 
         qs = [f'"{search_term}" toptan satış', f'"{search_term}" imalatçı', f'"{search_term}" istoç toptan']
-        all_raw = pd.DataFrame()
         with st.status("Taranıyor..."):
-            for q in qs:
-                df = run_google_scraper(q, 40)
-                if not df.empty:
-                    df['Arama_Tipi'] = q
-                    all_raw = pd.concat([all_raw, df], ignore_index=True)
+            # Tüm sorgular aynı anda çalışır; sonuçlar geldikçe URL'ye göre tekilleştirilir
+            all_raw = fan_out_frames(run_google_scraper, qs, tag_column='Arama_Tipi', limit=40, force_refresh=FORCE_REFRESH,
+                                     on_result=lambda q, df: st.write(f"✓ {q}: {len(df)} sonuç"))
             if not all_raw.empty:
-                all_raw = all_raw.drop_duplicates(subset=['url'])
                 final = filter_suppliers_strict(all_raw, search_term)
                 st.session_state.supplier_results = final if not final.empty else None
     
     if st.session_state.supplier_results is not None:
         res = st.session_state.supplier_results
         st.success(f"{len(res)} sonuç.")
-        st.data_editor(res[['title', 'description', 'url', 'Arama_Tipi']], column_config={"url": st.column_config.LinkColumn("Site", display_text="🌍 Git")}, use_container_width=True)
+        st.data_editor(res[['title', 'description', 'url', 'Arama_Tipi', 'Filtre_Nedeni']], column_config={"url": st.column_config.LinkColumn("Site", display_text="🌍 Git"), "Filtre_Nedeni": st.column_config.TextColumn("Neden")}, use_container_width=True)
         if st.button("💾 Kaydet"):
             rows = [[str(uuid.uuid4().hex[:8]), str(datetime.now().date()), search_term, r.get('title',''), r.get('url',''), r.get('description',''), "Search"] for _, r in res.iterrows()]
-            if save_extra_results("Suppliers", rows): st.success("Tamam"); time.sleep(2)
+            if save_extra_results("suppliers", rows): st.success("Tamam"); time.sleep(2)
 
 # ----------------- 8. ARŞİV -----------------
 elif st.session_state.page == "Arşiv":
     st.title("🗃️ Tedarikçi Arşivi")
-    sh = init_master_sheet()
     try:
-        data = sh.worksheet("Suppliers").get_all_records()
-        if data:
-            df = pd.DataFrame(data)
+        df = STORE.rows("suppliers")
+        if not df.empty:
             filt = st.selectbox("Filtre:", ["Tümü"] + list(df['Urun_Adi'].unique()))
             if filt != "Tümü": df = df[df['Urun_Adi'] == filt]
             st.data_editor(df[['Tarih', 'Urun_Adi', 'Tedarikci_Baslik', 'Web_Sitesi', 'Aciklama']], column_config={"Web_Sitesi": st.column_config.LinkColumn("Link", display_text="🌍 Git")}, use_container_width=True)
             if st.button("⚠️ Temizle"): 
-                ws = sh.worksheet("Suppliers"); ws.clear(); ws.append_row(["ID", "Tarih", "Urun_Adi", "Tedarikci_Baslik", "Web_Sitesi", "Aciklama", "Kanal_Tipi"]); st.rerun()
+                clear_table("suppliers"); st.rerun()
         else: st.info("Boş")
     except: st.error("Hata")
 
@@ -781,4 +794,27 @@ elif st.session_state.page == "Cost":
         st.progress(min((used/total), 1.0))
     st.subheader("📉 Son Harcamalar")
     if not df_runs.empty: st.dataframe(df_runs, use_container_width=True)
-    else: st.info("Kayıt yok.")
\ No newline at end of file
+    else: st.info("Kayıt yok.")
+
+    st.subheader("🗄️ Apify Önbelleği")
+    cache_stats = pd.DataFrame(APIFY_CACHE.stats())
+    if not cache_stats.empty:
+        hits, misses = int(cache_stats['Hit'].sum()), int(cache_stats['Miss'].sum())
+        k1, k2, k3 = st.columns(3)
+        k1.metric("Hit", hits); k2.metric("Miss", misses)
+        k3.metric("İsabet Oranı", f"{(hits / max(hits + misses, 1)) * 100:.1f}%")
+        st.dataframe(cache_stats, use_container_width=True, hide_index=True)
+        if st.button("🧹 Önbelleği Temizle"): APIFY_CACHE.clear(); st.rerun()
+    else: st.info("Önbellek henüz kullanılmadı.")
+    st.subheader("📤 Sheets Aktarımı")
+    if SHEET_EXPORTER is None: st.info("Kapalı (kayıtlar sadece yerel depoda).")
+    else:
+        st.metric("Bekleyen", SHEET_EXPORTER.backlog())
+        if SHEET_EXPORTER.last_error is not None: st.warning(f"Son hata: {SHEET_EXPORTER.last_error}")
+
+    st.subheader("⏱️ Zamanlayıcı (scheduler.py)")
+    sched_runs = STORE.scheduler_runs(20)
+    if not sched_runs.empty:
+        st.metric("Bugün Harcanan", f"{STORE.cu_spent(str(datetime.now().date())):.3f} CU")
+        st.dataframe(sched_runs, use_container_width=True, hide_index=True)
+    else: st.info("Zamanlayıcı henüz çalışmadı.")
@@ -1,8 +1,22 @@
+import time
+from contextlib import nullcontext
+
 import streamlit as st
 import pandas as pd
+import altair as alt
 from apify_client import ApifyClient
-from datetime import datetime, timedelta
-import numpy as np
+
+# Başsız arama hattı (çek -> puanla -> filtrele -> sırala); cli.py ile ortak
+import pipeline
+from pipeline import CATEGORIES, build_queries
+# Apify sonuçları için kalıcı disk önbelleği
+from apify_cache import ApifyResultCache
+# Geçme oranına göre büyüyen uyarlanabilir çekme
+from adaptive_fetch import PassRateMemory
+# Daha önce çekilmiş başlıklar üzerinde yerel arama dizini
+from text_index import TextIndex
+# Aşama süreleri (hata ayıklama paneli açıkken sadece o istek ölçülür)
+from instrumentation import span, trace
 
 # --- SAYFA AYARLARI ---
 st.set_page_config(page_title="TrendScope - Ürün Dedektifi", layout="wide", page_icon="🛍️")
@@ -32,156 +46,53 @@ else:
 
 client = ApifyClient(APIFY_TOKEN)
 
-# --- GELİŞMİŞ ÜRÜN TESPİT SİSTEMİ ---
+# Apify önbelleği süreç boyunca tek örnek (tüm oturumlar paylaşır)
+@st.cache_resource
+def get_apify_cache():
+    return ApifyResultCache()
 
-# Türkçe karakter normalizasyonu (İ -> i, I -> ı sorunu için)
-def normalize_turkish(text):
-    if not isinstance(text, str): return ""
-    replacements = {
-        "İ": "i", "I": "ı", "Ş": "ş", "Ğ": "ğ", "Ü": "ü", "Ö": "ö", "Ç": "ç"
-    }
-    text = text.translate(str.maketrans(replacements))
-    return text.lower()
+APIFY_CACHE = get_apify_cache()
 
-COMMERCIAL_KEYWORDS = {
-    # BU KELİMELERDEN 1 TANESİ BİLE VARSA KESİN ÜRÜNDÜR (Puan: 5)
-    "critical": [
-        "sipariş", "fiyat", "tl", "₺", "kargo", "stok", "satın al", "kapıda ödeme", 
-        "şeffaf kargo", "whatsapp", "dm", "iletişim", "bioda", "profildeki link", 
-        "mağaza", "dükkan", "butik", "satış", "kampanya", "indirim", "tükenmeden", 
-        "sınırlı sayı", "kod", "kupon", "link", "shopier", "dolap", "gardrops", 
-        "trendyol", "hepsiburada", "temu", "amazon"
-    ],
-    # BU KELİMELER DESTEKLEYİCİDİR (Puan: 1)
-    "support": [
-        "ürün", "inceleme", "öneri", "tavsiye", "denedim", "aldım", "kullandım", 
-        "model", "kumaş", "beden", "renk", "kalite", "garanti", "iade", "değişim", 
-        "marka", "muadil", "uygun", "performans", "detay", "kutu açılımı", "paket"
-    ]
-}
+@st.cache_resource
+def get_pass_rates():
+    return PassRateMemory()
 
-CATEGORIES = {
-    "Tümü": [],
-    "🏠 Ev & Yaşam": ["mutfak gereçleri", "pratik ev ürünleri", "banyo düzenleyici", "dekorasyon", "çeyiz", "temizlik"],
-    "💄 Güzellik & Bakım": ["makyaj", "cilt bakımı", "kozmetik", "güzellik", "saç bakım"],
-    "👗 Moda & Giyim": ["kombin", "moda", "tesettür", "giyim", "elbise", "ayakkabı", "çanta"],
-    "💻 Teknoloji & Aksesuar": ["telefon kılıfı", "akıllı saat", "teknoloji", "kulaklık", "aksesuar"],
-    "👶 Anne & Bebek": ["bebek ürünleri", "oyuncak", "bebek giyim", "hamile"],
-    "🚗 Oto & Araç": ["oto aksesuar", "araba", "modifiye", "araç temizlik"]
-}
+PASS_RATES = get_pass_rates()
 
-# --- FONKSİYONLAR ---
+@st.cache_resource
+def get_corpus():
+    corpus = TextIndex()
+    corpus.backfill(APIFY_CACHE)
+    return corpus
 
-def score_product_intent(text):
-    """
-    Metni tarar ve ürün olma ihtimalini puanlar.
-    """
-    if not isinstance(text, str): return 0
-    text = normalize_turkish(text) # Özel Türkçe çevirici
-    score = 0
-    
-    # Kritik Kelimeler (Direkt Ürün)
-    for word in COMMERCIAL_KEYWORDS["critical"]:
-        if word in text:
-            score += 5 # Bir tane bile bulsa yeterli
-            
-    # Destekleyici Kelimeler
-    for word in COMMERCIAL_KEYWORDS["support"]:
-        if word in text:
-            score += 1
-            
-    return score
+CORPUS = get_corpus()
 
-def fetch_tiktok_data(query, requested_limit):
-    # Kullanıcı 10 adet isterse biz 50 adet çekiyoruz (Buffer)
-    # Çünkü tarih filtresi ve ürün filtresi çok veri eleyecek.
-    buffer_limit = requested_limit * 5
-    if buffer_limit > 300: buffer_limit = 300 
-    
+# Oturumda sadece tabloda/metriklerde kullanılan sütunlar tutulur
+RESULT_COLUMNS = ["Resim", "Urun_Tahmin", "Hesap", "Viral_Skor", "playCount", "diggCount", "shareCount", "webVideoUrl", "Tarih_Gorsel"]
+
+# --- FONKSİYONLAR ---
+
+def show_waterfall(tr):
+    """İstek başına aşama şelalesi: her span başlangıç ofsetinden bitişine bir çubuk."""
+    wf = tr.waterfall()
+    if wf.empty: return
+    wf["Bitis_ms"] = wf["Baslangic_ms"] + wf["Sure_ms"]
+    wf["Sira"] = range(len(wf))
+    chart = alt.Chart(wf).mark_bar().encode(
+        x=alt.X("Baslangic_ms:Q", title="ms"), x2="Bitis_ms:Q",
+        y=alt.Y("Sira:O", axis=None), color=alt.Color("Asama:N", title="Aşama"),
+        tooltip=["Asama", "Sure_ms", "CPU_ms", "Girdi", "Cikti", "CU"],
+    ).properties(height=max(120, 18 * len(wf)))
+    st.altair_chart(chart, use_container_width=True)
+    st.dataframe(wf.drop(columns=["Bitis_ms", "Sira"]), hide_index=True, use_container_width=True)
+
+def search_products(queries, requested_limit, min_views=0, min_likes=0, date_limit=0, force_refresh=False, local_first=True):
     try:
-        run_input = {
-            "searchQueries": [query],
-            "resultsPerPage": buffer_limit,
-            "searchRegion": "TR",
-            "searchLanguage": "tr-TR",
-        }
-        actor_id = "clockworks/free-tiktok-scraper"
-        run = client.actor(actor_id).call(run_input=run_input)
-        
-        if run.get("defaultDatasetId"):
-            items = client.dataset(run["defaultDatasetId"]).list_items().items
-            return pd.DataFrame(items)
-        return pd.DataFrame()
+        return pipeline.search_products(queries, requested_limit, min_views, min_likes, date_limit, force_refresh, local_first,
+                                        corpus=CORPUS, client=client, cache=APIFY_CACHE, pass_rates=PASS_RATES)
     except Exception as e:
         st.error(f"⚠️ Apify Hatası: {e}")
-        return pd.DataFrame()
-
-def process_data(df, min_views, min_likes, date_limit, target_limit):
-    if df.empty: return df, 0, 0
-    
-    # İstatistikler için sayaçlar
-    total_fetched = len(df)
-    
-    # 1. Bölge Filtresi (TR)
-    def get_region(meta):
-        if isinstance(meta, dict): return meta.get('region', '')
-        return ''
-
-    if 'authorMeta' in df.columns:
-        df['Region_Code'] = df['authorMeta'].apply(get_region)
-        # Sadece kesin yabancıları atıyoruz, TR ve boşları tutuyoruz
-        df = df[~df['Region_Code'].isin(['US', 'GB', 'DE', 'FR', 'IT', 'ES', 'BR', 'RU'])]
-    
-    # 2. ÜRÜN PUANLAMA (Kritik Adım)
-    df['Product_Score'] = df['text'].apply(score_product_intent)
-    
-    # Eşik Değer: En az 1 puan. (Yani en az 1 destekleyici kelime veya 1 kritik kelime)
-    # Kritik kelimeler 5 puan verdiği için direkt geçer.
-    df_product = df[df['Product_Score'] >= 1].copy()
-    count_after_product_filter = len(df_product) # Ürün filtresinden geçen sayısı
-    
-    if df_product.empty: return pd.DataFrame(), total_fetched, 0
-
-    # 3. Sayısal Dönüşümler
-    cols = ['playCount', 'diggCount', 'shareCount', 'collectCount', 'commentCount']
-    for col in cols:
-        df_product[col] = pd.to_numeric(df_product.get(col, 0), errors='coerce').fillna(0)
-    
-    # 4. Tarih Filtresi
-    if 'createTimeISO' in df_product.columns:
-        df_product['createTimeISO'] = pd.to_datetime(df_product['createTimeISO'], errors='coerce', utc=True).dt.tz_localize(None)
-        if date_limit:
-            cutoff_date = datetime.now() - timedelta(days=date_limit)
-            df_product = df_product[df_product['createTimeISO'] >= cutoff_date]
-            
-    # 5. Metrik Filtreleri
-    df_product = df_product[df_product['playCount'] >= min_views]
-    df_product = df_product[df_product['diggCount'] >= min_likes]
-    
-    # 6. Görselleştirme Hazırlığı
-    if not df_product.empty:
-        # Viral Skor
-        df_product['Viral_Skor'] = ((df_product['shareCount'] + df_product['collectCount']) / df_product['diggCount'].replace(0, 1)) * 100
-        df_product['Viral_Skor'] = df_product['Viral_Skor'].round(1)
-        
-        # Sütunlar
-        df_product['Resim'] = df_product['videoMeta'].apply(lambda x: x.get('coverUrl', '') if isinstance(x, dict) else '')
-        df_product['Hesap'] = df_product['authorMeta'].apply(lambda x: x.get('name', '') if isinstance(x, dict) else '')
-        df_product['Urun_Tahmin'] = df_product['text'].apply(lambda x: str(x)[:80] + "..." if x else "")
-        
-        # Türkçe Tarih
-        def tr_date(d):
-            if pd.isna(d): return ""
-            m = {1:"Oca", 2:"Şub", 3:"Mar", 4:"Nis", 5:"May", 6:"Haz", 7:"Tem", 8:"Ağu", 9:"Eyl", 10:"Eki", 11:"Kas", 12:"Ara"}
-            return f"{d.day} {m.get(d.month)} {d.year}"
-        df_product['Tarih_Gorsel'] = df_product['createTimeISO'].apply(tr_date)
-        
-        # Sıralama
-        df_product = df_product.sort_values(by="Viral_Skor", ascending=False)
-        
-        return df_product.head(target_limit), total_fetched, count_after_product_filter
-    
-    return pd.DataFrame(), total_fetched, count_after_product_filter
+        return pd.DataFrame(), 0, 0
 
 # --- ARAYÜZ ---
 
@@ -201,46 +112,43 @@ with st.sidebar:
     min_like_inp = st.number_input("❤️ Min. Beğeni", value=0, step=10)
     
     hashtag_filter = st.text_input("Hashtag (#)", placeholder="örn: indirim")
+    
+    # İşaretliyse Apify önbelleği atlanır ve veri yeniden çekilir
+    force_refresh = st.checkbox("🔄 Önbelleği atla (taze veri çek)", value=False)
+    
+    # İşaretliyse önce yerel dizinde aranır; yeterli taze sonuç yoksa Apify'a gidilir
+    local_first = st.checkbox("⚡ Önce yerel dizin", value=True)
+    
+    # Açıksa aramanın aşama süreleri/satır sayıları şelale olarak gösterilir
+    debug_panel = st.checkbox("🐞 Hata ayıklama paneli", value=False)
 
 # ANA EKRAN
 st.title("TrendScope TR - Akıllı Ürün Analizi")
 st.write("TikTok verilerini tarar, 'Ürün' ve 'Satış' odaklı olmayanları yapay zeka mantığıyla eler.")
 
 search_query = st.text_input("", placeholder="Ürün adı, marka veya anahtar kelime...", label_visibility="collapsed")
+request_trace = None
 
 if st.button("🚀 ÜRÜNLERİ BUL", use_container_width=True):
     
-    # Sorgu
-    final_query = ""
-    if cat_opt != "Tümü":
-        import random
-        base_keyword = random.choice(CATEGORIES[cat_opt])
-        final_query = f"{base_keyword}"
-    
-    if search_query:
-        final_query = f"{search_query} {final_query}"
-        
-    if hashtag_filter:
-        clean_tag = hashtag_filter.replace('#','')
-        final_query = f"{final_query} #{clean_tag}"
-        
-    if not final_query.strip():
-        final_query = "inceleme fiyat sipariş"
+    # Sorgular: kategori seçiliyse tüm anahtar kelimeleri tek çalıştırmada taranır
+    queries = build_queries(CATEGORIES[cat_opt], search_query, hashtag_filter)
 
     with st.spinner(f"📡 Veriler çekiliyor ve analiz ediliyor (Hedef: {limit_user} adet)..."):
-        
-        # 1. Apify'dan Veri Çek
-        raw_df = fetch_tiktok_data(final_query, limit_user)
-        
-        # 2. İşle ve Filtrele
-        clean_df, total_scraped, total_products = process_data(raw_df, min_view_inp, min_like_inp, date_opt, limit_user)
+        if debug_panel: request_trace = trace("TrendScope")
+        with request_trace or nullcontext():
+            # Yerel dizin yetmezse Apify'dan sayfa sayfa çek, filtrele, sırala
+            t0 = time.perf_counter()
+            clean_df, total_scraped, total_products = search_products(queries, limit_user, min_view_inp, min_like_inp, date_opt, force_refresh, local_first)
+            elapsed = time.perf_counter() - t0
         
         if not clean_df.empty:
-            st.session_state.results = clean_df
+            st.session_state.results = clean_df[RESULT_COLUMNS]
             st.success(f"✅ Başarılı! {len(clean_df)} adet nitelikli ürün videosu bulundu.")
             
             # Bilgilendirme Metni
-            st.caption(f"🔎 Analiz Detayı: Toplam {total_scraped} video tarandı. Bunlardan {total_products} tanesi 'Ürün' olarak tespit edildi. Tarih ve limit filtrelerinden sonra {len(clean_df)} adet gösteriliyor.")
+            source = "⚡ yerel dizin" if clean_df.attrs.get("kaynak") == "yerel" else "📡 Apify"
+            st.caption(f"🔎 Analiz Detayı: Toplam {total_scraped} video tarandı. Bunlardan {total_products} tanesi 'Ürün' olarak tespit edildi. Tarih ve limit filtrelerinden sonra {len(clean_df)} adet gösteriliyor. Kaynak: {source} ({elapsed:.2f} sn)")
         
         else:
             st.warning("⚠️ Sonuç bulunamadı.")
@@ -269,33 +177,28 @@ if 'results' in st.session_state and st.session_state.results is not None:
     
     st.markdown("---")
     
-    st.data_editor(
-        df[[
-            "Resim", 
-            "Urun_Tahmin", 
-            "Hesap", 
-            "Viral_Skor", 
-            "playCount", 
-            "diggCount", 
-            "shareCount", 
-            "webVideoUrl",
-            "Tarih_Gorsel"
-        ]],
-        column_config={
-            "Resim": st.column_config.ImageColumn("Video", width="small"),
-            "Urun_Tahmin": st.column_config.TextColumn("Ürün / İçerik", width="medium"),
-            "Hesap": st.column_config.TextColumn("Satıcı", width="small"),
-            "Viral_Skor": st.column_config.ProgressColumn("Viral Puanı", format="%.1f", min_value=0, max_value=100),
-            "playCount": st.column_config.NumberColumn("İzlenme"),
-            "diggCount": st.column_config.NumberColumn("Beğeni"),
-            "shareCount": st.column_config.NumberColumn("Paylaşım"),
-            "webVideoUrl": st.column_config.LinkColumn("Link", display_text="İzle ▶️"),
-            "Tarih_Gorsel": st.column_config.TextColumn("Yayın Tarihi")
-        },
-        use_container_width=True,
-        hide_index=True,
-        height=800
-    )
+    with request_trace or nullcontext(), span("render", rows_in=len(df)):
+        st.data_editor(
+            df[RESULT_COLUMNS],
+            column_config={
+                "Resim": st.column_config.ImageColumn("Video", width="small"),
+                "Urun_Tahmin": st.column_config.TextColumn("Ürün / İçerik", width="medium"),
+                "Hesap": st.column_config.TextColumn("Satıcı", width="small"),
+                "Viral_Skor": st.column_config.ProgressColumn("Viral Puanı", format="%.1f", min_value=0, max_value=100),
+                "playCount": st.column_config.NumberColumn("İzlenme"),
+                "diggCount": st.column_config.NumberColumn("Beğeni"),
+                "shareCount": st.column_config.NumberColumn("Paylaşım"),
+                "webVideoUrl": st.column_config.LinkColumn("Link", display_text="İzle ▶️"),
+                "Tarih_Gorsel": st.column_config.TextColumn("Yayın Tarihi")
+            },
+            use_container_width=True,
+            hide_index=True,
+            height=800
+        )
+    
+    if request_trace is not None:
+        with st.expander("🐞 Aşama Şelalesi (bu istek)", expanded=True):
+            show_waterfall(request_trace)
 else:
     st.markdown("""
     <div style='text-align: center; color: grey; padding: 50px;'>
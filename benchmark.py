@@ -0,0 +1,336 @@
+"""
+Mikro benchmark: python benchmark.py [intent|metrics|velocity|pipeline ...]
+
+- intent : sentetik Türkçe başlıklarda eski kelime-kelime döngü vs derlenmiş eşleştirici
+- metrics: calculate_metrics'te satır bazlı apply(axis=1) vs numpy karar puanı (10k/100k/1M satır)
+- velocity: 10k/50k video x 5 anlık görüntüde yükseliş sıralaması
+- pipeline: Apify biçimli sentetik veride aşama aşama süre ve tepe bellek (100 - 1M satır)
+- schema  : ham pd.DataFrame(items) vs sıkı şemalı flatten_tiktok_items, oturumda kalan bellek
+
+pipeline sonuçları taban çizgisi olarak saklanıp sonraki çalıştırmalarla kıyaslanabilir:
+
+    python benchmark.py pipeline --save                # benchmark_baseline.json'a yaz
+    python benchmark.py pipeline --check               # tabana göre yavaşlayan aşama varsa çıkış kodu 1
+    python benchmark.py pipeline --sizes 100,1000000   # sadece bu boyutlar
+
+Tüm veriler sabit tohumla üretilir; ağ veya Apify hesabı gerekmez.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from ingest import flatten_tiktok_items
+from metrics import calculate_metrics
+from near_duplicates import collapse_near_duplicates
+from pipeline import process_data
+from product_intent import COMMERCIAL_KEYWORDS, score_product_intent
+from relevance import filter_content_relevance
+from suppliers import filter_suppliers_strict
+from velocity import velocity_metrics
+
+FILLER_WORDS = [
+    "bugün", "harika", "bir", "gün", "çok", "güzel", "oldu", "keşfet", "fyp", "mutfak", "ev",
+    "Işıklı", "İnanılmaz", "Şahane", "Çanta", "Ürünü", "GÖRÜN", "bakın", "arkadaşlar", "yeni",
+    "akşam", "sabah", "rutini", "tarif", "dua", "müzik", "dans", "komik", "#viral", "#keşfet",
+]
+
+def synthetic_captions(n, seed=42):
+    """Dolgu kelimeleri ve rastgele serpiştirilmiş ticari kelimelerle başlık üretir."""
+    rnd = random.Random(seed)
+    keywords = COMMERCIAL_KEYWORDS["critical"] + COMMERCIAL_KEYWORDS["support"]
+    captions = []
+    for _ in range(n):
+        words = rnd.choices(FILLER_WORDS, k=rnd.randint(5, 25))
+        for _ in range(rnd.choice([0, 0, 1, 2, 3])):
+            kw = rnd.choice(keywords)
+            words.insert(rnd.randrange(len(words) + 1), kw.upper() if rnd.random() < 0.2 else kw)
+        captions.append(" ".join(words))
+    return captions
+
+def legacy_normalize_turkish(text):
+    if not isinstance(text, str): return ""
+    replacements = {
+        "İ": "i", "I": "ı", "Ş": "ş", "Ğ": "ğ", "Ü": "ü", "Ö": "ö", "Ç": "ç"
+    }
+    text = text.translate(str.maketrans(replacements))
+    return text.lower()
+
+def legacy_score_product_intent(text):
+    # Eski uygulama: her anahtar kelime için ayrı bir `in` taraması
+    if not isinstance(text, str): return 0
+    text = legacy_normalize_turkish(text)
+    score = 0
+    for word in COMMERCIAL_KEYWORDS["critical"]:
+        if word in text: score += 5
+    for word in COMMERCIAL_KEYWORDS["support"]:
+        if word in text: score += 1
+    return score
+
+def timed(fn, data):
+    t0 = time.perf_counter()
+    out = [fn(x) for x in data]
+    return time.perf_counter() - t0, out
+
+def bench_product_intent(n=100_000):
+    captions = synthetic_captions(n)
+    t_old, old = timed(legacy_score_product_intent, captions)
+    t_new, new = timed(score_product_intent, captions)
+    assert old == new, "Puanlar eski uygulamayla uyuşmuyor!"
+    print(f"score_product_intent ({n:,} başlık)")
+    print(f"  eski döngü : {t_old:.3f} sn")
+    print(f"  eşleştirici: {t_new:.3f} sn  ({t_old / t_new:.2f}x)")
+
+def synthetic_metrics_frame(n, seed=42):
+    """calculate_metrics girdisi: çarpık dağılımlı sayaçlar + ISO tarih dizgeleri."""
+    rng = np.random.default_rng(seed)
+    created = pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 300 * 86400, n), unit="s")
+    return pd.DataFrame({
+        "playCount": (rng.pareto(1.2, n) * 5000).astype(np.int64),
+        "diggCount": (rng.pareto(1.3, n) * 300).astype(np.int64),
+        "shareCount": (rng.pareto(1.5, n) * 50).astype(np.int64),
+        "collectCount": (rng.pareto(1.5, n) * 40).astype(np.int64),
+        "commentCount": (rng.pareto(1.6, n) * 20).astype(np.int64),
+        "createTimeISO": created.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+    })
+
+def legacy_calculate_metrics(df):
+    # Eski uygulamanın birebir kopyası: aynı hazırlık adımları, karar puanı ve etiket satır satır apply ile
+    cols = ['playCount', 'diggCount', 'shareCount', 'collectCount', 'commentCount']
+    for col in cols:
+        if col not in df.columns: df[col] = 0
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    if 'createTimeISO' not in df.columns: df['createTimeISO'] = pd.NaT
+    else: df['createTimeISO'] = pd.to_datetime(df['createTimeISO'], errors='coerce', utc=True).dt.tz_localize(None)
+    df['Viral_Skor'] = ((df['shareCount'] + df['collectCount']) / df['diggCount'].replace(0, 1)) * 100
+    total_interaction = df['diggCount'] + df['shareCount'] + df['collectCount'] + df['commentCount']
+    df['Etkilesim_Orani'] = (total_interaction / df['playCount'].replace(0, 1)) * 100
+    df['Viral_Skor'] = df['Viral_Skor'].round(2)
+    df['Etkilesim_Orani'] = df['Etkilesim_Orani'].round(2)
+    def score_row(row):
+        score = 0
+        if row['Viral_Skor'] > 10: score += 40
+        if row['playCount'] > 100000: score += 20
+        if row['Etkilesim_Orani'] > 3: score += 20
+        if row['shareCount'] > 200: score += 20
+        return score
+    df['Karar_Puani'] = df.apply(score_row, axis=1)
+    df['Durum'] = df['Karar_Puani'].apply(lambda x: "WINNER 🏆" if x >= 60 else ("TAKİPTE 🟡" if x >= 40 else "ÇÖP 🔴"))
+    return df
+
+def bench_calculate_metrics(sizes=(10_000, 100_000, 1_000_000)):
+    print("calculate_metrics")
+    for n in sizes:
+        base = synthetic_metrics_frame(n)
+        t0 = time.perf_counter(); old = legacy_calculate_metrics(base.copy()); t_old = time.perf_counter() - t0
+        t0 = time.perf_counter(); new = calculate_metrics(base.copy()); t_new = time.perf_counter() - t0
+        assert (old['Karar_Puani'].to_numpy() == new['Karar_Puani'].to_numpy()).all()
+        assert (old['Durum'].to_numpy() == new['Durum'].to_numpy()).all()
+        print(f"  {n:>9,} satır: apply {t_old:7.3f} sn | numpy {t_new:6.3f} sn  ({t_old / t_new:.1f}x)")
+
+def synthetic_snapshots(n_videos, n_snapshots, seed=42):
+    """Video başına 12 saat arayla n_snapshots sayaç görüntüsü ve yayın tarihleri."""
+    rng = np.random.default_rng(seed)
+    published = pd.Timestamp("2026-09-01") + pd.to_timedelta(rng.integers(0, 45 * 24, n_videos), unit="h")
+    observed = pd.Timestamp("2026-10-15") + pd.to_timedelta(np.tile(np.arange(n_snapshots) * 12, n_videos), unit="h")
+    age_days = (observed - np.repeat(published, n_snapshots)).total_seconds() / 86400
+    plays = (np.repeat(rng.pareto(1.2, n_videos) * 1000, n_snapshots) * age_days).astype(np.int64)
+    shares = (plays * 0.01 * np.tile(np.linspace(1, 1.5, n_snapshots), n_videos)).astype(np.int64)
+    ids = np.arange(n_videos).astype(str)
+    snapshots = pd.DataFrame({"video_id": np.repeat(ids, n_snapshots), "observed_at": observed, "playCount": plays, "shareCount": shares})
+    return snapshots, pd.DataFrame({"video_id": ids, "createTimeISO": published})
+
+def bench_velocity(sizes=(10_000, 50_000), n_snapshots=5):
+    print("velocity_metrics")
+    for n in sizes:
+        snapshots, videos = synthetic_snapshots(n, n_snapshots)
+        t0 = time.perf_counter(); out = velocity_metrics(snapshots, videos); t = time.perf_counter() - t0
+        assert len(out) == n
+        print(f"  {n:>9,} video x {n_snapshots} görüntü: {t:6.3f} sn")
+
+# --- APIFY BİÇİMLİ SENTETİK VERİ ---
+PIPELINE_SIZES = (100, 1_000, 10_000, 100_000)  # 1M: --sizes 1000000 (bellek ölçümüyle birkaç dakika)
+PIPELINE_QUERY = "akıllı saat"
+PRODUCT_NOUNS = ["akıllı saat", "bileklik", "telefon kılıfı", "kolye", "çanta", "makyaj çantası", "banyo düzenleyici", "oto aksesuar"]
+# Bölge dağılımı: çoğunluk TR, bir kısmı filtrelenecek yabancı, bir kısmı boş
+REGIONS = (["TR", "US", "DE", "GB", "AZ", ""], [0.7, 0.08, 0.05, 0.04, 0.05, 0.08])
+SELLER_DOMAINS = ["toptanci{}.com.tr", "imalat{}.com", "www.trendyol.com", "m.hepsiburada.com", "blog{}.net", "istoc-magaza{}.com"]
+SUPPLIER_PHRASES = ["toptan satış", "üretici firma", "imalatçı fiyatları", "en uygun fiyat", "kampanyalı ürünler", "b2b sipariş"]
+
+def synthetic_tiktok_items(n, seed=42):
+    """
+    clockworks/tiktok-scraper çıktısı biçiminde n öğe: iç içe authorMeta/videoMeta/hashtags,
+    Türkçe başlıklar, karışık bölgeler ve Pareto dağılımlı (çarpık) sayaçlar.
+    """
+    rng = np.random.default_rng(seed)
+    captions = synthetic_captions(n, seed)
+    rnd = random.Random(seed)
+    nouns = [rnd.choice(PRODUCT_NOUNS) for _ in range(n)]
+    regions = rng.choice(REGIONS[0], n, p=REGIONS[1])
+    authors = rng.zipf(1.5, n) % 5000
+    plays = (rng.pareto(1.1, n) * 2000).astype(np.int64)
+    likes = (plays * rng.uniform(0.01, 0.12, n)).astype(np.int64)
+    shares = (likes * rng.uniform(0.005, 0.2, n)).astype(np.int64)
+    collects = (likes * rng.uniform(0.005, 0.15, n)).astype(np.int64)
+    comments = (likes * rng.uniform(0.01, 0.1, n)).astype(np.int64)
+    created = (pd.Timestamp("2026-10-01") - pd.to_timedelta(rng.integers(0, 120 * 86400, n), unit="s")).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    items = []
+    for i in range(n):
+        tag = nouns[i].split()[0]
+        items.append({
+            "id": str(7_400_000_000_000_000_000 + i),
+            "text": f"{nouns[i]} {captions[i]} #{tag}",
+            "textLanguage": "tr" if regions[i] in ("TR", "AZ", "") else "en",
+            "createTimeISO": created[i],
+            "webVideoUrl": f"https://www.tiktok.com/@satici{authors[i]}/video/{7_400_000_000_000_000_000 + i}",
+            "playCount": int(plays[i]), "diggCount": int(likes[i]), "shareCount": int(shares[i]),
+            "collectCount": int(collects[i]), "commentCount": int(comments[i]),
+            "authorMeta": {"name": f"satici{authors[i]}", "nickName": f"Satıcı {authors[i]}", "region": regions[i], "verified": False, "fans": int(plays[i] // 10)},
+            "videoMeta": {"coverUrl": f"https://p16.tiktokcdn.com/cover/{i}.jpeg", "duration": int(rng.integers(5, 90)), "height": 1024, "width": 576},
+            "hashtags": [{"name": tag}, {"name": "keşfet"}, {"name": "fyp"}],
+            "searchQuery": nouns[i],
+        })
+    return items
+
+def synthetic_google_items(n, seed=42, per_page=10):
+    """apify/google-search-scraper biçimi: sayfa başına organicResults listesi, toplam n sonuç."""
+    rnd = random.Random(seed)
+    results = []
+    for i in range(n):
+        domain = rnd.choice(SELLER_DOMAINS).format(rnd.randint(1, 999))
+        noun = rnd.choice(PRODUCT_NOUNS)
+        results.append({"title": f"{noun.title()} {rnd.choice(SUPPLIER_PHRASES)} | {domain}", "url": f"https://{domain}/urun/{i}",
+                        "description": f"{noun} {rnd.choice(SUPPLIER_PHRASES)}, {rnd.choice(FILLER_WORDS)} {rnd.choice(FILLER_WORDS)}"})
+    return [{"searchQuery": {"term": PIPELINE_QUERY, "page": p + 1}, "organicResults": results[p * per_page:(p + 1) * per_page]}
+            for p in range((n + per_page - 1) // per_page)]
+
+def measure(fn, *args, memory=True):
+    """(süre sn, tepe bellek MB, sonuç). Bellek ayrı bir ikinci çalıştırmada tracemalloc ile ölçülür."""
+    t0 = time.perf_counter(); out = fn(*args); seconds = time.perf_counter() - t0
+    if not memory: return seconds, None, out
+    tracemalloc.start()
+    try:
+        fn(*args)
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+    return seconds, peak, out
+
+def pipeline_stages(n, seed=42):
+    """Aşama adı -> (fonksiyon, argümanlar). Her aşama bir önceki aşamanın gerçek çıktısını alır."""
+    items = synthetic_tiktok_items(n, seed)
+    google_items = synthetic_google_items(n, seed)
+    raw = pd.DataFrame(items)
+    metrics_df = calculate_metrics(raw.copy())
+    return {
+        "flatten_tiktok_items": (flatten_tiktok_items, items),
+        "process_data": (lambda df: process_data(df.copy(), 0, 0, 0, 50), raw),
+        "calculate_metrics": (lambda df: calculate_metrics(df.copy()), raw),
+        "filter_content_relevance": (filter_content_relevance, metrics_df, PIPELINE_QUERY),
+        "collapse_near_duplicates": (collapse_near_duplicates, metrics_df),
+        "filter_suppliers_strict": (lambda items, q: filter_suppliers_strict(pd.DataFrame([r for it in items for r in it["organicResults"]]), q), google_items, PIPELINE_QUERY),
+    }
+
+def bench_pipeline(sizes=PIPELINE_SIZES, memory=True):
+    print("pipeline aşamaları")
+    results = {}
+    for n in sizes:
+        for stage, (fn, *args) in pipeline_stages(n).items():
+            seconds, peak, out = measure(fn, *args, memory=memory)
+            rows = len(out[0]) if isinstance(out, tuple) else len(out)
+            results[f"{stage}/{n}"] = {"seconds": round(seconds, 4), "peak_mb": None if peak is None else round(peak, 2)}
+            mem = f" | tepe {peak:8.1f} MB" if peak is not None else ""
+            print(f"  {n:>9,} satır  {stage:<26} {seconds:8.3f} sn{mem}  -> {rows:,} satır")
+    return results
+
+def retained_mb(build, payload):
+    """JSON yükünden çerçeve kurar, ham öğeler bırakıldıktan sonra çerçevenin tuttuğu bellek (MB)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        frame = build(json.loads(payload))
+        gc.collect()
+        current = tracemalloc.get_traced_memory()[0] / 2**20
+    finally:
+        tracemalloc.stop()
+    return current, frame
+
+def bench_schema(sizes=(1_000, 10_000, 100_000)):
+    print("oturumda tutulan çerçeve belleği (ham -> sıkı şema)")
+    for n in sizes:
+        payload = json.dumps(synthetic_tiktok_items(n))
+        raw_mb, _ = retained_mb(pd.DataFrame, payload)
+        compact_mb, _ = retained_mb(flatten_tiktok_items, payload)
+        print(f"  {n:>9,} video: ham {raw_mb:8.1f} MB | sıkı {compact_mb:7.1f} MB  ({raw_mb / compact_mb:.1f}x daha az)")
+
+# --- TABAN ÇİZGİSİ ---
+BASELINE_PATH = "benchmark_baseline.json"
+TIME_TOLERANCE = 1.5     # tabana göre bu kattan yavaşsa gerileme
+MEMORY_TOLERANCE = 1.25
+MIN_SECONDS = 0.01       # çok kısa ölçümler gürültülü, süre kıyasına girmez
+
+def environment():
+    return {"python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__, "machine": platform.machine(), "cpus": os.cpu_count()}
+
+def save_baseline(results, path=BASELINE_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=1, ensure_ascii=False)
+    print(f"Taban çizgisi kaydedildi: {path}")
+
+def compare_baseline(results, path=BASELINE_PATH, time_tol=TIME_TOLERANCE, mem_tol=MEMORY_TOLERANCE):
+    """Tabana göre gerileyen ölçümlerin açıklamalarını döndürür (boş liste: gerileme yok)."""
+    with open(path, encoding="utf-8") as f: baseline = json.load(f)
+    if baseline.get("environment") != environment():
+        print(f"Uyarı: taban farklı bir ortamda alınmış {baseline.get('environment')}", file=sys.stderr)
+    regressions = []
+    for key, cur in results.items():
+        base = baseline["results"].get(key)
+        if not base: continue
+        if base["seconds"] >= MIN_SECONDS and cur["seconds"] > base["seconds"] * time_tol:
+            regressions.append(f"{key}: süre {base['seconds']:.3f} -> {cur['seconds']:.3f} sn")
+        if base.get("peak_mb") and cur.get("peak_mb") and cur["peak_mb"] > base["peak_mb"] * mem_tol:
+            regressions.append(f"{key}: bellek {base['peak_mb']:.1f} -> {cur['peak_mb']:.1f} MB")
+    return regressions
+
+BENCHMARKS = {"intent": bench_product_intent, "metrics": bench_calculate_metrics, "velocity": bench_velocity, "pipeline": bench_pipeline, "schema": bench_schema}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TikTok viral takip mikro benchmarkları")
+    parser.add_argument("names", nargs="*", help=f"Çalıştırılacak benchmarklar: {', '.join(BENCHMARKS)} (varsayılan: hepsi)")
+    parser.add_argument("--sizes", help="pipeline için virgülle ayrılmış satır sayıları")
+    parser.add_argument("--no-memory", action="store_true", help="tracemalloc ile tepe bellek ölçme (daha hızlı)")
+    parser.add_argument("--save", action="store_true", help="pipeline sonuçlarını taban çizgisi olarak kaydet")
+    parser.add_argument("--check", action="store_true", help="pipeline sonuçlarını taban çizgisiyle kıyasla")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    args = parser.parse_args(argv)
+    unknown = [n for n in args.names if n not in BENCHMARKS]
+    if unknown: parser.error(f"bilinmeyen benchmark: {', '.join(unknown)}")
+    # Eksik taban, pipeline ölçümü dakikalarca sürmeden önce bildirilir
+    if args.check and "pipeline" in (args.names or BENCHMARKS) and not os.path.exists(args.baseline):
+        parser.error(f"taban çizgisi bulunamadı: {args.baseline} (önce: python benchmark.py pipeline --save)")
+
+    status = 0
+    for name in args.names or BENCHMARKS:
+        if name != "pipeline":
+            BENCHMARKS[name]()
+            continue
+        sizes = [int(x) for x in args.sizes.split(",")] if args.sizes else PIPELINE_SIZES
+        results = bench_pipeline(sizes, memory=not args.no_memory)
+        if args.check:
+            regressions = compare_baseline(results, args.baseline)
+            for r in regressions: print(f"  GERİLEME {r}")
+            if regressions: status = 1
+            else: print("Taban çizgisine göre gerileme yok.")
+        if args.save: save_baseline(results, args.baseline)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
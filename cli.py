@@ -0,0 +1,144 @@
+"""
+Komut satırı: Streamlit olmadan arama, rakip analizi ve zamanlanmış güncelleme.
+
+    python cli.py search --category "🚗 Oto & Araç" --limit 10 --out sonuc.csv
+    python cli.py search --queries-file sorgular.txt --limit 20 --out toplu.json
+    python cli.py analyze "akıllı saat" --track
+    python cli.py refresh --workers 4            # scheduler.py ile aynı
+    python cli.py ... --fake                     # ağsız, sahte Apify istemcisi
+    python cli.py ... --trace                    # aşama şelalesini stderr'e yaz
+    python cli.py search ... --live              # yerel dizini atla, doğrudan Apify'a git
+
+--queries-file'daki her satır ayrı bir arama olarak, en fazla --workers tanesi aynı
+anda çalıştırılır; sonuçlar "Sorgu" sütunuyla tek tabloda birleştirilir.
+"""
+import argparse
+import sys
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+import pipeline
+from apify_fanout import MAX_CONCURRENT_RUNS, run_concurrently
+from instrumentation import bind, trace
+
+OUTPUT_COLUMNS = ["Urun_Tahmin", "Hesap", "Viral_Skor", "playCount", "diggCount", "shareCount", "Tarih_Gorsel", "webVideoUrl"]
+
+def _resources(fake):
+    if not fake: return {}
+    from adaptive_fetch import PassRateMemory
+    from apify_cache import ApifyResultCache
+    from fake_apify import FAKE_CACHE_PATH, FakeApifyClient
+    from text_index import TextIndex
+    cache, corpus = ApifyResultCache(FAKE_CACHE_PATH), TextIndex(FAKE_CACHE_PATH)
+    corpus.backfill(cache)
+    return {"client": FakeApifyClient(), "cache": cache, "pass_rates": PassRateMemory(FAKE_CACHE_PATH), "corpus": corpus}
+
+def write_frame(df, out):
+    if not out:
+        print(df.to_string(index=False, max_colwidth=60))
+    elif out.endswith(".json"):
+        df.to_json(out, orient="records", force_ascii=False, date_format="iso", indent=1)
+    else:
+        df.to_csv(out, index=False)
+
+def cmd_search(args):
+    resources = _resources(args.fake)
+    if args.queries_file:
+        with open(args.queries_file, encoding="utf-8") as f: searches = [[q.strip()] for q in f if q.strip()]
+    else:
+        keywords = pipeline.CATEGORIES[args.category] if args.category else []
+        searches = [pipeline.build_queries(keywords, " ".join(args.query), args.hashtag)]
+    filters = dict(min_views=args.min_views, min_likes=args.min_likes, date_limit=args.days, force_refresh=args.refresh,
+                   local_first=not args.live)
+
+    def run(queries):
+        return pipeline.search_products(queries, args.limit, **filters, **resources)
+
+    parts = []
+    for queries, (df, fetched, products) in run_concurrently(bind(run), searches, max_workers=args.workers):
+        print(f"{' | '.join(queries)}: {fetched} video tarandı, {products} ürün, {len(df)} sonuç ({df.attrs.get('kaynak', 'canli')})", file=sys.stderr)
+        if not df.empty: parts.append(df.assign(Sorgu=" | ".join(queries)))
+    if not parts:
+        print("Sonuç bulunamadı.", file=sys.stderr)
+        return 1
+    result = pd.concat(parts, ignore_index=True)
+    write_frame(result[["Sorgu", *[c for c in OUTPUT_COLUMNS if c in result.columns]]], args.out)
+    return 0
+
+def cmd_analyze(args):
+    import tracking
+    from metrics import load_decision_config
+    resources = _resources(args.fake)
+    client, cache = resources.get("client") or pipeline.get_client(), resources.get("cache") or pipeline.get_cache()
+    config = load_decision_config(pipeline.load_secrets().get("decision_config"))
+    corpus = resources.get("corpus") or pipeline.get_corpus()
+    df = tracking.search_competitors(client, cache, args.query, args.limit, args.refresh, corpus=corpus)
+    if df.empty:
+        print("Rakip bulunamadı.", file=sys.stderr)
+        return 1
+    df = tracking.score_competitors(df, args.query, config)
+    if df.empty:
+        print("Rakip bulundu ama ürünle alakalı değil.", file=sys.stderr)
+        return 1
+    analysis, next_check = tracking.generate_smart_analysis(df, config)
+    print(analysis.replace("**", ""), file=sys.stderr)
+    if args.track:
+        from fake_apify import FAKE_STORE_PATH
+        from store import DEFAULT_STORE_PATH, LocalStore
+        from video_index import VideoIndex
+        store = LocalStore(FAKE_STORE_PATH if args.fake else DEFAULT_STORE_PATH)
+        uid, today = uuid.uuid4().hex[:6], str(datetime.now().date())
+        avg_viral = df['Viral_Skor'].mean()
+        status = "WINNER 🏆" if df['Karar_Puani'].mean() >= config['winner_min'] else "NORMAL"
+        store.save_product(uid, args.query, "", args.query, today, next_check, avg_viral, status)
+        tracking.save_refresh(store, uid, df, analysis, next_check, config, VideoIndex(store))
+        print(f"Takibe alındı: {uid} (sonraki kontrol {next_check})", file=sys.stderr)
+    write_frame(df[[c for c in ["text", "playCount", "Viral_Skor", "Etkilesim_Orani", "Durum", "Satici_Sayisi", "Kume_Izlenme", "webVideoUrl"] if c in df.columns]], args.out)
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TikTok ürün arama hattı (Streamlit'siz).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    search = sub.add_parser("search", help="Ürün videosu ara (TrendScope hattı)")
+    search.add_argument("query", nargs="*", help="Arama metni")
+    search.add_argument("--category", choices=list(pipeline.CATEGORIES))
+    search.add_argument("--hashtag", default="")
+    search.add_argument("--queries-file", help="Her satırı ayrı arama olarak çalıştır")
+    search.add_argument("--limit", type=int, default=8)
+    search.add_argument("--min-views", type=int, default=0)
+    search.add_argument("--min-likes", type=int, default=0)
+    search.add_argument("--days", type=int, default=30, help="Tarih aralığı (0: tüm zamanlar)")
+    search.add_argument("--workers", type=int, default=MAX_CONCURRENT_RUNS)
+    search.add_argument("--live", action="store_true", help="Yerel dizini atla, doğrudan Apify'da ara")
+    search.set_defaults(func=cmd_search)
+
+    analyze = sub.add_parser("analyze", help="Tek ürün için rakip analizi")
+    analyze.add_argument("query")
+    analyze.add_argument("--limit", type=int, default=15)
+    analyze.add_argument("--track", action="store_true", help="Yerel depoda takibe al")
+    analyze.set_defaults(func=cmd_analyze)
+
+    for p in (search, analyze):
+        p.add_argument("--out", help=".csv veya .json (verilmezse tablo olarak yazdırılır)")
+        p.add_argument("--refresh", action="store_true", help="Apify önbelleğini atla")
+        p.add_argument("--fake", action="store_true", help="Ağsız: sahte Apify istemcisi")
+        p.add_argument("--trace", action="store_true", help="Aşama süreleri/satır sayıları tablosunu yazdır")
+
+    sub.add_parser("refresh", help="Vadesi gelen takip ürünlerini güncelle (scheduler.py)", add_help=False)
+
+    if argv is None: argv = sys.argv[1:]
+    if argv and argv[0] == "refresh":
+        from scheduler import main as scheduler_main
+        return scheduler_main(argv[1:])
+    args = parser.parse_args(argv)
+    if not args.trace: return args.func(args)
+    with trace(args.command) as tr:
+        status = args.func(args)
+    print(tr.waterfall().to_string(index=False), file=sys.stderr)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
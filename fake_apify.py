@@ -0,0 +1,89 @@
+"""
+Ağsız test için yerel Apify yerine geçen istemci.
+
+ApifyClient'ın bu projede kullanılan kısmını taklit eder:
+client.actor(id).call(run_input=...) ve client.dataset(id).list_items(offset=, limit=).
+TikTok aramaları için sorgudan türetilen (aynı sorgu -> aynı videolar) sentetik
+videolar üretir; her çalıştırmada sayaçlar biraz artar, böylece artımlı güncelleme
+ve hız hesabı da denenebilir. Google aramaları için sentetik organik sonuçlar döner.
+"""
+import hashlib
+import itertools
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+COMPUTE_UNITS_PER_RUN = 0.02
+# Sahte sonuçlar gerçek Apify önbelleğine karışmasın
+FAKE_CACHE_PATH = os.path.join(tempfile.gettempdir(), "fake_apify_cache.sqlite")
+# Sahte rakipler/anlık görüntüler de gerçek takip deposuna (VIRAL_STORE_PATH) yazılmasın
+FAKE_STORE_PATH = os.path.join(tempfile.gettempdir(), "fake_viral_takip.sqlite")
+
+def _seed(text):
+    return int(hashlib.sha256(text.encode()).hexdigest()[:12], 16)
+
+def fake_tiktok_items(query, limit, run_no=0):
+    rnd = random.Random(_seed(query))
+    now = datetime.now()
+    items = []
+    for i in range(limit):
+        age_days = rnd.uniform(0.5, 60)
+        base = rnd.paretovariate(1.2) * 1000
+        growth = 1 + 0.1 * run_no * rnd.random()
+        items.append({
+            "id": f"{_seed(query) % 10**8}{i:03d}",
+            "text": f"{query} {rnd.choice(['sipariş', 'fiyat', 'link bio', 'kargo bedava', 'inceleme'])} #{query.split()[0] if query.split() else 'urun'}",
+            "webVideoUrl": f"https://www.tiktok.com/@fake/video/{_seed(query) % 10**8}{i:03d}",
+            "createTimeISO": (now - timedelta(days=age_days)).isoformat() + "Z",
+            "playCount": int(base * age_days * growth),
+            "diggCount": int(base * age_days * growth * 0.05),
+            "shareCount": int(base * age_days * growth * 0.004),
+            "collectCount": int(base * age_days * growth * 0.003),
+            "commentCount": int(base * age_days * growth * 0.002),
+            "authorMeta": {"name": f"satici{rnd.randint(1, 50)}", "region": "TR"},
+            "videoMeta": {"coverUrl": ""},
+            "searchQuery": query,
+        })
+    return items
+
+def fake_google_items(query, limit):
+    rnd = random.Random(_seed(query))
+    results = [{"title": f"{query} toptan üretici {i}", "url": f"https://firma{rnd.randint(1, 999)}.com.tr/{i}",
+                "description": f"{query} toptan satış, imalatçı fiyatları"} for i in range(limit)]
+    return [{"organicResults": results}]
+
+class _Dataset:
+    def __init__(self, items): self.items = items
+    def list_items(self, offset=0, limit=None, **kwargs):
+        page = self.items[offset:offset + limit] if limit else self.items[offset:]
+        return SimpleNamespace(items=page, total=len(self.items))
+
+class _Actor:
+    def __init__(self, client, actor_id): self.client, self.actor_id = client, actor_id
+    def call(self, run_input=None, **kwargs):
+        return self.client._run(self.actor_id, run_input or {})
+
+class FakeApifyClient:
+    def __init__(self, compute_units_per_run=COMPUTE_UNITS_PER_RUN):
+        self.compute_units_per_run = compute_units_per_run
+        self.runs = []
+        self._datasets = {}
+        self._ids = itertools.count(1)
+
+    def _run(self, actor_id, run_input):
+        limit = int(run_input.get("resultsPerPage", 10))
+        if "google" in actor_id: items = fake_google_items(run_input.get("queries", ""), limit)
+        else:
+            run_no = len(self.runs)
+            items = [it for q in run_input.get("searchQueries", []) for it in fake_tiktok_items(q, limit, run_no)]
+        dataset_id = f"fake-{next(self._ids)}"
+        self._datasets[dataset_id] = items
+        run = {"id": dataset_id, "actId": actor_id, "status": "SUCCEEDED", "defaultDatasetId": dataset_id,
+               "stats": {"computeUnits": self.compute_units_per_run}}
+        self.runs.append(run)
+        return run
+
+    def actor(self, actor_id): return _Actor(self, actor_id)
+    def dataset(self, dataset_id): return _Dataset(self._datasets.get(dataset_id, []))
@@ -0,0 +1,200 @@
+"""
+Hafif ölçüm katmanı: hat aşamaları için span'ler (süre, CPU, satır girdi/çıktı, Apify CU).
+
+    with span("region_filter", rows_in=len(df)) as s:
+        df = ...
+        s.set(rows_out=len(df))
+
+Span'ler iki durumda kaydedilir: VIRAL_TRACE=1 (veya enable()) ile süreç genelinde ya da
+bir trace() bloğunun içinde (örn. Streamlit'te sadece hata ayıklama paneli açık olan istek).
+İkisi de yoksa span() paylaşılan boş bir nesne döndürür; maliyet bir bayrak ve bir
+contextvar okumasıdır. Aşamalar sayfa/adım başınadır, satır başına span açılmaz.
+
+Çıkışlar:
+- trace().waterfall()   : istek başına şelale tablosu (hata ayıklama paneli, cli --trace)
+- "viral.trace" logger'ı : her span için tek satır JSON (yapılandırılmış log)
+- prometheus_text()     : aşama başına toplam sayaçlar; serve_metrics(port) ile /metrics
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+ENABLED = os.environ.get("VIRAL_TRACE", "") not in ("", "0")
+METRIC_PREFIX = "viral"
+
+log = logging.getLogger("viral.trace")
+_current = contextvars.ContextVar("viral_trace", default=None)
+
+def enable(on=True):
+    global ENABLED
+    ENABLED = on
+
+# --- SPAN ---
+class Span:
+    __slots__ = ("name", "trace", "start", "wall", "cpu", "rows_in", "rows_out", "cu", "attrs", "_t0", "_c0")
+
+    def __init__(self, name, trace, rows_in=None, attrs=None):
+        self.name, self.trace, self.rows_in, self.attrs = name, trace, rows_in, attrs or {}
+        self.rows_out, self.cu, self.wall, self.cpu, self.start = None, 0.0, 0.0, 0.0, 0.0
+
+    def set(self, rows_out=None, cu=None, **attrs):
+        if rows_out is not None: self.rows_out = rows_out
+        if cu: self.cu += cu
+        if attrs: self.attrs.update(attrs)
+
+    def add_run(self, run):
+        """Apify çalışma kaydındaki compute unit'i span'e ekler (ApifyResultCache on_run ile)."""
+        self.set(cu=((run or {}).get("stats") or {}).get("computeUnits") or 0.0)
+
+    def __enter__(self):
+        self.start = time.time()
+        self._c0, self._t0 = time.thread_time(), time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall = time.perf_counter() - self._t0
+        self.cpu = time.thread_time() - self._c0
+        if exc_type: self.attrs["error"] = exc_type.__name__
+        _record(self)
+        return False
+
+    def as_dict(self):
+        return {"span": self.name, "trace": self.trace.name if self.trace else None, "start": self.start,
+                "wall_s": round(self.wall, 6), "cpu_s": round(self.cpu, 6), "rows_in": self.rows_in,
+                "rows_out": self.rows_out, "cu": self.cu, **self.attrs}
+
+class _NoopSpan:
+    __slots__ = ()
+    def set(self, rows_out=None, cu=None, **attrs): pass
+    def add_run(self, run): pass
+    def __enter__(self): return self
+    def __exit__(self, exc_type, exc, tb): return False
+
+NOOP_SPAN = _NoopSpan()
+
+def span(name, rows_in=None, **attrs):
+    """Ölçüm kapalıysa ve etkin trace yoksa paylaşılan boş span döner."""
+    trace = _current.get()
+    if trace is None and not ENABLED: return NOOP_SPAN
+    return Span(name, trace, rows_in, attrs)
+
+# --- TRACE (istek başına) ---
+class Trace:
+    def __init__(self, name):
+        self.name = name
+        self.start = time.time()
+        self.spans = []
+        self._lock = threading.Lock()
+        self._token = None
+
+    def add(self, s):
+        with self._lock: self.spans.append(s)
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        return False
+
+    def waterfall(self):
+        """Span başına bir satır: başlangıç ofseti ve süre (ms), CPU, satırlar, CU."""
+        with self._lock: spans = list(self.spans)
+        return pd.DataFrame([{
+            "Asama": s.name,
+            "Baslangic_ms": round((s.start - self.start) * 1000, 1),
+            "Sure_ms": round(s.wall * 1000, 1),
+            "CPU_ms": round(s.cpu * 1000, 1),
+            "Girdi": s.rows_in,
+            "Cikti": s.rows_out,
+            "CU": s.cu,
+        } for s in sorted(spans, key=lambda s: s.start)], columns=["Asama", "Baslangic_ms", "Sure_ms", "CPU_ms", "Girdi", "Cikti", "CU"]).astype({"Girdi": "Int64", "Cikti": "Int64"})
+
+def trace(name):
+    """with trace("arama") as tr: ... -> içindeki span'ler tr.spans'e de yazılır."""
+    return Trace(name)
+
+def bind(fn):
+    """fn'i çağıranın bağlamıyla (etkin trace dahil) çalıştırır; iş parçacığı havuzuna verilen işler için."""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.copy().run(fn, *args, **kwargs)
+
+# --- TOPLAM SAYAÇLAR ---
+class StageStats:
+    """Aşama başına toplamlar (süreç ömrü boyunca)."""
+    FIELDS = ("calls", "wall", "cpu", "rows_in", "rows_out", "cu", "errors")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+
+    def add(self, s):
+        with self._lock:
+            st = self.stages.setdefault(s.name, dict.fromkeys(self.FIELDS, 0))
+            st["calls"] += 1
+            st["wall"] += s.wall
+            st["cpu"] += s.cpu
+            st["rows_in"] += s.rows_in or 0
+            st["rows_out"] += s.rows_out or 0
+            st["cu"] += s.cu
+            st["errors"] += "error" in s.attrs
+
+    def snapshot(self):
+        with self._lock: return {k: dict(v) for k, v in self.stages.items()}
+
+    def reset(self):
+        with self._lock: self.stages.clear()
+
+STATS = StageStats()
+
+def _record(s):
+    STATS.add(s)
+    if s.trace is not None: s.trace.add(s)
+    if log.isEnabledFor(logging.INFO): log.info(json.dumps(s.as_dict(), ensure_ascii=False, default=str))
+
+PROMETHEUS_METRICS = [
+    ("stage_calls_total", "calls", "counter", "Aşama çalıştırma sayısı"),
+    ("stage_seconds_total", "wall", "counter", "Aşamada geçen toplam duvar saati süresi (sn)"),
+    ("stage_cpu_seconds_total", "cpu", "counter", "Aşamada harcanan toplam CPU süresi (sn)"),
+    ("stage_rows_in_total", "rows_in", "counter", "Aşamaya giren toplam satır"),
+    ("stage_rows_out_total", "rows_out", "counter", "Aşamadan çıkan toplam satır"),
+    ("stage_errors_total", "errors", "counter", "Hata ile biten aşama sayısı"),
+    ("apify_compute_units_total", "cu", "counter", "Aşamada harcanan Apify compute unit"),
+]
+
+def prometheus_text(stats=STATS, prefix=METRIC_PREFIX):
+    """Prometheus metin biçimi (text/plain; version=0.0.4)."""
+    snap = stats.snapshot()
+    lines = []
+    for metric, field, kind, help_text in PROMETHEUS_METRICS:
+        name = f"{prefix}_{metric}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for stage, values in sorted(snap.items()):
+            lines.append(f'{name}{{stage="{stage}"}} {values[field]:g}')
+    return "\n".join(lines) + "\n"
+
+def serve_metrics(port, host="0.0.0.0", stats=STATS):
+    """/metrics uç noktasını arka plan iş parçacığında sunar; sunucuyu döndürür."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text(stats).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, *args): pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    return server
@@ -0,0 +1,65 @@
+"""
+Video metrikleri ve karar puanı (Karar_Puani / Durum).
+
+Karar kuralları satır satır `apply` yerine numpy vektör işlemleriyle hesaplanır.
+Eşikler bir yapılandırma sözlüğünden gelir; kod değiştirmeden
+(örn. secrets.toml içindeki [decision_config] bölümüyle) ayarlanabilir.
+"""
+import numpy as np
+import pandas as pd
+
+LABEL_WINNER = "WINNER 🏆"
+LABEL_WATCH = "TAKİPTE 🟡"
+LABEL_TRASH = "ÇÖP 🔴"
+
+DEFAULT_DECISION_CONFIG = {
+    # [sütun, eşik, puan]: sütun değeri eşiği AŞARSA puan eklenir
+    "rules": [
+        ["Viral_Skor", 10, 40],
+        ["playCount", 100000, 20],
+        ["Etkilesim_Orani", 3, 20],
+        ["shareCount", 200, 20],
+    ],
+    "winner_min": 60,  # Karar_Puani >= winner_min -> WINNER
+    "watch_min": 40,   # Karar_Puani >= watch_min  -> TAKİPTE
+}
+
+def load_decision_config(overrides=None):
+    """Varsayılan eşiklerin üzerine verilen (kısmi) ayarları yazar."""
+    config = {k: (list(v) if isinstance(v, list) else v) for k, v in DEFAULT_DECISION_CONFIG.items()}
+    for key, value in dict(overrides or {}).items():
+        if key not in config: raise KeyError(f"Bilinmeyen karar ayarı: {key}")
+        config[key] = [list(r) for r in value] if key == "rules" else value
+    return config
+
+def decision_scores(df, config=None):
+    """Kural eşiklerine göre Karar_Puani dizisini (int64) hesaplar."""
+    config = config or DEFAULT_DECISION_CONFIG
+    score = np.zeros(len(df), dtype=np.int64)
+    for col, threshold, points in config["rules"]:
+        score += np.where(df[col].to_numpy() > threshold, points, 0)
+    return score
+
+def decision_labels(scores, config=None):
+    config = config or DEFAULT_DECISION_CONFIG
+    return np.select(
+        [scores >= config["winner_min"], scores >= config["watch_min"]],
+        [LABEL_WINNER, LABEL_WATCH],
+        default=LABEL_TRASH,
+    ).astype(object)
+
+def calculate_metrics(df, config=None):
+    cols = ['playCount', 'diggCount', 'shareCount', 'collectCount', 'commentCount']
+    for col in cols:
+        if col not in df.columns: df[col] = 0
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    if 'createTimeISO' not in df.columns: df['createTimeISO'] = pd.NaT
+    else: df['createTimeISO'] = pd.to_datetime(df['createTimeISO'], errors='coerce', utc=True).dt.tz_localize(None)
+    df['Viral_Skor'] = ((df['shareCount'] + df['collectCount']) / df['diggCount'].replace(0, 1)) * 100
+    total_interaction = df['diggCount'] + df['shareCount'] + df['collectCount'] + df['commentCount']
+    df['Etkilesim_Orani'] = (total_interaction / df['playCount'].replace(0, 1)) * 100
+    df['Viral_Skor'] = df['Viral_Skor'].round(2)
+    df['Etkilesim_Orani'] = df['Etkilesim_Orani'].round(2)
+    df['Karar_Puani'] = decision_scores(df, config)
+    df['Durum'] = decision_labels(df['Karar_Puani'].to_numpy(), config)
+    return df
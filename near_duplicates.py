@@ -0,0 +1,189 @@
+"""
+Yakın kopya başlık kümeleme: aynı ürün videosunu neredeyse aynı açıklamayla onlarca
+hesaptan yeniden yükleyen satıcıları tek ürün olarak toplar.
+
+- Her başlık kelime ikilileri (shingle) kümesine çevrilir; MinHash imzası (NUM_PERM
+  çarp-kaydır özeti) tüm toplu iş için numpy ile hesaplanır.
+- LSH: imza BANDS banda bölünür, aynı bant anahtarını paylaşan satırlar aday olur ve
+  imza benzerliği SIMILARITY_MIN'i geçerse aynı kümeye bağlanır (union-find). Her satır
+  sabit sayıda bantta gruplandığı için süre satır sayısıyla neredeyse doğrusal büyür.
+- İpuçları: aynı kapak görseli (Resim; imzalı URL'nin değişmeyen dosya adı) ya da aynı video
+  doğrudan birleştirilir; hashtag kümesi birebir aynı olan (en az MIN_HINT_HASHTAGS
+  etiket) satırlar için daha düşük benzerlik (HINT_SIMILARITY_MIN) yeterlidir.
+
+collapse_near_duplicates her kümeden en çok izlenen videoyu temsilci olarak bırakır ve
+Kume_Video, Kume_Izlenme, Kume_Paylasim, Satici_Sayisi sütunlarını ekler.
+"""
+import re
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+from product_intent import TOKEN_RE, normalize_turkish
+
+NUM_PERM = 64
+BANDS = 16                 # 16 bant x 4 satır: ~%50 benzerlikte aday olma ihtimali yarıya iner
+SIMILARITY_MIN = 0.6       # Aday çiftin aynı kümeye girmesi için tahmini Jaccard
+HINT_SIMILARITY_MIN = 0.3  # Hashtag kümesi birebir aynıysa yeterli benzerlik
+MIN_HINT_HASHTAGS = 3
+CHUNK_SHINGLES = 200_000   # MinHash matrisinin bellekte tutulan parça boyutu (satır x NUM_PERM)
+
+HASHTAG_RE = re.compile(r"#(\w+)")
+
+_rng = np.random.default_rng(20240601)
+_PERM_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _rng.integers(1, 2**63, NUM_PERM // BANDS, dtype=np.uint64) | np.uint64(1)
+
+def shingles(text):
+    """Normalize edilmiş başlığın kelime ikilileri (tek kelimelik başlıkta kelimenin kendisi)."""
+    words = TOKEN_RE.findall(normalize_turkish(text))
+    return [f"{a} {b}" for a, b in zip(words, words[1:])] or words
+
+def hashtag_key(text):
+    tags = sorted(set(HASHTAG_RE.findall(normalize_turkish(text))))
+    return " ".join(tags) if len(tags) >= MIN_HINT_HASHTAGS else ""
+
+def cover_key(url):
+    """
+    Kapak URL'sinin her çekimde aynı kalan kısmı: yolun son parçası, "~" sonrası biçim ekleri olmadan.
+    TikTok kapakları her istekte farklı sunucu ve imza (x-expires, x-signature) ile döner.
+    """
+    if not isinstance(url, str) or not url: return ""
+    return urlsplit(url).path.rsplit("/", 1)[-1].split("~", 1)[0]
+
+def _mix64(x):
+    # splitmix64 karıştırıcısı: ardışık shingle numaralarını dağınık 64 bitlik özetlere çevirir
+    with np.errstate(over="ignore"):
+        x = (x + np.uint64(0x9E3779B97F4A7C15)) ^ (x >> np.uint64(30))
+        x = x * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+def minhash_signatures(texts):
+    """(satır x NUM_PERM) uint32 MinHash matrisi; shingle'ı olmayan satırlarda tüm değerler en büyük sayıdır."""
+    per_row = [shingles(t) for t in texts]
+    lengths = np.fromiter(map(len, per_row), dtype=np.int64, count=len(per_row))
+    sig = np.full((len(per_row), NUM_PERM), np.iinfo(np.uint32).max, dtype=np.uint32)
+    if not lengths.sum(): return sig
+    # Shingle metinleri pandas özetleme tablosuyla numaralanır, numaralar 64 bite karıştırılır
+    codes, _ = pd.factorize(pd.Series([s for row in per_row for s in row], dtype=object))
+    hashes = _mix64(codes.astype(np.uint64))
+    rows = np.repeat(np.arange(len(per_row)), lengths)
+    # Parça sınırları satır sınırına hizalanır ki her satırın minimumu tek parçada alınsın
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    start_row = 0
+    while start_row < len(per_row):
+        end_row = int(np.searchsorted(offsets, offsets[start_row] + CHUNK_SHINGLES, side="right")) - 1
+        end_row = min(max(end_row, start_row + 1), len(per_row))
+        lo, hi = offsets[start_row], offsets[end_row]
+        if hi > lo:
+            with np.errstate(over="ignore"):
+                # Çarp-kaydır özet ailesi: (a*x + b) mod 2^64 değerinin üst 32 biti
+                vals = ((hashes[lo:hi, None] * _PERM_A[None, :] + _PERM_B[None, :]) >> np.uint64(32)).astype(np.uint32)
+            chunk_rows = rows[lo:hi]
+            present = np.unique(chunk_rows)
+            starts = np.searchsorted(chunk_rows, present)
+            sig[present] = np.minimum.reduceat(vals, starts, axis=0)
+        start_row = end_row
+    return sig
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = np.arange(n)
+
+    def find(self, i):
+        parent = self.parent
+        root = i
+        while parent[root] != root: root = parent[root]
+        while parent[i] != root: parent[i], i = root, parent[i]
+        return root
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj: self.parent[max(ri, rj)] = min(ri, rj)
+
+    def labels(self):
+        # Birleştirmeler hep küçük köke yapıldığı için artan sırada tek geçiş yeterli
+        parent = self.parent
+        for i in range(len(parent)):
+            if parent[i] != i: parent[i] = parent[parent[i]]
+        return parent
+
+def _candidate_pairs(keys, valid):
+    """Aynı anahtarı paylaşan (valid) satırlar için (grubun ilk satırı, diğer satır) çiftleri."""
+    idx = np.flatnonzero(valid)
+    if len(idx) < 2: return idx[:0], idx[:0]
+    order = idx[np.argsort(keys[idx], kind="stable")]
+    sorted_keys = keys[order]
+    new_group = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+    heads = order[np.flatnonzero(new_group)][np.cumsum(new_group) - 1]
+    rest = ~new_group
+    return heads[rest], order[rest]
+
+def _link_similar(uf, sig, pairs, min_similarity):
+    """İmza benzerliği yeterli olan çiftleri aynı kümeye bağlar."""
+    heads, members = pairs
+    similar = (sig[members] == sig[heads]).mean(axis=1) >= min_similarity
+    for i, j in zip(heads[similar].tolist(), members[similar].tolist()): uf.union(i, j)
+
+def near_duplicate_clusters(df):
+    """Her satırın küme numarası (0'dan başlayan, ilk görülme sırasıyla; int64 dizisi)."""
+    n = len(df)
+    if n == 0: return np.zeros(0, dtype=np.int64)
+    texts = [t if isinstance(t, str) else "" for t in (df["text"].tolist() if "text" in df.columns else [""] * n)]
+    sig = minhash_signatures(texts)
+    has_sig = sig[:, 0] != np.iinfo(np.uint32).max
+    uf = _UnionFind(n)
+
+    rows_per_band = NUM_PERM // BANDS
+    for band in range(BANDS):
+        with np.errstate(over="ignore"):
+            keys = (sig[:, band * rows_per_band:(band + 1) * rows_per_band].astype(np.uint64) * _BAND_MIX).sum(axis=1)
+        _link_similar(uf, sig, _candidate_pairs(keys, has_sig), SIMILARITY_MIN)
+
+    tag_keys = pd.Series([hashtag_key(t) for t in texts])
+    codes, _ = pd.factorize(tag_keys)
+    _link_similar(uf, sig, _candidate_pairs(codes, (tag_keys != "").to_numpy() & has_sig), HINT_SIMILARITY_MIN)
+
+    # Aynı kapak görseli / aynı video: benzerlik aranmadan birleştirilir
+    for col, key in (("Resim", cover_key), ("webVideoUrl", None)):
+        if col not in df.columns: continue
+        values = pd.Series(df[col].tolist(), dtype=object).fillna("").astype(str)
+        if key: values = values.map(key)
+        codes, _ = pd.factorize(values)
+        heads, members = _candidate_pairs(codes, (values != "").to_numpy())
+        for i, j in zip(heads.tolist(), members.tolist()): uf.union(i, j)
+
+    return pd.factorize(uf.labels())[0].astype(np.int64)
+
+def _sellers(df):
+    if "Hesap" in df.columns: return df["Hesap"].astype(object).to_numpy()
+    if "authorMeta" in df.columns: return np.array([v.get("name", "") if isinstance(v, dict) else "" for v in df["authorMeta"]], dtype=object)
+    return np.arange(len(df))
+
+def collapse_near_duplicates(df, rank_by="playCount"):
+    """
+    Kümeyi tek satıra indirir: temsilci en yüksek rank_by değerli video, sıralama korunur.
+    Eklenen sütunlar: Kume_Video (video sayısı), Kume_Izlenme ve Kume_Paylasim (toplamlar),
+    Satici_Sayisi (farklı hesap sayısı; hesap bilgisi yoksa video sayısı).
+    """
+    if df.empty: return df
+    labels = near_duplicate_clusters(df)
+    work = pd.DataFrame({
+        "Kume": labels,
+        "rank": pd.to_numeric(df[rank_by], errors="coerce").fillna(0).to_numpy() if rank_by in df.columns else 0,
+        "play": pd.to_numeric(df["playCount"], errors="coerce").fillna(0).to_numpy() if "playCount" in df.columns else 0,
+        "share": pd.to_numeric(df["shareCount"], errors="coerce").fillna(0).to_numpy() if "shareCount" in df.columns else 0,
+        "seller": _sellers(df),
+        "pos": np.arange(len(df)),
+    })
+    grouped = work.groupby("Kume", sort=False)
+    agg = grouped.agg(Kume_Video=("pos", "size"), Kume_Izlenme=("play", "sum"), Kume_Paylasim=("share", "sum"),
+                      Satici_Sayisi=("seller", "nunique"))
+    reps = work.sort_values(["rank", "pos"], ascending=[False, True]).drop_duplicates("Kume").sort_values("pos")
+    out = df.iloc[reps["pos"].to_numpy()].copy()
+    stats = agg.loc[reps["Kume"].to_numpy()]
+    for col in agg.columns: out[col] = stats[col].to_numpy().astype(np.int64)
+    return out
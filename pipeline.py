@@ -0,0 +1,276 @@
+"""
+Başsız (Streamlit'siz) ürün arama hattı: çek -> puanla -> filtrele -> sırala.
+
+TrendScope (app.py) ve komut satırı (cli.py) aynı fonksiyonları kullanır. Modül
+içe aktarılırken hiçbir istemci kurulmaz; Apify istemcisi, önbellek ve geçme oranı
+hafızası ilk kullanıldıklarında oluşturulur (get_client/get_cache/get_pass_rates/get_corpus).
+apify_client da sadece gerçek istemci gerektiğinde içe aktarılır. Token sırasıyla
+APIFY_TOKEN ortam değişkeninden veya .streamlit/secrets.toml dosyasından okunur.
+
+search_products önce yerel başlık dizininde (text_index) arar; yeterli ve taze sonuç
+varsa Apify'a hiç gidilmez, yoksa canlı aramanın sayfaları dizine de eklenir.
+"""
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from adaptive_fetch import MAX_FETCH_ITEMS, PassRateMemory, adaptive_fetch, rate_key
+from apify_cache import ApifyResultCache
+from ingest import compact_frame, flatten_tiktok_items
+from instrumentation import span
+from product_intent import score_product_intent_series
+from text_index import LOCAL_MAX_AGE_HOURS, TextIndex
+from tiktok_search import per_query_limit, tag_search_frame, video_key
+
+SECRETS_PATH = os.path.join(".streamlit", "secrets.toml")
+
+CATEGORIES = {
+    "Tümü": [],
+    "🏠 Ev & Yaşam": ["mutfak gereçleri", "pratik ev ürünleri", "banyo düzenleyici", "dekorasyon", "çeyiz", "temizlik"],
+    "💄 Güzellik & Bakım": ["makyaj", "cilt bakımı", "kozmetik", "güzellik", "saç bakım"],
+    "👗 Moda & Giyim": ["kombin", "moda", "tesettür", "giyim", "elbise", "ayakkabı", "çanta"],
+    "💻 Teknoloji & Aksesuar": ["telefon kılıfı", "akıllı saat", "teknoloji", "kulaklık", "aksesuar"],
+    "👶 Anne & Bebek": ["bebek ürünleri", "oyuncak", "bebek giyim", "hamile"],
+    "🚗 Oto & Araç": ["oto aksesuar", "araba", "modifiye", "araç temizlik"]
+}
+
+DEFAULT_QUERY = "inceleme fiyat sipariş"
+
+# --- TEMBEL KAYNAKLAR ---
+_resources = {}
+_resources_lock = threading.Lock()
+
+def _lazy(name, factory):
+    with _resources_lock:
+        if name not in _resources: _resources[name] = factory()
+        return _resources[name]
+
+def load_secrets(path=SECRETS_PATH):
+    """Streamlit secrets.toml dosyasını (varsa) okur."""
+    if not os.path.exists(path): return {}
+    import tomllib
+    with open(path, "rb") as f: return tomllib.load(f)
+
+def apify_token():
+    return os.environ.get("APIFY_TOKEN") or load_secrets().get("APIFY_TOKEN")
+
+def make_client(token=None):
+    token = token or apify_token()
+    if not token: raise RuntimeError("APIFY_TOKEN bulunamadı (ortam değişkeni veya .streamlit/secrets.toml).")
+    from apify_client import ApifyClient
+    return ApifyClient(token)
+
+def get_client():
+    return _lazy("client", make_client)
+
+def get_cache():
+    return _lazy("cache", ApifyResultCache)
+
+def get_pass_rates():
+    return _lazy("pass_rates", PassRateMemory)
+
+def get_corpus():
+    def build():
+        corpus = TextIndex()
+        corpus.backfill(get_cache())
+        return corpus
+    return _lazy("corpus", build)
+
+# --- SORGU ---
+def build_queries(keywords, search_query="", hashtag=""):
+    """Kategori anahtar kelimeleri + arama metni + hashtag'den aktöre gidecek sorgu listesi."""
+    queries = []
+    for base_keyword in keywords or [""]:
+        final_query = f"{base_keyword}"
+        if search_query: final_query = f"{search_query} {final_query}"
+        if hashtag: final_query = f"{final_query} #{hashtag.replace('#', '')}"
+        if not final_query.strip(): final_query = DEFAULT_QUERY
+        queries.append(final_query.strip())
+    return queries
+
+# --- HAT ---
+def fetch_tiktok_data(queries, requested_limit, min_views=0, min_likes=0, date_limit=0, force_refresh=False,
+                      client=None, cache=None, pass_rates=None, corpus=None):
+    """
+    Tek sorgu (str) veya sorgu listesi alır; liste tek aktör çalıştırmasında gönderilir.
+    İlk istek, bu sorgular için hatırlanan geçme oranına göre küçük tutulur; hedefe
+    ulaşılamazsa daha büyük istekle tekrar çekilir (bkz. adaptive_fetch). Veri seti sayfa
+    sayfa okunur, önceki sayfa/turlarda görülen videolar atılır ve filtreler uygulanır.
+    (filtrelenmiş df, taranan video, ürün sayısı) döner. Apify hatası istisna olarak yükselir.
+    client/cache/pass_rates verilmezse süreç genelindeki tembel örnekler kullanılır.
+    corpus (TextIndex) verilirse okunan her sayfa filtrelerden önce yerel dizine eklenir.
+    """
+    client, cache, pass_rates = client or get_client(), cache or get_cache(), pass_rates or get_pass_rates()
+    if isinstance(queries, str): queries = [queries]
+    actor_id = "clockworks/free-tiktok-scraper"
+    parts, seen = [], set()
+    totals = {"fetched": 0, "products": 0, "requested": 0}
+    
+    def fetch_round(total_limit, needed):
+        results_per_page = per_query_limit(total_limit, len(queries))
+        # Sorgu başına alt sınır toplam maliyet tavanını aşıracaksa uygulanmaz
+        if totals["requested"] + results_per_page * len(queries) > MAX_FETCH_ITEMS:
+            results_per_page = max(1, total_limit // len(queries))
+        totals["requested"] += results_per_page * len(queries)
+        run_input = {
+            "searchQueries": list(queries),
+            "resultsPerPage": results_per_page,
+            "searchRegion": "TR",
+            "searchLanguage": "tr-TR",
+        }
+        raw = fetched = found = 0
+        pages = cache.iter_pages(client, actor_id, run_input, force_refresh=force_refresh)
+        for items in pages:
+            raw += len(items)
+            with span("dataframe_build", rows_in=len(items)) as s:
+                page = tag_search_frame(flatten_tiktok_items(items), queries)
+                if corpus is not None: corpus.add(page)
+                key = video_key(page)
+                if key:
+                    page = page[~page[key].isin(seen)]
+                    seen.update(page[key].tolist())
+                s.set(rows_out=len(page))
+            fetched += len(page)
+            page, n_products = filter_products(page, min_views, min_likes, date_limit)
+            totals["products"] += n_products
+            if not page.empty:
+                parts.append(page)
+                found += len(page)
+            if found >= needed: break
+        pages.close()
+        totals["fetched"] += fetched
+        # Aktör istenenden az döndürdüyse daha büyük istek yeni video getirmez
+        exhausted = found < needed and raw < results_per_page * len(queries)
+        return fetched, found, exhausted, results_per_page * len(queries)
+    
+    adaptive_fetch(fetch_round, requested_limit, pass_rates, rate_key(queries, date_limit, min_views, min_likes))
+    # Sayfalar farklı kategorilerle birleşince category sütunları metne döner
+    df = compact_frame(pd.concat(parts, ignore_index=True)) if parts else pd.DataFrame()
+    return df, totals["fetched"], totals["products"]
+
+def dict_field(col, key):
+    """İç içe sözlük sütunundan tek bir alanı liste olarak çıkarır (sözlük değilse '')."""
+    return [v.get(key, '') if isinstance(v, dict) else '' for v in col]
+
+TR_MONTHS = {1:"Oca", 2:"Şub", 3:"Mar", 4:"Nis", 5:"May", 6:"Haz", 7:"Tem", 8:"Ağu", 9:"Eyl", 10:"Eki", 11:"Kas", 12:"Ara"}
+
+def tr_date_series(dates):
+    """Tarih sütununu '5 Oca 2025' biçimine çevirir (boş tarihler '')."""
+    day = dates.dt.day.astype("Int64").astype(str)
+    year = dates.dt.year.astype("Int64").astype(str)
+    out = day + " " + dates.dt.month.map(TR_MONTHS) + " " + year
+    return out.where(dates.notna(), "").astype(object)
+
+def filter_products(df, min_views, min_likes, date_limit):
+    """Bölge, ürün puanı, tarih ve metrik filtrelerini uygular; (kalan df, ürün sayısı) döner."""
+    if df.empty: return df, 0
+    
+    # 1. Bölge Filtresi (TR)
+    with span("region_filter", rows_in=len(df)) as s:
+        if 'authorMeta' in df.columns:
+            df['Region_Code'] = dict_field(df['authorMeta'], 'region')
+        if 'Region_Code' in df.columns:
+            # Sadece kesin yabancıları atıyoruz, TR ve boşları tutuyoruz
+            df = df[~df['Region_Code'].isin(['US', 'GB', 'DE', 'FR', 'IT', 'ES', 'BR', 'RU'])]
+        s.set(rows_out=len(df))
+    
+    # 2. ÜRÜN PUANLAMA (Kritik Adım) - tüm sütun tek seferde puanlanır
+    with span("product_scoring", rows_in=len(df)) as s:
+        df = df.copy()
+        df['Product_Score'] = score_product_intent_series(df['text'])
+        
+        # Eşik Değer: En az 1 puan. (Yani en az 1 destekleyici kelime veya 1 kritik kelime)
+        # Kritik kelimeler 5 puan verdiği için direkt geçer.
+        df_product = df[df['Product_Score'] >= 1].copy()
+        count_after_product_filter = len(df_product) # Ürün filtresinden geçen sayısı
+        s.set(rows_out=count_after_product_filter)
+    
+    if df_product.empty: return pd.DataFrame(), 0
+
+    with span("date_metric_filter", rows_in=len(df_product)) as s:
+        # 3. Sayısal Dönüşümler
+        cols = ['playCount', 'diggCount', 'shareCount', 'collectCount', 'commentCount']
+        for col in cols:
+            df_product[col] = pd.to_numeric(df_product.get(col, 0), errors='coerce').fillna(0)
+        
+        # 4. Tarih Filtresi
+        if 'createTimeISO' in df_product.columns:
+            df_product['createTimeISO'] = pd.to_datetime(df_product['createTimeISO'], errors='coerce', utc=True).dt.tz_localize(None)
+            if date_limit:
+                cutoff_date = datetime.now() - timedelta(days=date_limit)
+                df_product = df_product[df_product['createTimeISO'] >= cutoff_date]
+                
+        # 5. Metrik Filtreleri
+        df_product = df_product[(df_product['playCount'] >= min_views) & (df_product['diggCount'] >= min_likes)]
+        s.set(rows_out=len(df_product))
+    return df_product, count_after_product_filter
+
+def finalize_results(df_product, target_limit):
+    """Viral skoru hesaplar, sıralar ve sadece gösterilecek ilk satırlar için görsel sütunları hazırlar."""
+    if df_product.empty: return pd.DataFrame()
+    with span("finalize", rows_in=len(df_product)) as s:
+        df_product = _finalize(df_product, target_limit)
+        s.set(rows_out=len(df_product))
+    return df_product
+
+def _finalize(df_product, target_limit):
+    df_product = df_product.copy()
+    
+    # Viral Skor
+    df_product['Viral_Skor'] = ((df_product['shareCount'] + df_product['collectCount']) / df_product['diggCount'].replace(0, 1)) * 100
+    df_product['Viral_Skor'] = df_product['Viral_Skor'].round(1)
+    
+    # Sıralama - görsel sütunlar sadece gösterilecek ilk satırlar için hazırlanır
+    df_product = df_product.sort_values(by="Viral_Skor", ascending=False).head(target_limit).copy()
+    
+    # Sütunlar (düzleştirilmiş sayfalarda Resim/Hesap zaten var)
+    if 'videoMeta' in df_product.columns: df_product['Resim'] = dict_field(df_product['videoMeta'], 'coverUrl')
+    if 'authorMeta' in df_product.columns: df_product['Hesap'] = dict_field(df_product['authorMeta'], 'name')
+    df_product['Urun_Tahmin'] = [str(x)[:80] + "..." if x else "" for x in df_product['text']]
+    
+    # Türkçe Tarih
+    df_product['Tarih_Gorsel'] = tr_date_series(df_product['createTimeISO'])
+    return df_product
+
+def process_data(df, min_views, min_likes, date_limit, target_limit):
+    """Ham DataFrame için tek adımlık işleme: filter_products + finalize_results."""
+    if df.empty: return df, 0, 0
+    
+    # İstatistikler için sayaçlar
+    total_fetched = len(df)
+    df_product, count_after_product_filter = filter_products(df, min_views, min_likes, date_limit)
+    return finalize_results(df_product, target_limit), total_fetched, count_after_product_filter
+
+def search_local(queries, target_limit, min_views=0, min_likes=0, date_limit=0, corpus=None, max_age_hours=LOCAL_MAX_AGE_HOURS):
+    """fetch_tiktok_data'nın yerel karşılığı: dizinden aday videolar + aynı filtreler. Apify'a gitmez."""
+    corpus = corpus or get_corpus()
+    if isinstance(queries, str): queries = [queries]
+    with span("local_search", rows_in=len(queries)) as s:
+        df = corpus.search_many(queries, max_age_hours=max_age_hours)
+        df = tag_search_frame(df, queries)
+        s.set(rows_out=len(df))
+    total_fetched = len(df)
+    df, total_products = filter_products(df, min_views, min_likes, date_limit)
+    return df, total_fetched, total_products
+
+def search_products(queries, target_limit, min_views=0, min_likes=0, date_limit=0, force_refresh=False,
+                    local_first=True, max_age_hours=LOCAL_MAX_AGE_HOURS, corpus=None, **resources):
+    """
+    Tam hat: (yerel dizin ya da fetch_tiktok_data) + finalize_results. (sonuç df, taranan, ürün sayısı) döner.
+    local_first: dizinde son max_age_hours içinde görülmüş en az target_limit uygun video varsa
+    sonuç oradan verilir (df.attrs["kaynak"] = "yerel"); yoksa ya da force_refresh ise canlı aranır.
+    """
+    corpus = corpus or get_corpus()
+    if local_first and not force_refresh:
+        df, total_fetched, total_products = search_local(queries, target_limit, min_views, min_likes, date_limit, corpus, max_age_hours)
+        if len(df) >= target_limit:
+            df = finalize_results(df, target_limit)
+            df.attrs["kaynak"] = "yerel"
+            return df, total_fetched, total_products
+    df, total_fetched, total_products = fetch_tiktok_data(queries, target_limit, min_views, min_likes, date_limit, force_refresh,
+                                                          corpus=corpus, **resources)
+    df = finalize_results(df, target_limit)
+    df.attrs["kaynak"] = "canli"
+    return df, total_fetched, total_products
@@ -0,0 +1,196 @@
+"""
+Ürün niyeti puanlama: Türkçe normalizasyon + tek geçişte çalışan anahtar kelime eşleştirici.
+
+Eşleştirici modül yüklenirken bir kez derlenir. Her başlık, anahtar kelime başına
+ayrı bir `in` taraması yerine tek bir regex geçişiyle puanlanır.
+
+stem/caption_tokens: hafif Türkçe ek budama ve başlık başına önbellekli terim kümesi
+(yerel başlık dizini ve alaka filtresi ortak kullanır).
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Türkçe karakter normalizasyonu (İ -> i, I -> ı sorunu için)
+# Ş, Ğ, Ü, Ö, Ç için str.lower() zaten doğru sonucu verir; sadece noktalı/noktasız I özel.
+# Karakter başına sözlük araması yapan str.translate'ten yaklaşık 10 kat hızlıdır.
+def normalize_turkish(text):
+    if not isinstance(text, str): return ""
+    return text.replace("İ", "i").replace("I", "ı").lower()
+
+# --- KÖK BUDAMA ---
+# (ek, kökte kalması gereken en az harf) - uzundan kısaya denenir
+SUFFIXES = sorted([
+    *[(s, 3) for s in ("lar", "ler", "ları", "leri", "ların", "lerin", "larda", "lerde", "lardan", "lerden")],
+    *[(s, 4) for s in ("cı", "ci", "cu", "cü", "çı", "çi", "çu", "çü")],
+    *[(s, 4) for s in ("sı", "si", "su", "sü", "ı", "i", "u", "ü")],
+    *[(s, 4) for s in ("da", "de", "ta", "te", "dan", "den", "tan", "ten")],
+], key=lambda s: -len(s[0]))
+MAX_STRIPS = 3
+MIN_TOKEN_LENGTH = 2
+
+TOKEN_RE = re.compile(r"\w+")
+CAPTION_TOKEN_RE = re.compile(rf"\w{{{MIN_TOKEN_LENGTH},}}")
+
+@lru_cache(maxsize=200_000)  # Kelime dağarcığı küçük; her kelime bir kez budanır
+def stem(word):
+    """Hafif Türkçe ek budama; kök çok kısalacaksa kelimeye dokunmaz."""
+    for _ in range(MAX_STRIPS):
+        for suffix, min_len in SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= min_len:
+                word = word[:-len(suffix)]
+                if word.endswith("ğ"): word = word[:-1] + "k"  # bebeği -> bebek
+                break
+        else: break
+    return word
+
+@lru_cache(maxsize=100_000)  # Aynı başlık farklı sorgu/aşamalarda tekrar parçalanmaz
+def caption_tokens(text):
+    """Metnin (başlık + #hashtag) normalize edilmiş, budanmış terim kümesi."""
+    return frozenset(map(stem, set(CAPTION_TOKEN_RE.findall(normalize_turkish(text)))))
+
+COMMERCIAL_KEYWORDS = {
+    # BU KELİMELERDEN 1 TANESİ BİLE VARSA KESİN ÜRÜNDÜR (Puan: 5)
+    "critical": [
+        "sipariş", "fiyat", "tl", "₺", "kargo", "stok", "satın al", "kapıda ödeme",
+        "şeffaf kargo", "whatsapp", "dm", "iletişim", "bioda", "profildeki link",
+        "mağaza", "dükkan", "butik", "satış", "kampanya", "indirim", "tükenmeden",
+        "sınırlı sayı", "kod", "kupon", "link", "shopier", "dolap", "gardrops",
+        "trendyol", "hepsiburada", "temu", "amazon"
+    ],
+    # BU KELİMELER DESTEKLEYİCİDİR (Puan: 1)
+    "support": [
+        "ürün", "inceleme", "öneri", "tavsiye", "denedim", "aldım", "kullandım",
+        "model", "kumaş", "beden", "renk", "kalite", "garanti", "iade", "değişim",
+        "marka", "muadil", "uygun", "performans", "detay", "kutu açılımı", "paket"
+    ]
+}
+
+KEYWORD_POINTS = {"critical": 5, "support": 1}
+
+def _trie_regex(words):
+    """Kelime listesinden ortak önekleri birleştiren (trie şeklinde) bir regex üretir."""
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w: node = node.setdefault(ch, {})
+        node[""] = True
+
+    def emit(node):
+        ends = "" in node
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches: return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy '?' sayesinde aynı konumda en uzun kelime tercih edilir
+        if ends: body = "(?:" + body + ")?" if len(branches) == 1 else body + "?"
+        return body
+
+    return emit(trie)
+
+class KeywordMatcher:
+    """
+    Birden çok anahtar kelime grubunu tek bir derlenmiş desende toplar.
+    `in` operatörüyle aynı anlamı taşır: bir kelime metinde kaç kez geçerse geçsin bir kez sayılır.
+    """
+    def __init__(self, keyword_groups, points):
+        self.groups = {}
+        for group, words in keyword_groups.items():
+            for w in words: self.groups.setdefault(w, []).append(group)
+        self.points = {w: sum(points[g] for g in gs) for w, gs in self.groups.items()}
+        words = sorted(self.groups)
+        self.words = words
+        self.weights = np.array([self.points[w] for w in words], dtype=np.int64)
+        self.pattern = re.compile(_trie_regex(words))
+        # Aynı konumda başlayan kısa kelimeler (öneki olanlar) en uzun eşleşmeden türetilir
+        self._prefixes = {w: [p for p in words if w.startswith(p)] for w in words}
+        self._prefix_cols = {w: np.array([words.index(p) for p in ps]) for w, ps in self._prefixes.items()}
+
+    def _hits(self, text):
+        """
+        (konum, en uzun kelime) çiftlerini üretir. Her eşleşmeden sonra bir karakter ileriden
+        devam edilir; böylece iç içe geçen kelimeler (örn. 'kargo' / 'şeffaf kargo') kaçmaz.
+        """
+        search = self.pattern.search
+        m = search(text)
+        while m:
+            yield m.start(), m.group()
+            m = search(text, m.start() + 1)
+
+    def matched_keywords(self, text):
+        """Normalize edilmiş metinde geçen anahtar kelimelerin kümesini döndürür."""
+        # _hits ile aynı döngü; puanlama sıcak yolda olduğu için üreteç kullanılmıyor
+        found = set()
+        search, prefixes = self.pattern.search, self._prefixes
+        m = search(text)
+        while m:
+            found.update(prefixes[m.group()])
+            m = search(text, m.start() + 1)
+        return found
+
+    def score(self, text):
+        return sum(self.points[w] for w in self.matched_keywords(text))
+
+    def explain(self, text):
+        """
+        Puanın nasıl oluştuğunu döndürür: (puan, [(kelime, grup, başlangıç, bitiş), ...]).
+        Konumlar normalize edilmiş metne göredir, her kelimenin tüm geçişleri listelenir.
+        """
+        matches, found = [], set()
+        for start, longest in self._hits(text):
+            for w in self._prefixes[longest]:
+                found.add(w)
+                for g in self.groups[w]: matches.append((w, g, start, start + len(w)))
+        return sum(self.points[w] for w in found), matches
+
+    def hit_matrix(self, texts):
+        """
+        Toplu mod: normalize edilmiş metin listesi için (satır x kelime) bool eşleşme matrisi.
+        Metinler '\\n' ile tek dizgede birleştirilip derlenmiş desenle tek geçişte taranır;
+        eşleşme konumları searchsorted ile satırlara eşlenir.
+        """
+        hits = np.zeros((len(texts), len(self.words)), dtype=bool)
+        if not texts: return hits
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+        blob = "\n".join(texts)  # Hiçbir anahtar kelime '\n' içermez, eşleşme satır sınırını aşamaz
+        positions, cols = [], []
+        search, prefix_cols = self.pattern.search, self._prefix_cols
+        m = search(blob)
+        while m:
+            positions.append(m.start())
+            cols.append(prefix_cols[m.group()])
+            m = search(blob, m.start() + 1)
+        if positions:
+            rows = np.searchsorted(starts, positions, side="right") - 1
+            counts = [len(c) for c in cols]
+            hits[np.repeat(rows, counts), np.concatenate(cols)] = True
+        return hits
+
+    def score_many(self, texts):
+        """Normalize edilmiş metin listesinin puanlarını numpy dizisi olarak döndürür."""
+        return self.hit_matrix(texts) @ self.weights
+
+INTENT_MATCHER = KeywordMatcher(COMMERCIAL_KEYWORDS, KEYWORD_POINTS)
+
+def score_product_intent(text):
+    """
+    Metni tarar ve ürün olma ihtimalini puanlar.
+    Kritik kelime başına 5, destekleyici kelime başına 1 puan.
+    """
+    if not isinstance(text, str): return 0
+    return INTENT_MATCHER.score(normalize_turkish(text))
+
+def explain_product_intent(text):
+    """score_product_intent ile aynı puan + hangi kelimelerin nerede eşleştiği."""
+    if not isinstance(text, str): return 0, []
+    return INTENT_MATCHER.explain(normalize_turkish(text))
+
+def score_product_intent_series(texts):
+    """
+    score_product_intent'in sütun bazlı karşılığı: tüm Series'i tek seferde puanlar.
+    Sonuçlar satır satır fonksiyonla birebir aynıdır; index korunur.
+    """
+    norm = [normalize_turkish(t) for t in texts.tolist()]
+    return pd.Series(INTENT_MATCHER.score_many(norm), index=texts.index, dtype="int64")
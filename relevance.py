@@ -0,0 +1,142 @@
+"""
+İçerik alaka filtresi: Türkçe tespiti + aranan ürünle alaka kontrolü.
+
+Satır satır `iterrows()` yerine tüm sütun üzerinde boolean maskeler kurar;
+sonuç orijinal DataFrame'in `.loc` dilimidir (index ve dtype'lar korunur).
+
+Sorgu kelimeleri düz alt dizgi (`w in text`) yerine budanmış terimlerle eşleşir:
+her başlık bir kez terim kümesine çevrilir (product_intent.caption_tokens, önbellekli),
+terimler her toplu işte o işin başlıklarından kurulan bir sözlükte numaralanır (süreç
+boyunca büyüyen bir sözlük tutulmaz); her sorgu kökü sadece o işte geçen farklı terimlerle
+karşılaştırılır, satır başına eşleşme sayısı np.bincount ile bulunur.
+Bir kök bir terimle şu durumlarda eşleşir:
+- birebir aynı ("bilekliği" -> "bileklik" == "bileklik"); ı/i, ş/s gibi harfler eş sayılır
+- kök en az 4 harfliyse terimin içinde geçiyor (#telefonkılıfı)
+- kök en az 4 harfliyse karakter üçlüsü benzerliği FUZZY_MIN_SIMILARITY üstünde (yazım hatası)
+3 harfli kökler sadece birebir ya da bilinen bir ekle eşleşir ("set" -> "seti" evet, "asetat" hayır;
+budayıcı kısa köklere dokunmadığı için ek burada kontrol edilir).
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from product_intent import SUFFIXES, TOKEN_RE, caption_tokens, normalize_turkish, stem
+
+TR_CHARS = ['ı', 'ğ', 'ş', 'ö', 'ç', 'ü', 'İ', 'Ğ', 'Ş', 'Ö', 'Ç', 'Ü']
+# Ticari kelimeler (Bu kelimeler varsa ürün olma ihtimali yüksek)
+COMMERCE_KEYWORDS = ["fiyat", "kargo", "sipariş", "ne kadar", "link", "profil", "bilgi", "dm", "satış", "bedava", "indirim", "tl", "kapıda", "ödeme", "model", "tasarım", "ürün", "adet", "stok", "kampanya"]
+
+TR_CHAR_RE = re.compile("[" + "".join(TR_CHARS) + "]")
+# Kısa ticari kelimeler (tl, dm) sadece harf sınırında sayılır: "100tl" evet, "atlet" hayır.
+# Geriye bakış eşleşmeden sonra yazılır ki desen harfle başlasın ve hızlı ön tarama bozulmasın.
+COMMERCE_RE = re.compile("|".join(
+    re.escape(k) if len(k) > 3 else rf"{re.escape(k)}(?<![^\W\d_]{'.' * len(k)})(?![^\W\d_])"
+    for k in COMMERCE_KEYWORDS))
+
+# Başlıklarda Türkçe harfler sık sık yazılmaz (#telefonkilifi); karşılaştırma bu harfler katlanarak yapılır
+ASCII_FOLD = list(zip("ışğçöü", "isgcou"))
+NGRAM = 3
+FUZZY_MIN_SIMILARITY = 0.7
+SUBSTRING_MIN_LENGTH = 4
+SHORT_ROOT_ENDINGS = {suffix for suffix, _ in SUFFIXES}
+
+def _lower_column(df, col):
+    # Eski davranışla birebir: str(değer).lower(), sütun yoksa ''
+    if col not in df.columns: return pd.Series("", index=df.index, dtype=object)
+    return pd.Series([str(v).lower() for v in df[col].tolist()], index=df.index, dtype=object)
+
+def query_terms(query):
+    """Sorgu kelimelerini parçalar, çok kısa kelimeleri (ve, ile, bir vs.) çıkarır ve köklerini döndürür."""
+    return {stem(w) for w in TOKEN_RE.findall(normalize_turkish(query)) if len(w) > 2}
+
+def fold_ascii(text):
+    for tr, ascii_char in ASCII_FOLD: text = text.replace(tr, ascii_char)
+    return text
+
+@lru_cache(maxsize=200_000)
+def char_ngrams(word):
+    padded = f" {word} "
+    return frozenset(padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1))
+
+def ngram_similarity(a, b):
+    """Karakter üçlüleri üzerinde Dice benzerliği (0-1)."""
+    ga, gb = char_ngrams(a), char_ngrams(b)
+    return 2 * len(ga & gb) / (len(ga) + len(gb))
+
+@lru_cache(maxsize=500_000)
+def root_matches(root, term):
+    """Sorgu kökü başlık terimiyle eşleşiyor mu (bkz. modül açıklaması)."""
+    root, term = fold_ascii(root), fold_ascii(term)
+    if root == term: return True
+    if len(root) < SUBSTRING_MIN_LENGTH: return term.startswith(root) and term[len(root):] in SHORT_ROOT_ENDINGS
+    if root in term: return True
+    return abs(len(term) - len(root)) <= 2 and ngram_similarity(root, term) >= FUZZY_MIN_SIMILARITY
+
+def term_postings(texts):
+    """Başlık listesi -> (satır no dizisi, terim no dizisi, terimler); numaralar sadece bu çağrı içindir."""
+    token_sets = [caption_tokens(t if isinstance(t, str) else "") for t in texts]
+    lengths = np.fromiter(map(len, token_sets), dtype=np.int64, count=len(token_sets))
+    ids, vocab = pd.factorize(pd.Series([t for tokens in token_sets for t in tokens], dtype=object))
+    return np.repeat(np.arange(len(token_sets)), lengths), ids, vocab
+
+def query_match_counts(texts, roots):
+    """Her başlıkta sorgu köklerinden kaçının eşleştiği (numpy int dizisi)."""
+    counts = np.zeros(len(texts), dtype=np.int64)
+    if not roots or not len(texts): return counts
+    rows, ids, vocab = term_postings(texts)
+    # Kökler sadece bu toplu işte geçen farklı terimlerle karşılaştırılır
+    for root in roots:
+        hit = np.fromiter((root_matches(root, t) for t in vocab), dtype=bool, count=len(vocab))
+        counts += np.bincount(rows[hit[ids]], minlength=len(texts)) > 0
+    return counts
+
+def content_relevance_mask(df, query):
+    """Her satır için filtreden geçip geçmediğini gösteren boolean Series."""
+    # B. Alaka Düzeyi (Relevance) Kontrolü - aranan köklerin başlık terimleriyle eşleşme sayısı
+    query_words = query_terms(query)
+    texts = df['text'].tolist() if 'text' in df.columns else [""] * len(df)
+    match_count = query_match_counts(texts, query_words)
+    keep = np.zeros(len(df), dtype=bool)
+    # Dil ve ticari kelime regex'leri sadece en az bir kelimesi eşleşen satırlarda çalışır
+    candidates = np.flatnonzero(match_count > 0)
+    if not len(candidates): return pd.Series(keep, index=df.index)
+    sub = df.iloc[candidates]
+    match_count = match_count[candidates]
+    text = _lower_column(sub, 'text')
+    lang = _lower_column(sub, 'textLanguage')
+
+    # A. Dil Kontrolü
+    has_commerce = text.str.contains(COMMERCE_RE).to_numpy()
+    is_turkish = (lang == 'tr').to_numpy() | text.str.contains(TR_CHAR_RE).to_numpy() | has_commerce
+
+    if len(query_words) == 1:
+        # Tek kelimelik sorguda o kelime mutlaka geçmeli
+        is_relevant = match_count == 1
+    else:
+        # Çok kelimeli sorguda: kelimelerin en az yarısı geçmeli
+        # VEYA aranan kelimelerden biri + ticari bir kelime geçmeli (Örn: "Bileklik modelleri fiyat")
+        is_relevant = (match_count / len(query_words) >= 0.5) | has_commerce
+
+    keep[candidates] = is_turkish & is_relevant
+    return pd.Series(keep, index=df.index)
+
+def filter_content_relevance(df, query):
+    """
+    Sadece Türkçe olmak yetmez, aranan ürünle alakalı mı diye bakar.
+    Örn: 'Bileklik' aranıyorsa, içinde bileklik geçmeyen dua videosunu eler.
+    """
+    if df.empty or not query: return df
+    return df.loc[content_relevance_mask(df, query).to_numpy()]
+
+def filter_content_relevance_by_query(df, query_column):
+    """
+    Toplu aramalarda her satırı kendi sorgusuna göre filtreler
+    (örn. tiktok_search.tag_search_results'un yazdığı Arama_Sorgusu sütunu).
+    """
+    if df.empty or query_column not in df.columns: return df
+    keep = np.zeros(len(df), dtype=bool)
+    for query, positions in df.groupby(query_column, sort=False).indices.items():
+        if query: keep[positions] = content_relevance_mask(df.iloc[positions], query).to_numpy()
+    return df.loc[keep]
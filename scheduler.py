@@ -0,0 +1,133 @@
+"""
+Arka plan zamanlayıcısı: Sonraki_Analiz_Tarihi gelmiş takip ürünlerini Streamlit
+olmadan yeniden analiz eder.
+
+    python scheduler.py                 # bir tur çalıştır ve çık
+    python scheduler.py --loop 3600     # saatte bir tur
+    python scheduler.py --fake          # ağsız, yerel sahte Apify ile
+
+Her tur: vadesi gelen ürünler bulunur, en fazla --workers tanesi aynı anda ve
+rastgele gecikmeyle (--jitter) başlatılır. Günlük compute unit bütçesi (--daily-cu)
+dolunca yeni iş başlatılmaz. Her ürünün sonucu (durum, video, değişiklik, CU,
+süre, hata) loga ve yerel depodaki scheduler_runs tablosuna yazılır.
+--metrics-port verilirse aşama ölçümleri açılır ve Prometheus /metrics uç noktası sunulur.
+"""
+import argparse
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+
+from apify_cache import DEFAULT_CACHE_PATH, ApifyResultCache
+from apify_fanout import run_concurrently
+from fake_apify import FAKE_CACHE_PATH, FAKE_STORE_PATH
+from instrumentation import enable as enable_tracing, serve_metrics
+from metrics import load_decision_config
+from pipeline import load_secrets, make_client as make_apify_client
+from store import DEFAULT_STORE_PATH, LocalStore
+from text_index import TextIndex
+from tracking import due_products, refresh_product
+from video_index import VideoIndex
+
+DEFAULT_WORKERS = 2
+DEFAULT_JITTER = 30.0      # saniye
+DEFAULT_DAILY_CU = 2.0
+ESTIMATED_CU_PER_RUN = 0.05  # Çalışma kaydında CU yoksa (veya başlamadan önce bütçe kontrolünde) varsayılan
+
+log = logging.getLogger("scheduler")
+
+def make_client(fake=False):
+    if fake:
+        from fake_apify import FakeApifyClient
+        return FakeApifyClient()
+    try: return make_apify_client()
+    except RuntimeError as e: raise SystemExit(str(e))
+
+class CuBudget:
+    """Günlük CU bütçesi: başlamadan önce tahmini maliyet ayrılır, bitince gerçek maliyetle düzeltilir."""
+    def __init__(self, store, daily_limit, day):
+        self.daily_limit = daily_limit
+        self.spent = store.cu_spent(day)
+        self.reserved = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, estimate=ESTIMATED_CU_PER_RUN):
+        with self._lock:
+            if self.spent + self.reserved + estimate > self.daily_limit: return False
+            self.reserved += estimate
+            return True
+
+    def settle(self, estimate, actual):
+        with self._lock:
+            self.reserved -= estimate
+            self.spent += actual
+
+def run_due(store, client, cache, config=None, workers=DEFAULT_WORKERS, jitter=DEFAULT_JITTER, daily_cu=DEFAULT_DAILY_CU,
+            limit=15, today=None, sleep=time.sleep, index=None, corpus=None, force_refresh=True):
+    """
+    Vadesi gelen ürünleri yeniden analiz eder; ürün başına sonuç sözlüklerinin listesini döndürür.
+    force_refresh: Apify önbelleği atlanır; aksi halde yakın zamanda yapılmış bir analizin
+    önbellekteki sonucu yeni anlık görüntü gibi kaydedilip kontrol tarihi boşuna ileri alınır.
+    """
+    due = due_products(store, today)
+    if due.empty:
+        log.info("Vadesi gelen ürün yok.")
+        return []
+    day = str(today or datetime.now().date())
+    budget = CuBudget(store, daily_cu, day)
+    log.info("%d ürün vadesi gelmiş; bütçe %.3f/%.3f CU", len(due), budget.spent, daily_cu)
+
+    def job(product):
+        if jitter: sleep(random.uniform(0, jitter))
+        if not budget.reserve():
+            log.warning("Günlük CU bütçesi doldu, atlandı: %s (%s)", product['Urun_Adi'], product['ID'])
+            return {"durum": "butce", "video": 0}
+        runs = []
+        started, t0 = datetime.now().isoformat(timespec="seconds"), time.perf_counter()
+        result, error = {"durum": "hata"}, None
+        try:
+            result = refresh_product(store, client, cache, product, config, limit, force_refresh, on_run=runs.append, index=index, corpus=corpus)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        cu = sum((r.get("stats") or {}).get("computeUnits", ESTIMATED_CU_PER_RUN) for r in runs)
+        budget.settle(ESTIMATED_CU_PER_RUN, cu)
+        seconds = time.perf_counter() - t0
+        store.log_run(started, product['ID'], result, cu, seconds, error)
+        log.info("%s (%s): %s video=%s yeni=%s degisen=%s cu=%.4f sure=%.1fs%s", product['Urun_Adi'], product['ID'],
+                 result.get("durum"), result.get("video"), result.get("yeni"), result.get("degisen"), cu, seconds,
+                 f" hata={error}" if error else "")
+        return {**result, "cu": cu}
+
+    products = [row for _, row in due.iterrows()]
+    return [result for _, result in run_concurrently(job, products, max_workers=workers)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vadesi gelen takip ürünlerini yeniden analiz eder.")
+    parser.add_argument("--loop", type=float, default=0, help="Turlar arası saniye (0: tek tur)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--jitter", type=float, default=DEFAULT_JITTER, help="İş başına en fazla rastgele gecikme (sn)")
+    parser.add_argument("--daily-cu", type=float, default=DEFAULT_DAILY_CU, help="Günlük compute unit bütçesi")
+    parser.add_argument("--limit", type=int, default=15, help="Ürün başına video sayısı")
+    parser.add_argument("--fake", action="store_true", help="Ağsız: yerel sahte Apify istemcisi")
+    parser.add_argument("--store", default=None, help="Yerel depo yolu (varsayılan VIRAL_STORE_PATH; --fake ile geçici sahte depo)")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Prometheus /metrics portu (0: kapalı)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.metrics_port:
+        enable_tracing()
+        serve_metrics(args.metrics_port)
+        log.info("Metrikler: http://localhost:%d/metrics", args.metrics_port)
+
+    store = LocalStore(args.store or (FAKE_STORE_PATH if args.fake else DEFAULT_STORE_PATH))
+    cache = ApifyResultCache(FAKE_CACHE_PATH if args.fake else DEFAULT_CACHE_PATH)
+    client = make_client(args.fake)
+    config = load_decision_config(load_secrets().get("decision_config"))
+    index, corpus = VideoIndex(store), TextIndex(store.path)
+    while True:
+        run_due(store, client, cache, config, args.workers, args.jitter, args.daily_cu, args.limit, index=index, corpus=corpus)
+        if not args.loop: break
+        time.sleep(args.loop)
+
+if __name__ == "__main__":
+    main()
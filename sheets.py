@@ -0,0 +1,274 @@
+"""
+Süreç boyunca açık kalan Google Sheets oturumu.
+
+Eskiden her kaydetme/okuma çağrısı yeniden yetkilendirip tabloyu açıyor ve dört
+ana sekmeyi tek tek yokluyordu (işe başlamadan 5+ HTTP isteği). SheetSession
+yetkilendirmeyi ve tabloyu bir kez açar, sekme nesnelerini önbellekte tutar ve
+şemayı sadece başlangıçta (tek toplu okuma ile) doğrular. Böylece örneğin bir
+yer imi kaydı tek `append_row` isteğine iner. Süresi dolan kimlik bilgisi 401
+hatasında yeniden yetkilendirilir ve istek bir kez tekrarlanır.
+
+Tüm satır yazımları append_rows üzerinden parçalar halinde gider (120 satır tek
+istek). Kota (429) ve geçici sunucu hatalarında üstel geri çekilmeyle tekrar
+denenir; yazılamayan satırlar sekme başına bekleme kuyruğunda kalır ve bir
+sonraki yazımda önce onlar gönderilir. Kuyruk `pending` olarak verilen yerel depoda
+(LocalStore.sheet_pending) tutulur, böylece yeniden başlatmada kaybolmaz; verilmezse
+bellek içidir. Oturum kilidi sadece kuyruk işlemlerinde tutulur, istekler ve geri
+çekilme beklemeleri kilitsiz yapılır (bir sekmenin 429 beklemesi diğerlerini durdurmaz).
+"""
+import itertools
+import queue
+import random
+import threading
+import time
+
+import gspread
+from gspread.utils import rowcol_to_a1
+
+# Ana sekmeler ve başlık satırları (eksik sekme bu başlıkla oluşturulur)
+SHEET_HEADERS = {
+    "List": ["ID", "Urun_Adi", "Rakipler_Sekme_Adi", "Performans_Sekme_Adi", "Son_Analiz_Tarihi", "Sonraki_Analiz_Tarihi", "Son_Viral_Skor", "Durum", "URL", "Arama_Sorgusu"],
+    "Bookmarks": ["Tarih", "Aciklama", "Izlenme", "Viral_Skor", "Etkilesim", "Video_URL", "Resim_URL"],
+    "Suppliers": ["ID", "Tarih", "Urun_Adi", "Tedarikci_Baslik", "Web_Sitesi", "Aciklama", "Kanal_Tipi"],
+    "Meta_Results": ["ID", "Tarih", "Urun_Adi", "Baslik", "Link", "Aciklama", "Kaynak"],
+}
+
+# Tek append_rows isteğindeki en fazla satır
+APPEND_CHUNK_ROWS = 500
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0  # saniye; 1, 2, 4, 8, 16 (+ rastgele pay)
+RETRY_STATUSES = {429, 500, 502, 503}
+
+def _status(e):
+    if not isinstance(e, gspread.exceptions.APIError): return None
+    return getattr(getattr(e, "response", None), "status_code", None)
+
+def _is_auth_error(e):
+    return _status(e) == 401
+
+class MemoryPending:
+    """LocalStore'un sheet_pending yöntemleriyle aynı arayüzde bellek içi kuyruk (süreç kapanınca kaybolur)."""
+    def __init__(self):
+        self._rows = {}
+        self._ids = itertools.count(1)
+
+    def enqueue_sheet_rows(self, tab, rows):
+        self._rows.setdefault(tab, []).extend((next(self._ids), list(r)) for r in rows)
+
+    def sheet_rows(self, tab, limit):
+        return self._rows.get(tab, [])[:limit]
+
+    def drop_sheet_rows(self, ids):
+        ids = set(ids)
+        for tab, rows in self._rows.items(): self._rows[tab] = [r for r in rows if r[0] not in ids]
+
+    def clear_sheet_rows(self, tab):
+        self._rows.pop(tab, None)
+
+    def sheet_backlog(self, tab=None):
+        return {t: len(rows) for t, rows in self._rows.items() if rows and (tab is None or t == tab)}
+
+class SheetSession:
+    """
+    Tek tablo için yetkilendirilmiş, sekme nesnelerini önbellekleyen oturum.
+    worksheet()/add_worksheet() gspread.Spreadsheet ile aynı imzaya sahiptir.
+    pending: bekleme kuyruğu (LocalStore; None ise MemoryPending).
+    """
+    def __init__(self, credentials_factory, sheet_name, headers=SHEET_HEADERS, pending=None):
+        self.credentials_factory = credentials_factory
+        self.sheet_name = sheet_name
+        self.headers = headers
+        self._lock = threading.RLock()
+        self._worksheets = {}
+        self._pending = pending if pending is not None else MemoryPending()
+        self._senders = {}  # Sekme başına "gönderen var" kilidi
+        self.last_error = None
+        self.sleep = time.sleep
+        self._connect()
+
+    def _connect(self):
+        with self._lock:
+            self._creds = self.credentials_factory()
+            self.spreadsheet = gspread.authorize(self._creds).open(self.sheet_name)
+            # Tüm sekme meta verisi tek istekte
+            self._worksheets = {ws.title: ws for ws in self.spreadsheet.worksheets()}
+
+    def _retry_on_auth(self, fn):
+        # fn her denemede yeniden çağrılır; yeniden bağlanınca yeni istemcinin nesnelerini kullanır
+        if getattr(self._creds, "access_token_expired", False): self._connect()
+        try: return fn()
+        except Exception as e:
+            if not _is_auth_error(e): raise
+            self._connect()
+            return fn()
+
+    def worksheet(self, title):
+        with self._lock:
+            if title not in self._worksheets:
+                # Başka bir süreçte oluşturulmuş olabilir: meta veriyi bir kez tazele
+                self._worksheets = {ws.title: ws for ws in self._retry_on_auth(lambda: self.spreadsheet.worksheets())}
+            if title not in self._worksheets: raise gspread.exceptions.WorksheetNotFound(title)
+            return self._worksheets[title]
+
+    def add_worksheet(self, title, rows, cols):
+        ws = self._retry_on_auth(lambda: self.spreadsheet.add_worksheet(title=title, rows=rows, cols=cols))
+        with self._lock: self._worksheets[title] = ws
+        return ws
+
+    def _with_backoff(self, fn):
+        for attempt in range(MAX_RETRIES + 1):
+            try: return self._retry_on_auth(fn)
+            except Exception as e:
+                if _status(e) not in RETRY_STATUSES or attempt == MAX_RETRIES: raise
+                self.sleep(BACKOFF_BASE * 2 ** attempt + random.uniform(0, BACKOFF_BASE))
+
+    def pending(self, title=None):
+        """Yazılamayıp kuyrukta bekleyen satır sayısı (sekme verilmezse toplam)."""
+        with self._lock:
+            counts = self._pending.sheet_backlog(title)
+            return counts.get(title, 0) if title is not None else sum(counts.values())
+
+    def append_rows(self, title, rows, chunk_size=APPEND_CHUNK_ROWS):
+        """
+        Satırları kuyruğa ekler ve kuyruğu (önce eski satırlar) parça parça append_rows ile yazar.
+        Aynı sekmeyi başka bir thread o anda gönderiyorsa satırlar kuyrukta bırakılır, o gönderir.
+        (yazılan, kuyrukta kalan) döner; kalan > 0 ise satırlar kaybolmaz, sonraki yazımda gider.
+        """
+        with self._lock:
+            if rows: self._pending.enqueue_sheet_rows(title, [list(r) for r in rows])
+            sending = self._senders.setdefault(title, threading.Lock())
+            if not sending.acquire(blocking=False): return 0, self.pending(title)
+        written, self.last_error = 0, None
+        try:
+            while True:
+                with self._lock:
+                    chunk = self._pending.sheet_rows(title, chunk_size)
+                    # Kuyruk boşken bırakmak kilit altında: yeni eklenen satır sahipsiz kalmaz
+                    if not chunk:
+                        sending.release()
+                        return written, 0
+                self._with_backoff(lambda: self.worksheet(title).append_rows([r for _, r in chunk]))
+                with self._lock: self._pending.drop_sheet_rows([i for i, _ in chunk])
+                written += len(chunk)
+        except Exception as e:
+            self.last_error = e
+            with self._lock:
+                sending.release()
+                return written, self.pending(title)
+
+    def flush(self):
+        """Önceki çalışmalardan kuyrukta kalan tüm sekmeleri göndermeyi dener; kalan satır sayısını döndürür."""
+        with self._lock: tabs = list(self._pending.sheet_backlog())
+        return sum(self.append_rows(tab, [])[1] for tab in tabs)
+
+    def append_row(self, title, row):
+        """Tek satır; append_rows ile aynı tekrar deneme/kuyruk yolundan geçer."""
+        return self.append_rows(title, [row])
+
+    def ensure_schema(self):
+        """
+        Eksik ana sekmeleri başlıklarıyla oluşturur, mevcutların başlık satırını tek toplu
+        okumayla kontrol eder. Uyumsuzlukların açıklama listesini döndürür (boşsa şema tamam).
+        """
+        problems, existing = [], [t for t in self.headers if t in self._worksheets]
+        for title in self.headers:
+            if title in self._worksheets: continue
+            ws = self.add_worksheet(title, rows="100", cols="10")
+            ws.append_row(self.headers[title])
+        if existing:
+            ranges = [f"'{t}'!1:1" for t in existing]
+            result = self._retry_on_auth(lambda: self.spreadsheet.values_batch_get(ranges))
+            for title, value_range in zip(existing, result.get("valueRanges", [])):
+                values = value_range.get("values") or [[]]
+                if values[0] != self.headers[title]:
+                    problems.append(f"{title}: beklenen {self.headers[title]}, bulunan {values[0]}")
+        return problems
+
+    def sync_rows(self, title, records):
+        """
+        Anahtarı ilk başlık sütunu (ID) olan sekmeyi kayıtlarla eşitler: sekme bir kez okunur,
+        sadece değeri farklı hücreler tek batch_update ile yazılır, sekmede olmayan kayıtlar
+        sona eklenir. records: {başlık: değer} sözlükleri (verilmeyen sütunlara dokunulmaz).
+        (güncellenen hücre, eklenen satır) döner.
+        """
+        headers = self.headers[title]
+        key = headers[0]
+        values = self._with_backoff(lambda: self.worksheet(title).get_all_values())
+        rows = {r[0]: (n, r) for n, r in enumerate(values[1:], start=2) if r}
+        cells, new_rows = [], []
+        for rec in records:
+            found = rows.get(str(rec[key]))
+            if found is None:
+                new_rows.append([rec.get(h, "") for h in headers])
+                continue
+            n, current = found
+            for col, h in enumerate(headers, start=1):
+                if h not in rec: continue
+                value = "" if rec[h] is None else str(rec[h])
+                if (current[col - 1] if col <= len(current) else "") != value:
+                    cells.append({"range": rowcol_to_a1(n, col), "values": [[value]]})
+        if cells: self._with_backoff(lambda: self.worksheet(title).batch_update(cells))
+        if new_rows: self.append_rows(title, new_rows)
+        return len(cells), len(new_rows)
+
+    def reset_worksheet(self, title):
+        """
+        Sekmeyi temizleyip sadece başlık satırını bırakır (bekleyen satırlar da atılır).
+        Önce sekmenin gönderen kilidi beklenir: temizlemeden önce kuyruktan alınmış bir parça
+        temizlenen sekmeye sonradan yazılamaz. Sıfırlama sırasında kuyruğa eklenenler başlıktan
+        sonra gönderilir.
+        """
+        with self._lock: sending = self._senders.setdefault(title, threading.Lock())
+        with sending:
+            with self._lock: self._pending.clear_sheet_rows(title)
+            self._retry_on_auth(lambda: self.worksheet(title).clear())
+            self._with_backoff(lambda: self.worksheet(title).append_rows([self.headers[title]]))
+        self.append_rows(title, [])
+
+class SheetExporter:
+    """
+    Yerel depoya yazılan satırları arka planda Sheets'e aktaran kuyruk.
+    Oturum, ilk iş geldiğinde (arka plan thread'inde) açılır; yazılamayan satırlar
+    SheetSession'ın bekleme kuyruğunda kalır ve sonraki aktarımda tekrar denenir.
+    Bir iş hata verirse (oturum açılamadı, sekme temizlenemedi, ...) o iş ve sonrakiler
+    sırası bozulmadan bekletilir ve bir sonraki işte önce onlar denenir.
+    """
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self.session = None
+        self.last_error = None
+        self._unsent = []  # Oturum açılamadığı için gönderilemeyen işler
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name="sheet-exporter", daemon=True).start()
+
+    def export_rows(self, title, rows):
+        if rows: self._queue.put(("rows", title, [list(r) for r in rows]))
+
+    def reset(self, title):
+        self._queue.put(("reset", title, None))
+
+    def sync(self, title, records):
+        """Güncellenen kayıtları (örn. ürünlerin tarih/skor/durum alanları) sekmede yerinde günceller."""
+        if records: self._queue.put(("sync", title, [dict(r) for r in records]))
+
+    def _run(self):
+        while True:
+            self._unsent.append(self._queue.get())
+            try:
+                if self.session is None: self.session = self.session_factory()
+                while self._unsent:
+                    kind, title, rows = self._unsent[0]
+                    if kind == "reset": self.session.reset_worksheet(title)
+                    elif kind == "sync": self.session.sync_rows(title, rows)
+                    else: self.session.append_rows(title, rows)
+                    self._unsent.pop(0)
+                self.last_error = self.session.last_error
+            except Exception as e:
+                self.last_error = e
+            finally:
+                self._queue.task_done()
+
+    def backlog(self):
+        """Kuyrukta bekleyen iş + oturumda yazılamamış satır sayısı."""
+        pending = self.session.pending() if self.session is not None else 0
+        return self._queue.qsize() + len(self._unsent) + pending
@@ -0,0 +1,404 @@
+"""
+Yerel kayıt deposu (SQLite): takip edilen ürünler, rakip videolar, performans
+geçmişi, yer imleri, tedarikçiler ve Meta sonuçları.
+
+Eskiden her takip edilen ürün için Google Sheets'te iki sekme (R_/P_) açılıyor ve
+sayfalar get_all_records() ile her şeyi metin olarak geri okuyordu. Burada sütunlar
+tiplidir (INTEGER/REAL/TEXT), ürün id + tarih üzerinde indeks vardır ve okumalar
+doğru tipte DataFrame döndürür. Sütun adları eski sekme başlıklarıyla aynıdır;
+Google Sheets artık sadece isteğe bağlı dışa aktarım hedefidir (bkz. SheetExporter).
+
+Rakip güncellemesi artımlıdır: videolar id ile anahtarlanır, sadece yeni veya
+değişen satırlar yazılır ve sayaçları değişen her video için bir anlık görüntü
+(competitor_snapshots) eklenir. Böylece güncelleme maliyeti değişen satır sayısıyla
+ölçeklenir ve izlenme/beğeni/paylaşım geçmişi büyüme analizi için saklanır.
+
+videos tablosu ürünlerden bağımsız küresel video kaydıdır (ilk/son görülme, görülme
+sayısı, son sayaçlar); hızlı "daha önce görüldü mü" kontrolü için bkz. video_index.py.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+
+import pandas as pd
+
+DEFAULT_STORE_PATH = os.environ.get("VIRAL_STORE_PATH", "viral_takip.sqlite")
+
+log = logging.getLogger(__name__)
+
+# Rakip videolar için saklanan sütunlar ve tipleri
+COMPETITOR_COLUMNS = {
+    "text": "TEXT", "webVideoUrl": "TEXT", "Hesap": "TEXT", "createTimeISO": "TEXT",
+    "playCount": "INTEGER", "diggCount": "INTEGER", "shareCount": "INTEGER",
+    "collectCount": "INTEGER", "commentCount": "INTEGER",
+    "Viral_Skor": "REAL", "Etkilesim_Orani": "REAL", "Karar_Puani": "INTEGER", "Durum": "TEXT",
+}
+# Zaman serisi olarak saklanan sayaçlar
+SNAPSHOT_COLUMNS = ["playCount", "diggCount", "shareCount", "collectCount", "commentCount"]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS products (
+    ID TEXT PRIMARY KEY,
+    Urun_Adi TEXT NOT NULL,
+    Son_Analiz_Tarihi TEXT,
+    Sonraki_Analiz_Tarihi TEXT,
+    Son_Viral_Skor REAL,
+    Durum TEXT,
+    URL TEXT,
+    Arama_Sorgusu TEXT
+);
+CREATE INDEX IF NOT EXISTS products_next ON products (Sonraki_Analiz_Tarihi);
+CREATE TABLE IF NOT EXISTS competitors (
+    product_id TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    {", ".join(f"{c} {t}" for c, t in COMPETITOR_COLUMNS.items())},
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (product_id, video_id)
+);
+CREATE INDEX IF NOT EXISTS competitors_video ON competitors (video_id);
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    {", ".join(f"{c} {t}" for c, t in COMPETITOR_COLUMNS.items())},
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    seen_count INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS competitor_snapshots (
+    product_id TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    observed_at TEXT NOT NULL,
+    {", ".join(f"{c} INTEGER" for c in SNAPSHOT_COLUMNS)},
+    PRIMARY KEY (product_id, video_id, observed_at)
+);
+CREATE TABLE IF NOT EXISTS performance (
+    product_id TEXT NOT NULL,
+    Tarih TEXT NOT NULL,
+    Ort_Viral_Skor REAL,
+    Toplam_Izlenme INTEGER,
+    Winner_Sayisi INTEGER,
+    Analiz_Notu TEXT
+);
+CREATE INDEX IF NOT EXISTS performance_product_date ON performance (product_id, Tarih);
+CREATE TABLE IF NOT EXISTS bookmarks (
+    Tarih TEXT, Aciklama TEXT, Izlenme INTEGER, Viral_Skor REAL, Etkilesim REAL, Video_URL TEXT, Resim_URL TEXT
+);
+CREATE TABLE IF NOT EXISTS suppliers (
+    ID TEXT, Tarih TEXT, Urun_Adi TEXT, Tedarikci_Baslik TEXT, Web_Sitesi TEXT, Aciklama TEXT, Kanal_Tipi TEXT
+);
+CREATE INDEX IF NOT EXISTS suppliers_product ON suppliers (Urun_Adi, Tarih);
+CREATE TABLE IF NOT EXISTS meta_results (
+    ID TEXT, Tarih TEXT, Urun_Adi TEXT, Baslik TEXT, Link TEXT, Aciklama TEXT, Kaynak TEXT
+);
+CREATE INDEX IF NOT EXISTS meta_results_product ON meta_results (Urun_Adi, Tarih);
+CREATE TABLE IF NOT EXISTS scheduler_runs (
+    started_at TEXT NOT NULL,
+    product_id TEXT NOT NULL,
+    durum TEXT NOT NULL,
+    video INTEGER,
+    yeni INTEGER,
+    degisen INTEGER,
+    cu REAL NOT NULL DEFAULT 0,
+    sure_sn REAL,
+    hata TEXT
+);
+CREATE INDEX IF NOT EXISTS scheduler_runs_started ON scheduler_runs (started_at);
+CREATE TABLE IF NOT EXISTS sheet_pending (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tab TEXT NOT NULL,
+    row TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sheet_pending_tab ON sheet_pending (tab, id);
+"""
+
+# Satır listesiyle yazılan tablolar -> sütun sırası (eski sekme başlıklarıyla aynı)
+ROW_TABLES = {
+    "bookmarks": ["Tarih", "Aciklama", "Izlenme", "Viral_Skor", "Etkilesim", "Video_URL", "Resim_URL"],
+    "suppliers": ["ID", "Tarih", "Urun_Adi", "Tedarikci_Baslik", "Web_Sitesi", "Aciklama", "Kanal_Tipi"],
+    "meta_results": ["ID", "Tarih", "Urun_Adi", "Baslik", "Link", "Aciklama", "Kaynak"],
+}
+# Yerel tablo -> Sheets sekmesi (dışa aktarım için)
+SHEET_TABS = {"bookmarks": "Bookmarks", "suppliers": "Suppliers", "meta_results": "Meta_Results", "products": "List"}
+
+def video_ids(df):
+    """Rakip videoların anahtarı: id, yoksa webVideoUrl."""
+    if "id" in df.columns: return df["id"].astype(str)
+    return df["webVideoUrl"].astype(str)
+
+def competitor_records(df):
+    """calculate_metrics çıktısını saklanan tipli sütunlara indirger."""
+    df = df.reset_index(drop=True)
+    out = pd.DataFrame({"video_id": video_ids(df)})
+    for col, kind in COMPETITOR_COLUMNS.items():
+        if col in df.columns: values = df[col]
+        elif col == "Hesap" and "authorMeta" in df.columns:
+            values = pd.Series([v.get("name", "") if isinstance(v, dict) else "" for v in df["authorMeta"]])
+        else: values = pd.Series([None] * len(df), dtype=object)
+        if kind == "INTEGER": out[col] = pd.to_numeric(values, errors="coerce").fillna(0).astype("int64")
+        elif kind == "REAL": out[col] = pd.to_numeric(values, errors="coerce").fillna(0.0).astype("float64")
+        else: out[col] = values.fillna("").astype(str)
+    dates = pd.to_datetime(out["createTimeISO"].replace("", None), errors="coerce")
+    out["createTimeISO"] = [None if pd.isna(d) else d.isoformat() for d in dates]
+    return out.drop_duplicates(subset=["video_id"])
+
+class LocalStore:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._db() as con: con.executescript(SCHEMA)
+
+    def _db(self):
+        # Streamlit oturumları farklı thread'lerde çalışır; her işlem kendi bağlantısını açar
+        return closing(sqlite3.connect(self.path, timeout=30, isolation_level=None))
+
+    @contextmanager
+    def _tx(self):
+        with self._lock, self._db() as con:
+            con.execute("BEGIN")
+            try:
+                yield con
+                con.execute("COMMIT")
+            except Exception:
+                con.execute("ROLLBACK")
+                raise
+
+    def _frame(self, sql, params=()):
+        with self._db() as con: return pd.read_sql_query(sql, con, params=params)
+
+    # --- Ürünler ---
+    def save_product(self, product_id, urun_adi, url, query, last_date, next_date, viral_score, status):
+        with self._tx() as con:
+            con.execute("INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (product_id, urun_adi, last_date, next_date, float(viral_score), status, url, query))
+
+    def update_product_status(self, product_id, last_date, next_date, viral_score):
+        with self._tx() as con:
+            con.execute("UPDATE products SET Son_Analiz_Tarihi = ?, Sonraki_Analiz_Tarihi = ?, Son_Viral_Skor = ? WHERE ID = ?",
+                        (last_date, next_date, float(viral_score), product_id))
+
+    def products(self):
+        return self._frame("SELECT * FROM products ORDER BY rowid")
+
+    # --- Rakipler ---
+    def upsert_competitors(self, product_id, df, observed_at):
+        """
+        Rakip videoları id ile birleştirir: yeni/değişen satırlar yazılır, değişmeyenlere
+        sadece görülme zamanı (updated_at) işlenir. Yeni ve sayaçları değişen videolar için
+        anlık görüntü eklenir. {"yeni", "degisen", "ayni"} sayılarını döndürür.
+        """
+        rec = competitor_records(df)
+        cols = ["video_id", *COMPETITOR_COLUMNS]
+        old = self._frame(f"SELECT {', '.join(cols)} FROM competitors WHERE product_id = ?", (product_id,))
+        merged = rec.merge(old, on="video_id", how="left", suffixes=("", "_old"), indicator=True)
+        is_new = (merged["_merge"] == "left_only").to_numpy()
+        def differs(cols):
+            mask = is_new.copy()
+            for c in cols:
+                a, b = merged[c], merged[f"{c}_old"]
+                mask |= ~((a == b) | (a.isna() & b.isna())).to_numpy()
+            return mask
+        changed = differs(COMPETITOR_COLUMNS)
+        counts_changed = differs(SNAPSHOT_COLUMNS)
+        rows = [(product_id, *r, observed_at) for r in rec.loc[changed, cols].itertuples(index=False, name=None)]
+        snaps = [(product_id, *r, observed_at) for r in rec.loc[counts_changed, ["video_id", *SNAPSHOT_COLUMNS]].itertuples(index=False, name=None)]
+        unchanged = rec.loc[~changed, "video_id"].tolist()
+        with self._tx() as con:
+            con.executemany(f"INSERT INTO competitors (product_id, {', '.join(cols)}, updated_at) VALUES ({', '.join('?' * (len(cols) + 2))}) "
+                            f"ON CONFLICT(product_id, video_id) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in [*COMPETITOR_COLUMNS, 'updated_at'])}", rows)
+            con.executemany(f"INSERT OR REPLACE INTO competitor_snapshots VALUES ({', '.join('?' * (len(SNAPSHOT_COLUMNS) + 3))})", snaps)
+            for i in range(0, len(unchanged), 500):
+                chunk = unchanged[i:i + 500]
+                con.execute(f"UPDATE competitors SET updated_at = ? WHERE product_id = ? AND video_id IN ({', '.join('?' * len(chunk))})",
+                            (observed_at, product_id, *chunk))
+        return {"yeni": int(is_new.sum()), "degisen": int(changed.sum() - is_new.sum()), "ayni": len(unchanged)}
+
+    def competitors(self, product_id, current_only=True):
+        """Ürünün rakipleri; current_only ise sadece son güncellemede görülen videolar."""
+        sql = "SELECT * FROM competitors WHERE product_id = ?"
+        if current_only: sql += " AND updated_at = (SELECT MAX(updated_at) FROM competitors WHERE product_id = ?)"
+        df = self._frame(sql + " ORDER BY rowid", (product_id, product_id) if current_only else (product_id,))
+        df["createTimeISO"] = pd.to_datetime(df["createTimeISO"], errors="coerce")
+        return df
+
+    def snapshots(self, product_id=None):
+        """Video başına sayaç geçmişi (observed_at datetime64, sayaçlar int64); ürün verilmezse tümü."""
+        if product_id is None: df = self._frame("SELECT * FROM competitor_snapshots ORDER BY video_id, observed_at")
+        else: df = self._frame("SELECT * FROM competitor_snapshots WHERE product_id = ? ORDER BY video_id, observed_at", (product_id,))
+        df["observed_at"] = pd.to_datetime(df["observed_at"], errors="coerce")
+        return df
+
+    # --- Küresel video kaydı ---
+    def upsert_videos(self, rec, observed_at):
+        """competitor_records biçimindeki yeni/değişen videoları yazar (görülme sayısı artar)."""
+        cols = ["video_id", *COMPETITOR_COLUMNS]
+        rows = [(*r, observed_at, observed_at) for r in rec[cols].itertuples(index=False, name=None)]
+        with self._tx() as con:
+            con.executemany(f"INSERT INTO videos ({', '.join(cols)}, first_seen, last_seen) VALUES ({', '.join('?' * (len(cols) + 2))}) "
+                            f"ON CONFLICT(video_id) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in COMPETITOR_COLUMNS)}, "
+                            "last_seen = excluded.last_seen, seen_count = seen_count + 1", rows)
+
+    def touch_videos(self, video_ids, observed_at):
+        """Değişmeden tekrar görülen videolar: sadece son görülme ve sayaç."""
+        with self._tx() as con:
+            for chunk in _chunks(video_ids):
+                con.execute(f"UPDATE videos SET last_seen = ?, seen_count = seen_count + 1 WHERE video_id IN ({', '.join('?' * len(chunk))})",
+                            (observed_at, *chunk))
+
+    def videos(self, video_ids):
+        return pd.concat([self._frame(f"SELECT * FROM videos WHERE video_id IN ({', '.join('?' * len(chunk))})", chunk)
+                          for chunk in _chunks(video_ids)] or [pd.DataFrame(columns=["video_id", *COMPETITOR_COLUMNS])], ignore_index=True)
+
+    def all_videos(self):
+        df = self._frame("SELECT * FROM videos ORDER BY rowid")
+        df["createTimeISO"] = pd.to_datetime(df["createTimeISO"], errors="coerce")
+        return df
+
+    def video_products(self, video_ids):
+        """Videoların bağlı olduğu takip ürünleri: video_id, product_id, Urun_Adi."""
+        frames = [self._frame(f"SELECT DISTINCT c.video_id, c.product_id, p.Urun_Adi FROM competitors c JOIN products p ON p.ID = c.product_id "
+                              f"WHERE c.video_id IN ({', '.join('?' * len(chunk))})", chunk) for chunk in _chunks(video_ids)]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["video_id", "product_id", "Urun_Adi"])
+
+    def iter_video_ids(self, batch=100_000):
+        """Tüm küresel video id'leri, parça parça (indeksi kurmak için)."""
+        with self._db() as con:
+            cur = con.execute("SELECT video_id FROM videos")
+            while rows := cur.fetchmany(batch): yield [r[0] for r in rows]
+
+    def backfill_videos(self):
+        """videos tablosu eklenmeden önce kaydedilmiş rakipleri küresel kayda taşır (bir kez)."""
+        cols = ", ".join(COMPETITOR_COLUMNS)
+        with self._tx() as con:
+            if con.execute("SELECT 1 FROM videos LIMIT 1").fetchone(): return 0
+            return con.execute(f"INSERT OR IGNORE INTO videos (video_id, {cols}, first_seen, last_seen, seen_count) "
+                               f"SELECT video_id, {cols}, MIN(updated_at), MAX(updated_at), COUNT(*) FROM competitors GROUP BY video_id").rowcount
+
+    # --- Performans geçmişi ---
+    def append_performance(self, product_id, tarih, avg_viral, total_views, winner_count, note):
+        with self._tx() as con:
+            con.execute("INSERT INTO performance VALUES (?, ?, ?, ?, ?, ?)",
+                        (product_id, tarih, float(avg_viral), int(total_views), int(winner_count), note))
+
+    def performance(self, product_id):
+        return self._frame("SELECT Tarih, Ort_Viral_Skor, Toplam_Izlenme, Winner_Sayisi, Analiz_Notu FROM performance "
+                           "WHERE product_id = ? ORDER BY Tarih, rowid", (product_id,))
+
+    # --- Yer imleri / tedarikçi / Meta ---
+    def append_rows(self, table, rows):
+        cols = ROW_TABLES[table]
+        with self._tx() as con:
+            con.executemany(f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})", [tuple(r) for r in rows])
+
+    def rows(self, table, urun_adi=None):
+        if urun_adi is None: return self._frame(f"SELECT {', '.join(ROW_TABLES[table])} FROM {table} ORDER BY rowid")
+        return self._frame(f"SELECT {', '.join(ROW_TABLES[table])} FROM {table} WHERE Urun_Adi = ? ORDER BY rowid", (urun_adi,))
+
+    def table_size(self, table):
+        with self._db() as con: return con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def count_rows(self, table, urun_adi):
+        with self._db() as con:
+            return con.execute(f"SELECT COUNT(*) FROM {table} WHERE Urun_Adi = ?", (urun_adi,)).fetchone()[0]
+
+    def clear(self, table):
+        with self._tx() as con: con.execute(f"DELETE FROM {table}")
+
+    # --- Sheets bekleme kuyruğu (SheetSession; yeniden başlatmada kaybolmasın) ---
+    def enqueue_sheet_rows(self, tab, rows):
+        with self._tx() as con:
+            con.executemany("INSERT INTO sheet_pending (tab, row) VALUES (?, ?)",
+                            [(tab, json.dumps(list(r), ensure_ascii=False, default=str)) for r in rows])
+
+    def sheet_rows(self, tab, limit):
+        """Sekmenin en eski `limit` bekleyen satırı: [(id, satır listesi)]."""
+        with self._db() as con:
+            rows = con.execute("SELECT id, row FROM sheet_pending WHERE tab = ? ORDER BY id LIMIT ?", (tab, limit)).fetchall()
+        return [(i, json.loads(r)) for i, r in rows]
+
+    def drop_sheet_rows(self, ids):
+        with self._tx() as con:
+            for chunk in _chunks(ids): con.execute(f"DELETE FROM sheet_pending WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+
+    def clear_sheet_rows(self, tab):
+        with self._tx() as con: con.execute("DELETE FROM sheet_pending WHERE tab = ?", (tab,))
+
+    def sheet_backlog(self, tab=None):
+        """Sekme başına bekleyen satır sayısı ({sekme: sayı}; tab verilirse sadece o sekme)."""
+        sql, params = "SELECT tab, COUNT(*) FROM sheet_pending", ()
+        if tab is not None: sql, params = sql + " WHERE tab = ?", (tab,)
+        with self._db() as con: return dict(con.execute(sql + " GROUP BY tab", params).fetchall())
+
+    # --- Zamanlayıcı çalışma kaydı ---
+    def log_run(self, started_at, product_id, result, cu, seconds, error=None):
+        with self._tx() as con:
+            con.execute("INSERT INTO scheduler_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (started_at, product_id, result.get("durum", "hata"), result.get("video"), result.get("yeni"),
+                         result.get("degisen"), float(cu), float(seconds), error))
+
+    def cu_spent(self, day):
+        """Verilen gün (YYYY-AA-GG) zamanlayıcının harcadığı toplam compute unit."""
+        with self._db() as con:
+            return con.execute("SELECT COALESCE(SUM(cu), 0) FROM scheduler_runs WHERE started_at >= ? AND started_at < ?",
+                               (day, f"{day}T99")).fetchone()[0]
+
+    def scheduler_runs(self, limit=100):
+        return self._frame("SELECT * FROM scheduler_runs ORDER BY started_at DESC LIMIT ?", (limit,))
+
+def _chunks(values, size=500):
+    # SQLite parametre sınırı için IN listeleri parçalanır
+    values = list(values)
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+def _num(value, default=0):
+    value = pd.to_numeric(value, errors="coerce")
+    return default if pd.isna(value) else value
+
+def import_from_sheets(store, session):
+    """
+    Eski Google Sheets verisini (List + R_/P_ sekmeleri ve ana sekmeler) yerel depoya aktarır.
+    (aktarılan ürün, atlanan kayıt) döner; okunamayan sekmeler ve bozuk performans satırları
+    atlanır, her biri loga yazılır. Tekrar çalıştırmak güvenlidir: ürün ve rakipler id ile
+    birleştirilir, satır tabloları ve performans geçmişi zaten doluysa yeniden eklenmez.
+    """
+    skipped = 0
+    for table, tab in SHEET_TABS.items():
+        if table == "products": continue
+        if store.table_size(table):
+            log.info("%s: yerel tablo dolu, sekme tekrar aktarılmadı", tab)
+            continue
+        try: records = session.worksheet(tab).get_all_records()
+        except Exception as e:
+            skipped += 1
+            log.warning("%s sekmesi okunamadı: %s", tab, e)
+            continue
+        if records: store.append_rows(table, [[r.get(c, "") for c in ROW_TABLES[table]] for r in records])
+    try: products = session.worksheet("List").get_all_records()
+    except Exception as e:
+        log.warning("List sekmesi okunamadı: %s", e)
+        return 0, skipped + 1
+    for p in products:
+        pid = str(p["ID"])
+        store.save_product(pid, p["Urun_Adi"], p.get("URL", ""), p.get("Arama_Sorgusu", ""), str(p.get("Son_Analiz_Tarihi", "")),
+                           str(p.get("Sonraki_Analiz_Tarihi", "")), _num(p.get("Son_Viral_Skor"), 0.0), p.get("Durum", ""))
+        try:
+            rakipler = pd.DataFrame(session.worksheet(p["Rakipler_Sekme_Adi"]).get_all_records())
+            if not rakipler.empty: store.upsert_competitors(pid, rakipler, str(p.get("Son_Analiz_Tarihi", "")))
+        except Exception as e:
+            skipped += 1
+            log.warning("%s (%s): rakip sekmesi aktarılamadı: %s", p["Urun_Adi"], pid, e)
+        if not store.performance(pid).empty: continue
+        try: records = session.worksheet(p["Performans_Sekme_Adi"]).get_all_records()
+        except Exception as e:
+            skipped += 1
+            log.warning("%s (%s): performans sekmesi okunamadı: %s", p["Urun_Adi"], pid, e)
+            continue
+        for n, r in enumerate(records, start=2):
+            try:
+                store.append_performance(pid, str(r["Tarih"]), _num(r["Ort_Viral_Skor"], 0.0),
+                                         _num(r["Toplam_Izlenme"]), _num(r["Winner_Sayisi"]), r["Analiz_Notu"])
+            except Exception as e:
+                skipped += 1
+                log.warning("%s (%s): performans satırı %d atlandı: %s", p["Urun_Adi"], pid, n, e)
+    return len(products), skipped
@@ -0,0 +1,63 @@
+"""
+Tedarikçi sınıflandırıcı: Google sonuçlarından gerçek toptancı/üreticileri ayıklar.
+
+Alan adları bir kez ayrıştırılıp yasaklı alan adı kümesinde (alt alan adlarını da
+kapsayacak şekilde) aranır; zorunlu kelime testi birleştirilmiş metin sütununda tek
+bir derlenmiş desenle yapılır. Her satır için neden tutulduğu/elendiği yazılır.
+"""
+import re
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+MANDATORY_KEYWORDS = ["toptan", "wholesale", "imalat", "üretici", "ithalat", "toptancı", "supplier", "manufacturer", "distribütör", "istoç", "tahtakale", "merter", "bayi", "koli", "adetli", "toplu satış", "fabrikadan", "b2b"]
+BANNED_DOMAINS = {"trendyol.com", "hepsiburada.com", "amazon.com", "ciceksepeti.com", "sikayetvar.com", "youtube.com", "tiktok.com", "instagram.com", "facebook.com", "pinterest.com", "twitter.com", "n11.com", "pttavm.com"}
+
+MANDATORY_RE = re.compile("(" + "|".join(re.escape(k) for k in MANDATORY_KEYWORDS) + ")")
+
+def url_hostname(url):
+    if not isinstance(url, str): return ""
+    try: return (urlsplit(url.strip()).hostname or "").lower()
+    except ValueError: return ""
+
+def banned_domain(host, banned=BANNED_DOMAINS):
+    """
+    Host yasaklı bir alan adı veya onun alt alan adıysa (örn. m.trendyol.com) o alan adını döndürür.
+    Sondaki iki harfli ülke uzantısı da atılıp denenir: www.amazon.com.tr -> amazon.com.
+    """
+    parts = host.split(".")
+    if len(parts) > 2 and len(parts[-1]) == 2: parts = parts[:-1]
+    for i in range(len(parts) - 1):
+        suffix = ".".join(parts[i:])
+        if suffix in banned: return suffix
+    return ""
+
+def classify_suppliers(df, search_term):
+    """
+    Tüm satırları sınıflandırır; 'Uygun' (bool) ve 'Filtre_Nedeni' sütunlarını ekleyip kopya döndürür.
+    Satırlar elenmez, böylece her sonucun neden elendiği görülebilir.
+    """
+    out = df.copy()
+    n = len(out)
+    col = lambda c: out[c].tolist() if c in out.columns else [""] * n
+
+    # Alan adları: her benzersiz host sadece bir kez çözülür
+    hosts = pd.Series([url_hostname(u) for u in col('url')], index=out.index)
+    unique_hosts = hosts.unique()
+    banned = hosts.map(dict(zip(unique_hosts, (banned_domain(h) for h in unique_hosts))))
+
+    full_text = pd.Series([f"{str(t).lower()} {str(d).lower()}" for t, d in zip(col('title'), col('description'))], index=out.index)
+    has_term = full_text.str.contains(search_term.lower(), regex=False)
+    keyword = full_text.str.extract(MANDATORY_RE, expand=False)
+
+    out['Uygun'] = (banned == "") & has_term & keyword.notna()
+    out['Filtre_Nedeni'] = "uygun: " + keyword.fillna("")
+    out.loc[keyword.isna().to_numpy(), 'Filtre_Nedeni'] = "toptan/üretici kelimesi yok"
+    out.loc[(~has_term).to_numpy(), 'Filtre_Nedeni'] = "ürün adı geçmiyor"
+    out.loc[(banned != "").to_numpy(), 'Filtre_Nedeni'] = "yasaklı site: " + banned[banned != ""]
+    return out
+
+def filter_suppliers_strict(df, search_term):
+    if df.empty: return df
+    classified = classify_suppliers(df, search_term)
+    return classified[classified['Uygun']]
@@ -0,0 +1,36 @@
+from adaptive_fetch import MAX_FETCH_ITEMS, adaptive_fetch
+
+class _Memory:
+    def __init__(self, rate): self.rate = rate
+    def get(self, key): return self.rate
+    def observe(self, key, fetched, passed): pass
+
+def _rounds(pass_rate, target=10, remembered=0.2):
+    limits = []
+    def fetch_round(limit, needed):
+        new = limit - (limits[-1] if limits else 0)
+        limits.append(limit)
+        return new, int(new * pass_rate), False
+    adaptive_fetch(fetch_round, target, _Memory(remembered), "k")
+    return limits
+
+def test_total_scraped_stays_under_ceiling():
+    for rate in (0.2, 0.05, 0.01, 0.0):
+        assert sum(_rounds(rate)) <= MAX_FETCH_ITEMS
+
+def test_each_round_asks_for_more_than_the_last():
+    limits = _rounds(0.01)
+    assert limits == sorted(set(limits))
+
+def test_stops_after_target_reached():
+    assert len(_rounds(1.0)) == 1
+
+def test_ceiling_counts_actual_request_size():
+    # Sorgu başına alt sınır isteği plandan büyütürse bütçeden gerçek boyut düşülür
+    requested = []
+    def fetch_round(limit, needed):
+        size = max(40, limit)
+        requested.append(size)
+        return size, 0, False, size
+    adaptive_fetch(fetch_round, 10, _Memory(0.2), "k", ceiling=100)
+    assert sum(requested) <= 100
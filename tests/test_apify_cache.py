@@ -0,0 +1,61 @@
+import pipeline
+from adaptive_fetch import PassRateMemory
+from apify_cache import ApifyResultCache
+from fake_apify import FakeApifyClient
+
+def _fetch(path, client, query="bileklik", limit=5):
+    cache, pass_rates = ApifyResultCache(path), PassRateMemory(path)
+    df, _, _ = pipeline.fetch_tiktok_data([query], limit, client=client, cache=cache, pass_rates=pass_rates)
+    return df, cache
+
+def test_repeat_search_is_cache_hit(tmp_path):
+    path, client = str(tmp_path / "cache.sqlite"), FakeApifyClient()
+    first, _ = _fetch(path, client)
+    assert not first.empty and len(client.runs) == 1
+    for _ in range(2):
+        again, cache = _fetch(path, client)
+        assert not again.empty
+    assert len(client.runs) == 1
+    (stats,) = cache.stats()
+    assert stats["Kayıt"] == 1 and stats["Miss"] == 1 and stats["Hit"] == 2
+
+ACTOR = "clockworks/free-tiktok-scraper"
+
+class _CountingClient(FakeApifyClient):
+    def __init__(self):
+        super().__init__()
+        self.pages_read = 0
+
+    def dataset(self, dataset_id):
+        self.pages_read += 1
+        return super().dataset(dataset_id)
+
+def test_early_stop_caches_only_read_pages_as_partial(tmp_path):
+    cache, client = ApifyResultCache(str(tmp_path / "cache.sqlite")), _CountingClient()
+    run_input = {"searchQueries": ["bileklik"], "resultsPerPage": 30}
+    pages = cache.iter_pages(client, ACTOR, run_input, page_size=10)
+    next(pages)
+    pages.close()
+    assert client.pages_read == 1
+    # Yarım kayıt tam sonuç gibi sunulmaz, ama ilk 10'u isteyen küçük isteği karşılar
+    assert cache.get(ACTOR, run_input) is None
+    assert len(cache.get(ACTOR, {**run_input, "resultsPerPage": 10})) == 10
+    assert cache.get(ACTOR, {**run_input, "resultsPerPage": 20}) is None
+
+def test_partial_entry_resumes_with_live_run(tmp_path):
+    cache, client = ApifyResultCache(str(tmp_path / "cache.sqlite")), FakeApifyClient()
+    run_input = {"searchQueries": ["bileklik"], "resultsPerPage": 30}
+    pages = cache.iter_pages(client, ACTOR, run_input, page_size=10)
+    next(pages)
+    pages.close()
+    items = [it for page in cache.iter_pages(client, ACTOR, run_input, page_size=10) for it in page]
+    assert len(items) == 30 and len(client.runs) == 2
+    assert len(cache.get(ACTOR, run_input)) == 30
+
+def test_larger_cached_request_covers_smaller_one(tmp_path):
+    cache = ApifyResultCache(str(tmp_path / "cache.sqlite"))
+    items = [{"id": str(i), "searchQuery": q} for q in ("a", "b") for i in range(20)]
+    cache.put("clockworks/free-tiktok-scraper", {"searchQueries": ["a", "b"], "resultsPerPage": 20}, items)
+    got = cache.get("clockworks/free-tiktok-scraper", {"searchQueries": ["A ", "b"], "resultsPerPage": 5})
+    assert [it["searchQuery"] for it in got] == ["a"] * 5 + ["b"] * 5
+    assert cache.get("clockworks/free-tiktok-scraper", {"searchQueries": ["a", "b"], "resultsPerPage": 50}) is None
@@ -0,0 +1,19 @@
+import pandas as pd
+
+from near_duplicates import cover_key, near_duplicate_clusters
+
+COVER = "https://{host}.tiktokcdn.com/obj/tos-maliva-p-0068/oQabc123~tplv-dmt-logom:{fmt}.jpeg?x-expires={exp}&x-signature={sig}"
+
+def test_cover_key_ignores_host_format_and_signature():
+    a = COVER.format(host="p16-sign-va", fmt="1", exp=1700000000, sig="aa")
+    b = COVER.format(host="p77-sign-sg", fmt="2", exp=1700003600, sig="bb")
+    assert cover_key(a) == cover_key(b) == "oQabc123"
+    assert cover_key(None) == cover_key("") == ""
+
+def test_same_cover_links_unrelated_captions():
+    df = pd.DataFrame({
+        "text": ["deri bileklik el yapımı", "mutfak robotu çok amaçlı", "kamp sandalyesi katlanır"],
+        "Resim": [COVER.format(host="p16-sign-va", fmt="1", exp=1, sig="x"),
+                  COVER.format(host="p19-sign", fmt="1", exp=2, sig="y"), None],
+    })
+    assert near_duplicate_clusters(df).tolist() == [0, 0, 1]
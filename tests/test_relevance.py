@@ -0,0 +1,107 @@
+"""
+filter_content_relevance'ın eski iterrows sürümüyle aynı satırları tuttuğunu doğrular.
+Kök/bulanık eşleşmenin (user-023) bilerek değiştirdiği durumlar ayrı testlerde belgelenir.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from relevance import filter_content_relevance, filter_content_relevance_by_query
+
+def legacy_filter_content_relevance(df, query):
+    # Eski "app copy.py" sürümü, olduğu gibi
+    if df.empty or not query: return df
+    tr_chars = ['ı', 'ğ', 'ş', 'ö', 'ç', 'ü', 'İ', 'Ğ', 'Ş', 'Ö', 'Ç', 'Ü']
+    commerce_keywords = ["fiyat", "kargo", "sipariş", "ne kadar", "link", "profil", "bilgi", "dm", "satış", "bedava", "indirim", "tl", "kapıda", "ödeme", "model", "tasarım", "ürün", "adet", "stok", "kampanya"]
+    query_words = set(query.lower().split())
+    query_words = {w for w in query_words if len(w) > 2}
+    filtered_rows = []
+    for _, row in df.iterrows():
+        text = str(row.get('text', '')).lower()
+        lang = str(row.get('textLanguage', '')).lower()
+        is_turkish = (lang == 'tr') or any(char in text for char in tr_chars) or any(kw in text for kw in commerce_keywords)
+        if not is_turkish:
+            continue
+        match_count = sum(1 for w in query_words if w in text)
+        if len(query_words) == 1:
+            if match_count == 1:
+                filtered_rows.append(row)
+        else:
+            is_relevant = False
+            if len(query_words) > 0 and (match_count / len(query_words) >= 0.5):
+                is_relevant = True
+            if match_count > 0 and any(ck in text for ck in commerce_keywords):
+                is_relevant = True
+            if is_relevant:
+                filtered_rows.append(row)
+    return pd.DataFrame(filtered_rows)
+
+CAPTIONS = [
+    "Bileklik modelleri fiyat bilgisi için profil",
+    "bugünün duası amin",
+    "ayetel kürsi bileklik kargo bedava",
+    "AYETEL KÜRSİ yazılı gümüş bileklik",
+    "Şal kombin önerileri",
+    "ŞAL modelleri kapıda ödeme",
+    "akıllı saat inceleme",
+    "smart watch review unboxing",
+    "Akıllı SAAT su geçirmez sipariş için dm",
+    "çelik bileklik stokta",
+    "",
+    None,
+    np.nan,
+    "#bileklik #takı #hediye",
+    "gold bracelet for women",
+    "kürsi",
+]
+LANGS = ["tr", "", "tr", "", "", "", "tr", "en", "", "", "tr", "", "tr", "", "en", "tr"]
+QUERIES = ["bileklik", "ayetel kürsi bileklik", "şal", "Şal", "akıllı saat", "AKILLI saat", "smart watch", "çelik"]
+
+def _frame(index=None):
+    df = pd.DataFrame({
+        "text": pd.Series(CAPTIONS, dtype=object),
+        "textLanguage": LANGS,
+        "playCount": np.arange(len(CAPTIONS), dtype=np.int64) * 100,
+        "createTimeISO": pd.date_range("2024-01-01", periods=len(CAPTIONS), freq="D"),
+    })
+    if index is not None: df.index = index
+    return df
+
+def _kept(df):
+    return list(df.index)
+
+@pytest.mark.parametrize("query", QUERIES)
+@pytest.mark.parametrize("index", [None, list(range(100, 100 + len(CAPTIONS)))[::-1]], ids=["range", "custom"])
+def test_same_rows_as_legacy(query, index):
+    df = _frame(index)
+    assert _kept(filter_content_relevance(df, query)) == _kept(legacy_filter_content_relevance(df, query))
+
+@pytest.mark.parametrize("query", ["bileklik", ""])
+def test_empty_frame_and_empty_query(query):
+    empty = _frame().iloc[:0]
+    assert filter_content_relevance(empty, query).empty and legacy_filter_content_relevance(empty, query).empty
+    if not query: assert _kept(filter_content_relevance(_frame(), query)) == _kept(_frame())
+
+def test_missing_language_column():
+    df = _frame().drop(columns="textLanguage")
+    for query in QUERIES:
+        assert _kept(filter_content_relevance(df, query)) == _kept(legacy_filter_content_relevance(df, query))
+
+def test_keeps_dtypes_and_returns_slice():
+    df = _frame()
+    out = filter_content_relevance(df, "bileklik")
+    assert out.dtypes.equals(df.dtypes)
+    assert out.equals(df.loc[out.index])
+
+def test_by_query_matches_per_query_filter():
+    df = pd.concat([_frame().assign(Arama_Sorgusu=q) for q in QUERIES], ignore_index=True)
+    expected = [i for q in QUERIES for i in _kept(legacy_filter_content_relevance(df[df["Arama_Sorgusu"] == q], q))]
+    assert _kept(filter_content_relevance_by_query(df, "Arama_Sorgusu")) == sorted(expected)
+
+# Bilerek değişen davranış (user-023): ekli ve büyük İ'li yazımlar eşleşir, kısa kökler kelime içinde eşleşmez
+def test_intentional_divergences_from_legacy():
+    df = pd.DataFrame({"text": ["Bilekliği çok güzel sipariş için dm", "BİLEKLİK", "çelik bileklik stokta"], "textLanguage": ["", "tr", "tr"]})
+    assert _kept(legacy_filter_content_relevance(df, "bileklik")) == [2]
+    assert _kept(filter_content_relevance(df, "bileklik")) == [0, 1, 2]
+    assert _kept(legacy_filter_content_relevance(df, "ve ile")) == [0, 2]
+    assert _kept(filter_content_relevance(df, "ve ile")) == []
@@ -0,0 +1,34 @@
+from apify_cache import ApifyResultCache
+from fake_apify import FakeApifyClient
+from scheduler import run_due
+from store import LocalStore
+
+TODAY = "2024-06-01"
+
+def _store(path, names=("deri bileklik", "telefon kılıfı")):
+    store = LocalStore(str(path / "store.sqlite"))
+    for i, name in enumerate(names):
+        store.save_product(f"p{i}", name, "", name, "2024-05-01", "2024-05-30", 0.0, "")
+    return store
+
+class _FailingClient(FakeApifyClient):
+    def _run(self, actor_id, run_input):
+        raise RuntimeError("apify kapalı")
+
+def test_budget_stops_new_jobs(tmp_path):
+    store, client = _store(tmp_path), FakeApifyClient()
+    results = run_due(store, client, ApifyResultCache(str(tmp_path / "cache.sqlite")), workers=1, jitter=0,
+                      daily_cu=0.05, limit=5, today=TODAY)
+    assert sorted(r["durum"] for r in results) == ["butce", "ok"]
+    runs = store.scheduler_runs()
+    assert runs["durum"].tolist() == ["ok"]
+    assert store.cu_spent(runs["started_at"].iloc[0][:10]) == len(client.runs) * client.compute_units_per_run
+
+def test_failed_refresh_is_logged_with_error(tmp_path):
+    store = _store(tmp_path, ["deri bileklik"])
+    (result,) = run_due(store, _FailingClient(), ApifyResultCache(str(tmp_path / "cache.sqlite")), jitter=0, today=TODAY)
+    assert result["durum"] == "hata"
+    (run,) = store.scheduler_runs().to_dict("records")
+    assert run["product_id"] == "p0" and run["durum"] == "hata" and "apify kapalı" in run["hata"]
+    # Başarısız ürünün kontrol tarihi ileri alınmaz
+    assert store.products()["Sonraki_Analiz_Tarihi"].tolist() == ["2024-05-30"]
@@ -0,0 +1,26 @@
+from store import LocalStore, import_from_sheets
+
+class _Worksheet:
+    def __init__(self, records): self.records = records
+    def get_all_records(self): return self.records
+
+class _Session:
+    # Meta_Results ve R_x sekmeleri yok: aktarım durmadan atlanmalı
+    tabs = {
+        "Bookmarks": _Worksheet([{"Tarih": "2024-01-01", "Aciklama": "yer imi"}]),
+        "Suppliers": _Worksheet([]),
+        "List": _Worksheet([{"ID": "x1", "Urun_Adi": "Bileklik", "Rakipler_Sekme_Adi": "R_x", "Performans_Sekme_Adi": "P_x"}]),
+        "P_x": _Worksheet([{"Tarih": "2024-01-01", "Ort_Viral_Skor": 1.5, "Toplam_Izlenme": 500, "Winner_Sayisi": 1, "Analiz_Notu": ""}]),
+    }
+
+    def worksheet(self, title):
+        if title not in self.tabs: raise KeyError(title)
+        return self.tabs[title]
+
+def test_import_skips_missing_tabs_and_is_idempotent(tmp_path):
+    store = LocalStore(str(tmp_path / "store.sqlite"))
+    for _ in range(2):
+        assert import_from_sheets(store, _Session()) == (1, 2)
+        assert store.table_size("bookmarks") == 1
+        assert len(store.performance("x1")) == 1
+        assert store.products()["ID"].tolist() == ["x1"]
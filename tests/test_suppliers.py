@@ -0,0 +1,22 @@
+import pandas as pd
+
+from suppliers import banned_domain, filter_suppliers_strict
+
+def test_banned_domain_matches_subdomains_and_country_mirrors():
+    assert banned_domain("m.trendyol.com") == "trendyol.com"
+    assert banned_domain("amazon.com.tr") == "amazon.com"
+    assert banned_domain("www.amazon.com.tr") == "amazon.com"
+    assert banned_domain("hepsiburada.com.tr") == "hepsiburada.com"
+
+def test_banned_domain_keeps_unrelated_hosts():
+    assert banned_domain("firma.com.tr") == ""
+    assert banned_domain("notamazon.com") == ""
+    assert banned_domain("") == ""
+
+def test_strict_filter_drops_amazon_turkiye():
+    df = pd.DataFrame({
+        "url": ["https://www.amazon.com.tr/bileklik", "https://firma.com.tr/bileklik"],
+        "title": ["bileklik toptan", "bileklik toptan"],
+        "description": ["", ""],
+    })
+    assert filter_suppliers_strict(df, "bileklik")["url"].tolist() == ["https://firma.com.tr/bileklik"]
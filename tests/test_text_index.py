@@ -0,0 +1,40 @@
+import pipeline
+from adaptive_fetch import PassRateMemory
+from apify_cache import ApifyResultCache
+from fake_apify import FakeApifyClient, fake_tiktok_items
+from ingest import flatten_tiktok_items
+from text_index import TextIndex
+
+def _videos(query, n):
+    return flatten_tiktok_items(fake_tiktok_items(query, n))
+
+def test_add_search_round_trip(tmp_path):
+    index = TextIndex(str(tmp_path / "store.sqlite"))
+    df = _videos("deri bileklik", 5)
+    assert index.add(df) == 5
+    found = index.search("bileklik")
+    assert sorted(found["id"]) == sorted(df["id"])
+    assert (found["searchQuery"] == "bileklik").all() and (found["Yerel_Eslesme"] == 1.0).all()
+    # Çoğul/iyelik ekleri aynı terime budanır
+    assert len(index.search("bileklikler")) == 5
+    assert index.search("kılıf").empty
+
+def test_search_skips_stale_videos(tmp_path):
+    index = TextIndex(str(tmp_path / "store.sqlite"))
+    index.add(_videos("telefon kılıfı", 3), seen_at="2020-01-01T00:00:00")
+    assert index.search("kılıf").empty
+    assert len(index.search("kılıf", max_age_hours=None)) == 3
+
+def test_search_products_prefers_fresh_local_results(tmp_path):
+    path, client = str(tmp_path / "store.sqlite"), FakeApifyClient()
+    resources = dict(client=client, cache=ApifyResultCache(path), pass_rates=PassRateMemory(path), corpus=TextIndex(path))
+    first, _, _ = pipeline.search_products(["bileklik"], 5, **resources)
+    assert first.attrs["kaynak"] == "canli" and len(client.runs) == 1
+    again, _, _ = pipeline.search_products(["bileklik"], 5, **resources)
+    assert again.attrs["kaynak"] == "yerel" and len(client.runs) == 1
+    assert len(again) == 5
+    # Yerel sonuç yetmezse ya da yenileme istenirse canlı aranır
+    more, _, _ = pipeline.search_products(["bileklik"], 50, **resources)
+    assert more.attrs["kaynak"] == "canli" and len(more) == 50
+    forced, _, _ = pipeline.search_products(["bileklik"], 5, force_refresh=True, **resources)
+    assert forced.attrs["kaynak"] == "canli" and len(client.runs) == 3
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from near_duplicates import collapse_near_duplicates
+from tracking import performance_row, total_views, winner_count
+
+def _reposts():
+    text = "akıllı saat su geçirmez kargo bedava sipariş için dm #akıllısaat #saat #kargo"
+    return pd.DataFrame({
+        "text": [text] * 3 + ["bambaşka bir ürün bileklik deri el yapımı"],
+        "webVideoUrl": [f"https://www.tiktok.com/@s{i}/video/{i}" for i in range(4)],
+        "Hesap": ["s0", "s1", "s2", "s3"],
+        "playCount": [1000, 500, 250, 100],
+        "shareCount": [10, 5, 2, 1],
+        "Karar_Puani": [80, 70, 60, 50],
+    })
+
+def test_total_views_counts_whole_clusters():
+    df = _reposts()
+    collapsed = collapse_near_duplicates(df)
+    assert len(collapsed) == 2
+    assert total_views(collapsed) == total_views(df) == 1850
+
+def test_performance_row_stores_cluster_views():
+    row = performance_row(collapse_near_duplicates(_reposts()), "not", 1.0)
+    assert row[2] == 1850
+
+def test_winner_count_counts_whole_clusters():
+    df = _reposts()
+    collapsed = collapse_near_duplicates(df)
+    assert winner_count(collapsed) == winner_count(df) == 3
+    assert performance_row(collapsed, "not", 1.0)[3] == 3
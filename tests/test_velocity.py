@@ -0,0 +1,35 @@
+import pandas as pd
+
+from velocity import rising_ranking, velocity_metrics
+
+def _history():
+    # a: yeni ve hızlanan; b: eski, sabit hızda izleniyor; c: tek görüntü
+    snapshots = pd.DataFrame({
+        "video_id": ["a", "a", "a", "b", "b", "b", "c"],
+        "observed_at": pd.to_datetime(["2024-06-01", "2024-06-02", "2024-06-03"] * 2 + ["2024-06-03"]),
+        "playCount": [1000, 5000, 15000, 900000, 910000, 920000, 3000],
+        "shareCount": [10, 50, 200, 5000, 5050, 5100, 30],
+    })
+    videos = pd.DataFrame({
+        "video_id": ["a", "b", "c"],
+        "createTimeISO": ["2024-05-31", "2024-01-01", "2024-05-31"],
+        "text": ["yeni ürün", "eski ürün", "tek görüntü"],
+    })
+    return snapshots, videos
+
+def test_velocity_uses_latest_interval_and_lifetime_fallback():
+    vel = velocity_metrics(*_history()).set_index("video_id")
+    assert vel.loc["a", "Gunluk_Izlenme"] == 10000
+    assert vel.loc["b", "Gunluk_Izlenme"] == 10000
+    assert vel.loc["a", "Paylasim_Ivmesi"] == 110
+    assert vel.loc["c", "Goruntu_Sayisi"] == 1 and vel.loc["c", "Gunluk_Izlenme"] == 1000
+    assert vel.loc["a", "Yas_Grubu"] == "3-7" and vel.loc["b", "Yas_Grubu"] == "90+"
+
+def test_rising_ranking_orders_by_score_and_joins_info():
+    ranked = rising_ranking(*_history(), top=2)
+    assert ranked["video_id"].tolist()[0] == "a"
+    assert len(ranked) == 2 and ranked["text"].iloc[0] == "yeni ürün"
+    assert ranked["Yukselis_Skoru"].is_monotonic_decreasing
+
+def test_empty_history():
+    assert velocity_metrics(pd.DataFrame(), pd.DataFrame()).empty
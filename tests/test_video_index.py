@@ -0,0 +1,17 @@
+import pandas as pd
+
+from store import LocalStore
+from video_index import VideoIndex
+
+def _videos(ids, plays):
+    return pd.DataFrame({"id": ids, "text": [f"video {i}" for i in ids], "webVideoUrl": [f"https://t/{i}" for i in ids],
+                         "playCount": plays, "Viral_Skor": 1.0})
+
+def test_merge_counts_new_changed_and_same(tmp_path):
+    index = VideoIndex(LocalStore(str(tmp_path / "store.sqlite")))
+    df, counts = index.merge(_videos(["a", "b", "b"], [10, 20, 20]), "2024-01-01T00:00:00")
+    assert counts["yeni"] == 2 and df["Yeni_Video"].all()
+    df, counts = index.merge(_videos(["a", "b", "c"], [10, 25, 5]), "2024-01-02T00:00:00")
+    assert (counts["yeni"], counts["degisen"], counts["ayni"]) == (1, 1, 1)
+    assert df["Yeni_Video"].tolist() == [False, False, True]
+    assert index.seen(["a", "b", "c", "d"]).tolist() == [True, True, True, False]
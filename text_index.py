@@ -0,0 +1,138 @@
+"""
+Yerel tam metin dizini: daha önce çekilmiş tüm TikTok başlık ve hashtag'leri üzerinde
+ters indeks (terim -> video), böylece aynı ürün tekrar arandığında Apify'a gitmeden
+milisaniyeler içinde aday videolar bulunur.
+
+Terimler product_intent.caption_tokens ile çıkarılır: normalize_turkish + hafif ek budama
+(çoğul -lar/-ler, iyelik -ı/-si, -cı/-ci, -da/-den; örn. "kılıfları" -> "kılıf",
+"toptancılar" -> "toptan"). Sorgu da aynı işlemden geçer. Dönen çerçeve
+flatten_tiktok_items şemasındadır; üzerine mevcut filtreler (filter_products,
+filter_content_relevance) aynen uygulanır. Her video için son görülme zamanı
+tutulur; çağıran taraf eski (max_age_hours) kayıtları dışarıda bırakıp yerel
+cevap yetersizse canlı aramaya döner.
+
+Tablolar yerel depo dosyasında (VIRAL_STORE_PATH) durur: corpus (video başına tek
+satır) ve corpus_terms (terim, video_id; WITHOUT ROWID, terim önekli birincil anahtar).
+"""
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from ingest import COUNT_COLUMNS, TIKTOK_FIELDS, compact_frame, flatten_tiktok_items
+from product_intent import caption_tokens
+from relevance import query_terms
+from store import DEFAULT_STORE_PATH
+
+LOCAL_MAX_AGE_HOURS = 24
+TIKTOK_ACTORS = ("clockworks/free-tiktok-scraper", "clockworks/tiktok-scraper")
+
+DOC_COLUMNS = [c for c in TIKTOK_FIELDS if c != "id"]
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS corpus (
+    video_id TEXT PRIMARY KEY,
+    {", ".join(f"{c} {'INTEGER' if c in COUNT_COLUMNS else 'TEXT'}" for c in DOC_COLUMNS)},
+    last_seen TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS corpus_terms (
+    term TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    PRIMARY KEY (term, video_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS corpus_terms_video ON corpus_terms (video_id);
+"""
+
+class TextIndex:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._db() as con: con.executescript(SCHEMA)
+
+    def _db(self):
+        return closing(sqlite3.connect(self.path, timeout=30, isolation_level=None))
+
+    def add(self, df, seen_at=None):
+        """flatten_tiktok_items şemasındaki videoları ekler/günceller ve terimlerini yeniden yazar."""
+        if df.empty or "id" not in df.columns: return 0
+        seen_at = seen_at or datetime.now().isoformat(timespec="seconds")
+        df = df.drop_duplicates(subset=["id"])
+        cols = [c for c in DOC_COLUMNS if c in df.columns]
+        docs = df[["id", *cols]].copy()
+        for c in cols:
+            if c not in COUNT_COLUMNS: docs[c] = docs[c].astype(object).where(docs[c].notna(), "").astype(str)
+        if "createTimeISO" in df.columns:
+            docs["createTimeISO"] = [None if pd.isna(d) else pd.Timestamp(d).isoformat() for d in df["createTimeISO"]]
+        ids = df["id"].astype(str).tolist()
+        text = df["text"].tolist() if "text" in df.columns else [""] * len(df)
+        postings = [(t, vid) for vid, caption in zip(ids, text) for t in caption_tokens(caption)]
+        rows = [(str(r[0]), *((0 if pd.isna(v) else int(v)) if c in COUNT_COLUMNS else v for c, v in zip(cols, r[1:])), seen_at)
+                for r in docs.itertuples(index=False, name=None)]
+        with self._lock, self._db() as con:
+            con.execute("BEGIN")
+            try:
+                con.executemany(f"INSERT OR REPLACE INTO corpus (video_id, {', '.join(cols)}, last_seen) VALUES ({', '.join('?' * (len(cols) + 2))})", rows)
+                for i in range(0, len(ids), 500):
+                    chunk = ids[i:i + 500]
+                    con.execute(f"DELETE FROM corpus_terms WHERE video_id IN ({', '.join('?' * len(chunk))})", chunk)
+                con.executemany("INSERT OR IGNORE INTO corpus_terms VALUES (?, ?)", postings)
+                con.execute("COMMIT")
+            except Exception:
+                con.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def search(self, query, limit=500, max_age_hours=LOCAL_MAX_AGE_HOURS):
+        """
+        Sorgu terimlerinden en az birini içeren videolar (eşleşen terim sayısı, sonra izlenme sırasıyla).
+        max_age_hours: bu süreden önce son görülmüş videolar atlanır (None: hepsi).
+        Çıktıda searchQuery = query ve Yerel_Eslesme (eşleşen terim oranı) bulunur.
+        """
+        qterms = sorted(query_terms(query))
+        if not qterms: return pd.DataFrame()
+        cutoff = (datetime.now() - timedelta(hours=max_age_hours)).isoformat(timespec="seconds") if max_age_hours else ""
+        sql = f"""
+            SELECT c.*, h.hits FROM (
+                SELECT video_id, COUNT(*) AS hits FROM corpus_terms WHERE term IN ({', '.join('?' * len(qterms))}) GROUP BY video_id
+            ) h JOIN corpus c ON c.video_id = h.video_id
+            WHERE c.last_seen >= ? ORDER BY h.hits DESC, c.playCount DESC LIMIT ?"""
+        with self._db() as con: df = pd.read_sql_query(sql, con, params=(*qterms, cutoff, limit))
+        if df.empty: return df
+        df = df.rename(columns={"video_id": "id"})
+        df["searchQuery"] = query
+        df["Yerel_Eslesme"] = (df.pop("hits") / len(qterms)).round(2)
+        df["createTimeISO"] = pd.to_datetime(df["createTimeISO"], errors="coerce")
+        for col in DOC_COLUMNS:
+            if col not in COUNT_COLUMNS and col != "createTimeISO": df[col] = df[col].fillna("")
+        return compact_frame(df)
+
+    def search_many(self, queries, limit=500, max_age_hours=LOCAL_MAX_AGE_HOURS):
+        """Her sorgu ayrı aranır; searchQuery sütunu sayesinde tag_search_frame ile etiketlenebilir."""
+        parts = [self.search(q, limit, max_age_hours) for q in queries]
+        parts = [p for p in parts if not p.empty]
+        return compact_frame(pd.concat(parts, ignore_index=True)) if parts else pd.DataFrame()
+
+    def stats(self):
+        with self._db() as con:
+            videos = con.execute("SELECT COUNT(*), MAX(last_seen) FROM corpus").fetchone()
+            postings = con.execute("SELECT COUNT(*) FROM corpus_terms").fetchone()[0]
+        return {"video": videos[0], "terim_kaydi": postings, "son_ekleme": videos[1]}
+
+    def backfill(self, cache=None, store=None):
+        """
+        Dizin boşsa bir kez doldurur: Apify önbelleğindeki TikTok sonuçları ve yerel depodaki
+        küresel video kaydı (bölge/kapak bilgisi olmadan). Eklenen video sayısını döndürür.
+        """
+        with self._db() as con:
+            if con.execute("SELECT 1 FROM corpus LIMIT 1").fetchone(): return 0
+        added = 0
+        if store is not None:
+            videos = store.all_videos().rename(columns={"video_id": "id"})
+            for seen_at, part in videos.groupby("last_seen"):
+                added += self.add(part.drop(columns="last_seen"), seen_at)
+        if cache is not None:
+            for items, created_at in cache.entries(TIKTOK_ACTORS):
+                seen_at = datetime.fromtimestamp(created_at).isoformat(timespec="seconds")
+                added += self.add(flatten_tiktok_items(items), seen_at)
+        return added
@@ -0,0 +1,58 @@
+"""
+Toplu TikTok araması: birden çok arama terimini tek aktör çalıştırmasında gönderme.
+
+Aktör `searchQueries` listesini kabul eder; tek çalıştırmanın açılış maliyetiyle bir
+kategorinin tüm strateji terimleri taranır. Dönen her video, onu getiren sorguyla
+etiketlenir; birden çok sorgunun getirdiği aynı video tek satıra indirilir.
+"""
+import pandas as pd
+
+from ingest import flatten_tiktok_items
+from product_intent import normalize_turkish
+
+QUERY_COLUMN = "Arama_Sorgusu"
+QUERIES_COLUMN = "Arama_Sorgulari"
+
+def per_query_limit(total_limit, n_queries, minimum=10):
+    """Toplam sonuç bütçesini sorgulara böler (her sorguya en az `minimum`)."""
+    return max(minimum, total_limit // max(n_queries, 1))
+
+def _row_query(search_query, text, queries, by_norm):
+    # Aktör çıktısındaki searchQuery alanı; yoksa başlıkta geçen ilk terim
+    if isinstance(search_query, str) and normalize_turkish(search_query).strip() in by_norm:
+        return by_norm[normalize_turkish(search_query).strip()]
+    if len(queries) == 1: return queries[0]
+    text = normalize_turkish(text)
+    for norm, original in by_norm.items():
+        if norm.lstrip("#") in text: return original
+    return ""
+
+def video_key(df):
+    """Videoyu tekil tanımlayan sütun: id, yoksa webVideoUrl."""
+    if "id" in df.columns: return "id"
+    return "webVideoUrl" if "webVideoUrl" in df.columns else None
+
+def tag_search_frame(df, queries):
+    """
+    Her satıra Arama_Sorgusu (ilk getiren sorgu) ve Arama_Sorgulari (videoyu getiren tüm sorgular)
+    yazar, videoları id/URL'ye göre tekilleştirir.
+    """
+    if df.empty: return df
+    by_norm = {normalize_turkish(q).strip(): q for q in queries}
+    search_col = df["searchQuery"].tolist() if "searchQuery" in df.columns else [None] * len(df)
+    text_col = df["text"].tolist() if "text" in df.columns else [None] * len(df)
+    df = df.copy()
+    df[QUERY_COLUMN] = [_row_query(sq, t, queries, by_norm) for sq, t in zip(search_col, text_col)]
+    key = video_key(df)
+    if key is None:
+        df[QUERIES_COLUMN] = [[q] if q else [] for q in df[QUERY_COLUMN]]
+        return df
+    all_queries = df.groupby(key, sort=False)[QUERY_COLUMN].agg(lambda s: [q for q in dict.fromkeys(s) if q])
+    df = df.drop_duplicates(subset=[key]).reset_index(drop=True)
+    df[QUERIES_COLUMN] = df[key].map(all_queries)
+    return df
+
+def tag_search_results(items, queries):
+    """Aktör öğelerini sıkı şemalı DataFrame'e çevirip tag_search_frame uygular."""
+    if not items: return pd.DataFrame()
+    return tag_search_frame(flatten_tiktok_items(items), queries)
@@ -0,0 +1,131 @@
+"""
+Takip edilen ürünlerin yeniden analizi: arama -> calculate_metrics ->
+filter_content_relevance -> yakın kopya kümeleme -> yerel depoya kayıt.
+
+Streamlit'e bağlı değildir; hem "app copy.py" (GÜNCELLE düğmesi) hem de
+arka plan zamanlayıcısı (scheduler.py) aynı adımları kullanır. Apify istemcisi
+ve önbellek parametre olarak verilir.
+"""
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from ingest import flatten_tiktok_items
+from instrumentation import span
+from metrics import DEFAULT_DECISION_CONFIG, calculate_metrics
+from near_duplicates import collapse_near_duplicates
+from relevance import filter_content_relevance
+
+TIKTOK_SEARCH_ACTOR = "clockworks/tiktok-scraper"
+
+def tiktok_search_input(queries, limit):
+    return {
+        "searchQueries": list(queries),
+        "resultsPerPage": limit,
+        "searchSection": "/video",
+        "shouldDownloadCovers": True,
+        "proxyConfiguration": { "useApifyProxy": True }
+    }
+
+def search_competitors(client, cache, query, limit=15, force_refresh=False, on_run=None, corpus=None):
+    """
+    Tek sorgu için TikTok araması (önbellek üzerinden, sıkı şemada); hata olursa istisna yükseltir.
+    corpus (TextIndex) verilirse sonuçlar yerel başlık dizinine de eklenir.
+    """
+    items = cache.call(client, TIKTOK_SEARCH_ACTOR, tiktok_search_input([query], limit), force_refresh,
+                       on_run=on_run, memory_mbytes=1024, timeout_secs=120)
+    df = flatten_tiktok_items(items) if items else pd.DataFrame()
+    if corpus is not None: corpus.add(df)
+    return df
+
+def score_competitors(df, query, config=None):
+    """
+    calculate_metrics + filter_content_relevance + collapse_near_duplicates (aşama ölçümleriyle).
+    Aynı videoyu yeniden yükleyen hesaplar tek satıra iner (en çok izlenen temsilci kalır).
+    """
+    with span("calculate_metrics", rows_in=len(df)) as s:
+        df = calculate_metrics(df, config)
+        s.set(rows_out=len(df))
+    with span("relevance_filter", rows_in=len(df)) as s:
+        df = filter_content_relevance(df, query)
+        s.set(rows_out=len(df))
+    with span("near_duplicates", rows_in=len(df)) as s:
+        df = collapse_near_duplicates(df)
+        s.set(rows_out=len(df))
+    return df
+
+def total_views(df):
+    """Kümelenmiş satırlarda kümenin tüm videoları (Kume_Izlenme), aksi halde playCount toplamı."""
+    return int(df['Kume_Izlenme' if 'Kume_Izlenme' in df.columns else 'playCount'].sum())
+
+def winner_count(df, config=None):
+    """Winner video sayısı; kümelenmiş satırlarda temsilcinin kümesindeki tüm videolar (Kume_Video) sayılır."""
+    config = config or DEFAULT_DECISION_CONFIG
+    winners = df[df['Karar_Puani'] >= config['winner_min']]
+    return int(winners['Kume_Video'].sum()) if 'Kume_Video' in winners.columns else len(winners)
+
+def generate_smart_analysis(df, config=None):
+    """Pazar özeti metni ve bir sonraki kontrol tarihi (videoların yaşına göre 1/3/7 gün)."""
+    config = config or DEFAULT_DECISION_CONFIG
+    avg_score = df['Karar_Puani'].mean()
+    today = datetime.now()
+    valid_dates = df['createTimeISO'].dropna()
+    if not valid_dates.empty: avg_age_days = (today - valid_dates).dt.days.mean()
+    else: avg_age_days = 30
+    if avg_age_days < 7 and avg_score > 50:
+        next_check_days = 1
+        date_comment = "🔥 **ÇOK TAZE TREND:** Videolar ortalama 1 haftadan yeni."
+    elif avg_age_days < 30:
+        next_check_days = 3
+        date_comment = "✅ **AKTİF TREND:** Videolar son 1 ay içinde."
+    else:
+        next_check_days = 7
+        date_comment = "❄️ **ESKİ TREND:** Videolar biraz eski."
+    next_check_date = today.date() + timedelta(days=next_check_days)
+    analysis = f"📊 **Pazar Özeti ({today.date()}):**\n\n"
+    n_videos = int(df['Kume_Video'].sum()) if 'Kume_Video' in df.columns else len(df)
+    analysis += f"- Toplam {n_videos} video. Kümülatif İzlenme: **{total_views(df):,}**\n"
+    analysis += f"- Winner Sayısı: **{winner_count(df, config)}**\n"
+    analysis += f"- {date_comment}\n"
+    return analysis, str(next_check_date)
+
+def performance_row(df, analysis_text, avg_viral_score, config=None):
+    config = config or DEFAULT_DECISION_CONFIG
+    return str(datetime.now().date()), float(avg_viral_score), total_views(df), winner_count(df, config), analysis_text
+
+def save_refresh(store, product_id, df, analysis_text, next_check_date, config=None, index=None):
+    """
+    Artımlı kayıt: rakip upsert + performans satırı + ürün durumu. Değişiklik sayılarını döndürür.
+    index (VideoIndex) verilirse videolar küresel kayda da işlenir ve başka takip ürünlerinde
+    de geçen videoların sayısı "baska_urunde" olarak eklenir.
+    """
+    avg_viral = df['Viral_Skor'].mean()
+    observed_at = datetime.now().isoformat(timespec="seconds")
+    diff = store.upsert_competitors(product_id, df, observed_at)
+    if index is not None: diff["baska_urunde"] = index.merge(df, observed_at, product_id)[1]["baska_urunde"]
+    store.append_performance(product_id, *performance_row(df, analysis_text, avg_viral, config))
+    store.update_product_status(product_id, str(datetime.now().date()), next_check_date, avg_viral)
+    return diff
+
+def refresh_product(store, client, cache, product, config=None, limit=15, force_refresh=False, on_run=None, index=None, corpus=None):
+    """
+    Tek ürün için tam yeniden analiz. Sonuç sözlüğü döndürür:
+    durum ("ok" / "bos" / "alakasiz"), video sayısı, değişiklikler ve sonraki kontrol tarihi.
+    """
+    query = product['Arama_Sorgusu'] or product['Urun_Adi']
+    df = search_competitors(client, cache, query, limit, force_refresh, on_run, corpus)
+    if df.empty: return {"durum": "bos", "video": 0}
+    df = score_competitors(df, query, config)
+    if df.empty: return {"durum": "alakasiz", "video": 0}
+    analysis, next_check = generate_smart_analysis(df, config)
+    with span("store_save", rows_in=len(df)):
+        diff = save_refresh(store, product['ID'], df, analysis, next_check, config, index)
+    return {"durum": "ok", "video": len(df), "sonraki": next_check, **diff}
+
+def due_products(store, today=None):
+    """Sonraki_Analiz_Tarihi bugün veya daha önce olan ürünler (en gecikmiş önce)."""
+    today = str(today or datetime.now().date())
+    products = store.products()
+    if products.empty: return products
+    next_dates = products['Sonraki_Analiz_Tarihi'].fillna("").str.slice(0, 10)
+    return products[(next_dates != "") & (next_dates <= today)].sort_values('Sonraki_Analiz_Tarihi')
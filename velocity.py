@@ -0,0 +1,63 @@
+"""
+Hız (velocity) motoru: tekrarlanan çekimlerde saklanan video sayaç geçmişinden
+(competitor_snapshots) yaşa göre normalize edilmiş yükseliş sıralaması.
+
+Viral_Skor tek bir andaki oranı ölçer ve videonun yaşını bilmez; eski ama sürekli
+izlenen videolar şu an yükselen ürünlerin önüne geçer. Burada tüm hesaplar
+groupby/diff ile vektöreldir (on binlerce video için satır döngüsü yok):
+
+- Gunluk_Izlenme  : son iki görüntü arasındaki izlenme artışı / gün (tek görüntüde ömür boyu ortalama)
+- Paylasim_Ivmesi : paylaşım hızındaki değişim / gün (paylaşım/gün²)
+- Yas_Persentil   : Gunluk_Izlenme'nin aynı yaş grubundaki videolar arasındaki yüzdelik sırası
+- Yukselis_Skoru  : 0-100, yaş persentili ve ivme persentilinin ağırlıklı ortalaması
+"""
+import numpy as np
+import pandas as pd
+
+# Yaş grupları (gün): aynı gruptaki videolar birbiriyle kıyaslanır
+AGE_BINS = [0, 1, 3, 7, 30, 90, np.inf]
+AGE_LABELS = ["0-1", "1-3", "3-7", "7-30", "30-90", "90+"]
+RISING_WEIGHTS = {"Yas_Persentil": 0.6, "Ivme_Persentil": 0.4}
+MIN_DAYS = 1 / 24  # Bir saatten kısa aralıklar hız hesabında bir saat sayılır
+
+def velocity_metrics(snapshots, videos):
+    """
+    snapshots: video_id, observed_at, playCount, shareCount (+ diğer sayaçlar) - video başına bir veya daha çok satır.
+    videos   : video_id, createTimeISO (yayın tarihi) - yaş için.
+    Video başına tek satırlık hız tablosu döndürür (Yukselis_Skoru'na göre azalan).
+    """
+    if snapshots.empty: return pd.DataFrame()
+    snap = snapshots[["video_id", "observed_at", "playCount", "shareCount"]].sort_values(["video_id", "observed_at"])
+    g = snap.groupby("video_id", sort=False)
+    dt = (g["observed_at"].diff().dt.total_seconds() / 86400).clip(lower=MIN_DAYS)
+    snap = snap.assign(play_rate=g["playCount"].diff() / dt, share_rate=g["shareCount"].diff() / dt, dt=dt)
+    # Paylaşım ivmesi: art arda iki aralığın paylaşım hızı farkı / aralık
+    snap["share_accel"] = snap.groupby("video_id", sort=False)["share_rate"].diff() / snap["dt"]
+    last = snap.groupby("video_id", sort=False).tail(1).set_index("video_id")
+
+    published = videos.drop_duplicates("video_id").set_index("video_id")["createTimeISO"]
+    published = pd.to_datetime(published, errors="coerce").reindex(last.index)
+    age = ((last["observed_at"] - published).dt.total_seconds() / 86400).clip(lower=MIN_DAYS)
+    lifetime_rate = last["playCount"] / age
+
+    out = pd.DataFrame({
+        "Yas_Gun": age.round(1),
+        "playCount": last["playCount"],
+        "shareCount": last["shareCount"],
+        "Gunluk_Izlenme": last["play_rate"].fillna(lifetime_rate).fillna(0.0).round(1),
+        "Paylasim_Ivmesi": last["share_accel"].fillna(0.0).round(2),
+        "Goruntu_Sayisi": g.size(),
+    })
+    out["Yas_Grubu"] = pd.cut(age.fillna(np.inf), AGE_BINS, labels=AGE_LABELS, right=False)
+    out["Yas_Persentil"] = out.groupby("Yas_Grubu", observed=True)["Gunluk_Izlenme"].rank(pct=True)
+    out["Ivme_Persentil"] = out["Paylasim_Ivmesi"].rank(pct=True)
+    out["Yukselis_Skoru"] = sum(out[c] * w for c, w in RISING_WEIGHTS.items()) * 100
+    out["Yukselis_Skoru"] = out["Yukselis_Skoru"].round(1)
+    return out.reset_index().sort_values("Yukselis_Skoru", ascending=False, ignore_index=True)
+
+def rising_ranking(snapshots, videos, top=20):
+    """Yükselenler: velocity_metrics + video bilgileri (metin, link), ilk `top` satır."""
+    vel = velocity_metrics(snapshots, videos)
+    if vel.empty: return vel
+    info = [c for c in ["video_id", "text", "webVideoUrl", "Viral_Skor"] if c in videos.columns]
+    return vel.head(top).merge(videos[info].drop_duplicates("video_id"), on="video_id", how="left")
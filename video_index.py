@@ -0,0 +1,155 @@
+"""
+Küresel video indeksi: aynı TikTok videosu farklı strateji terimlerinden, tekrarlanan
+aramalardan veya birden çok takip ürününden geldiğinde tanınması için.
+
+Bellekte iki katman tutulur, kesin kayıt yerel depodaki videos tablosudur:
+- Bloom filtresi (~1.2 bayt/video, %1 yanlış pozitif): "kesinlikle yeni" videolar
+  SQLite'a ve sıralı diziye hiç sorulmadan ayrılır.
+- Video id'lerinin 64 bitlik özetlerinden oluşan sıralı numpy dizisi (8 bayt/video):
+  filtrenin pozitiflerini np.searchsorted ile doğrular.
+Milyon video ~10 MB tutar. Bilinen videolar için son sayaçlar depodan sadece o id'ler
+için okunur; sayaçları değişmeyenler yeniden yazılmaz, sadece görülme zamanı işlenir.
+"""
+import hashlib
+import math
+import threading
+
+import numpy as np
+
+from store import SNAPSHOT_COLUMNS, competitor_records, video_ids
+
+DEFAULT_CAPACITY = 1_000_000
+DEFAULT_ERROR_RATE = 0.01
+MERGE_EVERY = 65_536  # Yeni özetler bu kadar birikince ana diziye katılır
+
+def id_hashes(ids):
+    """Video id'lerinin 64 bitlik özetleri (uint64)."""
+    return np.fromiter((int.from_bytes(hashlib.blake2b(str(i).encode(), digest_size=8).digest(), "little") for i in ids),
+                       dtype=np.uint64, count=len(ids))
+
+class BloomFilter:
+    """numpy bit dizisi üzerinde, çift özetlemeyle k konumlu Bloom filtresi (toplu ekleme/sorgu)."""
+    def __init__(self, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.size = max(64, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.k = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, hashes):
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(self.k, dtype=np.uint64)
+        return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(self.size)
+
+    def add(self, hashes):
+        pos = self._positions(hashes).ravel()
+        np.bitwise_or.at(self.bits, pos >> np.uint64(3), (1 << (pos & np.uint64(7))).astype(np.uint8))
+        self.count += len(hashes)
+
+    def contains(self, hashes):
+        if len(hashes) == 0: return np.zeros(0, dtype=bool)
+        pos = self._positions(hashes)
+        hit = (self.bits[pos >> np.uint64(3)] >> (pos & np.uint64(7)).astype(np.uint8)) & 1
+        return hit.all(axis=1)
+
+    @property
+    def nbytes(self): return self.bits.nbytes
+
+class VideoIndex:
+    """
+    store: LocalStore. annotate() sadece okur; merge() videoları küresel kayda da yazar.
+    Eklenen sütunlar: Yeni_Video (daha önce hiç görülmedi) ve Diger_Urunler (videonun bağlı
+    olduğu diğer takip ürünlerinin adları).
+    """
+    def __init__(self, store, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+        self.store = store
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        store.backfill_videos()
+        hashes = np.concatenate([id_hashes(ids) for ids in store.iter_video_ids()] or [np.zeros(0, dtype=np.uint64)])
+        self._hashes = np.unique(hashes)
+        self._recent = np.zeros(0, dtype=np.uint64)
+        self._bloom = BloomFilter(max(capacity, 2 * len(self._hashes)), error_rate)
+        self._bloom.add(self._hashes)
+
+    def __len__(self): return len(self._hashes) + len(self._recent)
+
+    @property
+    def nbytes(self): return self._hashes.nbytes + self._recent.nbytes + self._bloom.nbytes
+
+    def _seen_hashes(self, hashes):
+        with self._lock:
+            maybe = self._bloom.contains(hashes)
+            if not maybe.any(): return maybe
+            cand = hashes[maybe]
+            found = np.zeros(len(cand), dtype=bool)
+            for arr in (self._hashes, self._recent):
+                if len(arr):
+                    pos = np.searchsorted(arr, cand).clip(max=len(arr) - 1)
+                    found |= arr[pos] == cand
+            maybe[maybe] = found
+            return maybe
+
+    def _add_hashes(self, hashes):
+        with self._lock:
+            if self._bloom.count + len(hashes) > self._bloom.capacity:
+                # Kapasite aşıldı: iki katı büyüklükte filtre tüm özetlerden yeniden kurulur
+                self._bloom = BloomFilter(2 * (self._bloom.capacity + len(hashes)), self.error_rate)
+                self._bloom.add(np.concatenate([self._hashes, self._recent]))
+            self._bloom.add(hashes)
+            self._recent = np.union1d(self._recent, hashes)
+            if len(self._recent) >= MERGE_EVERY:
+                self._hashes = np.union1d(self._hashes, self._recent)
+                self._recent = np.zeros(0, dtype=np.uint64)
+
+    def seen(self, ids):
+        """Her id için daha önce indekslenip indekslenmediği (bool dizisi)."""
+        return self._seen_hashes(id_hashes(list(ids)))
+
+    def attached(self, ids, exclude_product=None):
+        """video_id -> bağlı olduğu takip ürünlerinin adları (exclude_product hariç)."""
+        links = self.store.video_products(ids)
+        if exclude_product is not None: links = links[links["product_id"] != exclude_product]
+        return links.groupby("video_id")["Urun_Adi"].agg(lambda s: ", ".join(dict.fromkeys(s))).to_dict()
+
+    def annotate(self, df, product_id=None, known=None):
+        """
+        Yeni_Video ve Diger_Urunler sütunlarını ekleyip kopya döndürür (yazma yapmaz).
+        known: video_ids(df) sırasıyla önceden hesaplanmış seen() sonucu (verilmezse hesaplanır).
+        """
+        if df.empty: return df
+        ids = video_ids(df).tolist()
+        if known is None: known = self.seen(ids)
+        links = self.attached([i for i, k in zip(ids, known) if k], product_id) if known.any() else {}
+        return df.assign(Yeni_Video=~known, Diger_Urunler=[links.get(i, "") for i in ids])
+
+    def merge(self, df, observed_at, product_id=None):
+        """
+        annotate + küresel kayda yazma: yeni ve sayaçları değişen videolar upsert edilir,
+        değişmeyenlere sadece görülme işlenir. (işaretli df, {"yeni", "degisen", "ayni", "baska_urunde"}) döner.
+        """
+        if df.empty: return df, {"yeni": 0, "degisen": 0, "ayni": 0, "baska_urunde": 0}
+        # id'ler bir kez özetlenip sorulur; annotate ve yazma aynı sonucu kullanır
+        ids = video_ids(df)
+        all_hashes = id_hashes(ids.tolist())
+        seen = self._seen_hashes(all_hashes)
+        df = self.annotate(df, product_id, known=seen)
+        # competitor_records tekrarlanan id'leri atar: ilk görülen satırlar
+        first = ~ids.duplicated().to_numpy()
+        rec = competitor_records(df)
+        hashes, known = all_hashes[first], seen[first]
+        old = self.store.videos(rec.loc[known, "video_id"].tolist()).set_index("video_id")
+        changed = np.zeros(len(rec), dtype=bool)
+        if len(old):
+            cur = rec.loc[known].set_index("video_id")[SNAPSHOT_COLUMNS]
+            prev = old.reindex(cur.index)[SNAPSHOT_COLUMNS]
+            changed[known] = (cur.to_numpy() != prev.fillna(-1).to_numpy()).any(axis=1)
+        write = ~known | changed
+        self.store.upsert_videos(rec.loc[write], observed_at)
+        self.store.touch_videos(rec.loc[~write, "video_id"].tolist(), observed_at)
+        self._add_hashes(hashes[~known])
+        counts = {"yeni": int((~known).sum()), "degisen": int(changed.sum()), "ayni": int((~write).sum()),
+                  "baska_urunde": int((df["Diger_Urunler"] != "").sum())}
+        return df, counts